@@ -3,6 +3,14 @@
 
 """Actions package is used to run actions provided by the charm."""
 
+from .db_maintenance import DBMaintenanceError, db_maintenance  # noqa: F401
+from .estimate_purge import EstimatePurgeError, estimate_purge  # noqa: F401
+from .migrate_media_to_s3 import MigrateMediaToS3Error, migrate_media_to_s3  # noqa: F401
+from .migrate_to_postgresql import (  # noqa: F401
+    MigrateToPostgreSQLError,
+    check_migration,
+    migrate_to_postgresql,
+)
 from .register_user import RegisterUserError, register_user  # noqa: F401
 
 # Exporting methods to be used for another modules
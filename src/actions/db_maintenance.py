@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Module to interact with DB Maintenance action."""
+
+import logging
+import typing
+
+import psycopg2
+
+from database_client import DatabaseClient, DatasourcePostgreSQL
+
+logger = logging.getLogger(__name__)
+
+# Tables with the highest write churn in Synapse, mostly growing with events and room state.
+HOT_TABLES = [
+    "current_state_delta_stream",
+    "device_inbox",
+    "device_lists_stream",
+    "event_auth",
+    "event_edges",
+    "event_json",
+    "event_push_actions",
+    "events",
+    "receipts_linearized",
+    "room_memberships",
+    "state_group_edges",
+    "state_groups",
+    "state_groups_state",
+    "stream_ordering_to_exterm",
+]
+
+
+class DBMaintenanceError(Exception):
+    """Exception raised when something fails while running db-maintenance.
+
+    Attrs:
+        msg (str): Explanation of the error.
+    """
+
+    def __init__(self, msg: str):
+        """Initialize a new instance of the DBMaintenanceError exception.
+
+        Args:
+            msg (str): Explanation of the error.
+        """
+        self.msg = msg
+
+
+class DBMaintenanceResult(typing.NamedTuple):
+    """A named tuple representing the result of the database maintenance.
+
+    Attributes:
+        tables: tables maintained.
+        bytes_reclaimed: total bytes reclaimed.
+    """
+
+    tables: typing.List[str]
+    bytes_reclaimed: int
+
+
+def db_maintenance(
+    datasources: typing.List[DatasourcePostgreSQL],
+    log: typing.Callable[[str], None],
+    tables: typing.Optional[typing.List[str]] = None,
+    bloat_threshold: float = 0,
+    reindex: bool = False,
+) -> DBMaintenanceResult:
+    """Run db maintenance action.
+
+    Args:
+        datasources: datasources of the databases to maintain.
+        log: function called to report progress.
+        tables: tables to maintain. Defaults to the curated list of hot tables.
+        bloat_threshold: if set, maintain the tables with a higher percentage of dead
+            tuples instead.
+        reindex: whether to rebuild the table indexes.
+
+    Raises:
+        DBMaintenanceError: if something goes wrong while maintaining the database.
+
+    Returns:
+        Tables maintained and bytes reclaimed.
+    """
+    if not datasources:
+        raise DBMaintenanceError("No database relation was found.")
+    maintained_tables: typing.List[str] = []
+    bytes_reclaimed = 0
+    try:
+        for datasource in datasources:
+            db_client = DatabaseClient(datasource=datasource)
+            if tables:
+                selected_tables = tables
+            elif bloat_threshold:
+                selected_tables = db_client.get_bloated_tables(bloat_threshold / 100)
+                log(f"{len(selected_tables)} tables above bloat threshold in {datasource['db']}")
+            else:
+                selected_tables = HOT_TABLES
+            reclaimed = db_client.maintain_tables(tables=selected_tables, reindex=reindex, log=log)
+            maintained_tables.extend(reclaimed)
+            bytes_reclaimed += sum(reclaimed.values())
+    except psycopg2.Error as exc:
+        raise DBMaintenanceError(str(exc)) from exc
+    return DBMaintenanceResult(tables=maintained_tables, bytes_reclaimed=bytes_reclaimed)
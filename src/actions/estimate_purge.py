@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Module to interact with Estimate Purge action."""
+
+import logging
+import time
+import typing
+
+import psycopg2
+
+from charm_state import duration_to_ms
+from database_client import DatabaseClient, DatasourcePostgreSQL
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatePurgeError(Exception):
+    """Exception raised when something fails while running estimate-purge.
+
+    Attrs:
+        msg (str): Explanation of the error.
+    """
+
+    def __init__(self, msg: str):
+        """Initialize a new instance of the EstimatePurgeError exception.
+
+        Args:
+            msg (str): Explanation of the error.
+        """
+        self.msg = msg
+
+
+class EstimatePurgeResult(typing.NamedTuple):
+    """A named tuple representing the purge estimate.
+
+    Attributes:
+        events: estimated number of events eligible for purge.
+        before_ts: events sent before this timestamp in milliseconds are eligible.
+    """
+
+    events: int
+    before_ts: int
+
+
+def estimate_purge(
+    datasource: typing.Optional[DatasourcePostgreSQL], max_lifetime: str
+) -> EstimatePurgeResult:
+    """Estimate the events that would be purged with a maximum lifetime.
+
+    Rooms with their own retention policy are estimated with the same lifetime.
+
+    Args:
+        datasource: datasource to interact with the database.
+        max_lifetime: maximum lifetime of the events, for example 1y.
+
+    Returns:
+        The estimate.
+
+    Raises:
+        EstimatePurgeError: if something goes wrong while estimating.
+    """
+    if datasource is None:
+        raise EstimatePurgeError("No database relation was found.")
+    try:
+        before_ts = int(time.time() * 1000) - duration_to_ms(max_lifetime)
+    except ValueError as exc:
+        raise EstimatePurgeError(str(exc)) from exc
+    try:
+        events = DatabaseClient(datasource=datasource).estimate_events_before(before_ts)
+    except psycopg2.Error as exc:
+        raise EstimatePurgeError(str(exc)) from exc
+    return EstimatePurgeResult(events=events, before_ts=before_ts)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Module to interact with Migrate Media to S3 action."""
+
+import logging
+import typing
+
+import ops
+
+import synapse
+from charm_state import CharmState
+
+logger = logging.getLogger(__name__)
+
+
+class MigrateMediaToS3Error(Exception):
+    """Exception raised when something fails while running migrate-media-to-s3.
+
+    Attrs:
+        msg (str): Explanation of the error.
+    """
+
+    def __init__(self, msg: str):
+        """Initialize a new instance of the MigrateMediaToS3Error exception.
+
+        Args:
+            msg (str): Explanation of the error.
+        """
+        self.msg = msg
+
+
+def migrate_media_to_s3(
+    container: ops.Container,
+    charm_state: CharmState,
+    delete_local: bool,
+    log: typing.Callable[[str], None],
+) -> None:
+    """Run migrate media to S3 action.
+
+    Args:
+        container: Container of the charm.
+        charm_state: charm state from the charm.
+        delete_local: whether to delete the local files once uploaded.
+        log: callback receiving the upload progress.
+
+    Raises:
+        MigrateMediaToS3Error: if something goes wrong while uploading the media.
+    """
+    if charm_state.media_s3 is None:
+        raise MigrateMediaToS3Error("No media-s3 relation was found.")
+    try:
+        logger.info("Upload local media to S3")
+        synapse.execute_s3_media_upload(
+            container=container, charm_state=charm_state, delete_local=delete_local, log=log
+        )
+    except synapse.WorkloadError as exc:
+        raise MigrateMediaToS3Error(str(exc)) from exc
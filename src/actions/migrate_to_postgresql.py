@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Module to interact with Migrate to PostgreSQL action."""
+
+import logging
+import typing
+
+import ops
+import psycopg2
+
+import synapse
+from charm_state import CharmState
+from database_client import DatabaseClient, DatasourcePostgreSQL
+
+logger = logging.getLogger(__name__)
+
+
+class MigrateToPostgreSQLError(Exception):
+    """Exception raised when something fails while running migrate-to-postgresql.
+
+    Attrs:
+        msg (str): Explanation of the error.
+    """
+
+    def __init__(self, msg: str):
+        """Initialize a new instance of the MigrateToPostgreSQLError exception.
+
+        Args:
+            msg (str): Explanation of the error.
+        """
+        self.msg = msg
+
+
+def check_migration(container: ops.Container, charm_state: CharmState) -> None:
+    """Check if the SQLite database can be migrated.
+
+    Args:
+        container: Container of the charm.
+        charm_state: charm state from the charm.
+
+    Raises:
+        MigrateToPostgreSQLError: if the migration can not be run.
+    """
+    if charm_state.datasource is None:
+        raise MigrateToPostgreSQLError("No database relation was found.")
+    # synapse_port_db only supports porting to a single database.
+    if charm_state.state_datasource is not None:
+        raise MigrateToPostgreSQLError(
+            "Remove the state-database relation before migrating to PostgreSQL."
+        )
+    if container.exists(synapse.SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH):
+        raise MigrateToPostgreSQLError(
+            "The SQLite database was already migrated to PostgreSQL, see "
+            f"{synapse.SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH}."
+        )
+    if not container.exists(synapse.SYNAPSE_SQLITE_DATABASE_PATH):
+        raise MigrateToPostgreSQLError(
+            f"SQLite database {synapse.SYNAPSE_SQLITE_DATABASE_PATH} not found."
+        )
+
+
+def migrate_to_postgresql(
+    container: ops.Container,
+    datasource: DatasourcePostgreSQL,
+    log: typing.Callable[[str], None],
+    batch_size: int,
+) -> None:
+    """Run migrate to PostgreSQL action.
+
+    Synapse must be stopped before calling this function.
+
+    Args:
+        container: Container of the charm.
+        datasource: datasource of the target database.
+        log: callback receiving the migration progress.
+        batch_size: number of rows copied per transaction.
+
+    Raises:
+        MigrateToPostgreSQLError: if something goes wrong while migrating.
+    """
+    try:
+        logger.info("Prepare Synapse database")
+        DatabaseClient(datasource=datasource).prepare()
+        logger.info("Port SQLite database to PostgreSQL")
+        synapse.execute_port_db(
+            container=container, datasource=datasource, batch_size=batch_size, log=log
+        )
+    except (psycopg2.Error, synapse.WorkloadError) as exc:
+        raise MigrateToPostgreSQLError(str(exc)) from exc
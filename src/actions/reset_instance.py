@@ -38,24 +38,46 @@ def reset_instance(
     container: ops.Container,
     charm_state: CharmState,
     datasource: typing.Optional[DatasourcePostgreSQL],
+    log: typing.Callable[[str], None],
 ) -> None:
     """Run reset instance action.
 
+    The Synapse data is erased inside the container while the databases are recreated.
+
     Args:
         container: Container of the charm.
         charm_state: charm state from the charm.
         datasource: datasource to interact with the database.
+        log: callback receiving the progress of the reset.
 
     Raises:
         ResetInstanceError: if something goes wrong while resetting the instance.
     """
     try:
-        if datasource is not None:
-            logger.info("Erase Synapse database")
-            # Connecting to template1 to make it possible to erase the database.
-            # Otherwise PostgreSQL will prevent it if there are open connections.
-            db_client = DatabaseClient(datasource=datasource, alternative_database="template1")
-            db_client.erase()
+        log("Erasing Synapse data")
+        data_wipe = synapse.reset_instance(container)
+        try:
+            datasources = [
+                ds for ds in (datasource, charm_state.state_datasource) if ds is not None
+            ]
+            for db_datasource in datasources:
+                log(f"Erasing database {db_datasource['db']}")
+                # Connecting to template1 to make it possible to erase the database.
+                # Otherwise PostgreSQL will prevent it if there are open connections.
+                db_client = DatabaseClient(
+                    datasource=db_datasource, alternative_database="template1"
+                )
+                db_client.erase()
+        finally:
+            # The data wipe is never left running, even if a database was not erased.
+            log("Waiting for Synapse data to be erased")
+            synapse.wait_reset_instance(data_wipe)
+        log("Generating Synapse configuration")
         synapse.execute_migrate_config(container=container, charm_state=charm_state)
-    except (psycopg2.Error, synapse.WorkloadError) as exc:
+    except (
+        psycopg2.Error,
+        synapse.WorkloadError,
+        ops.pebble.APIError,
+        ops.pebble.ChangeError,
+    ) as exc:
         raise ResetInstanceError(str(exc)) from exc
@@ -0,0 +1,101 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Provide the AdminAccessTokenService class to share an admin access token between units."""
+
+import logging
+import typing
+from secrets import token_hex
+
+import ops
+from ops.jujuversion import JujuVersion
+
+import actions
+
+logger = logging.getLogger(__name__)
+
+PEER_RELATION_NAME = "synapse-peers"
+# Disabling it since these are not hardcoded password
+SECRET_ID = "secret-id"  # nosec
+SECRET_KEY = "secret-key"  # nosec
+
+
+class AdminAccessTokenService:  # pylint: disable=too-few-public-methods
+    """The admin access token used by the charm to call the Synapse admin API.
+
+    The token belongs to an admin user created by the leader unit. It is stored in a
+    Juju secret when available, or in the peer relation data otherwise.
+    """
+
+    def __init__(self, charm: ops.CharmBase):
+        """Initialize the service.
+
+        Args:
+            charm: The charm object.
+        """
+        self._charm = charm
+
+    def get(self, container: ops.Container) -> typing.Optional[str]:
+        """Get the admin access token, creating it if needed and possible.
+
+        The admin user can only be created by the leader unit while Synapse is running.
+
+        Args:
+            container: Synapse container.
+
+        Returns:
+            The admin access token or None if not available yet.
+
+        Raises:
+            RegisterUserError: if the admin user can not be created.
+        """
+        peer_relation = self._charm.model.get_relation(PEER_RELATION_NAME)
+        if not peer_relation:
+            return None
+        access_token = self._get_from_peer_data(peer_relation)
+        if access_token is None and self._charm.unit.is_leader():
+            access_token = self._create(container, peer_relation)
+        return access_token
+
+    def _get_from_peer_data(self, peer_relation: ops.Relation) -> typing.Optional[str]:
+        """Read the admin access token from the secret or peer relation data.
+
+        Args:
+            peer_relation: the peer relation.
+
+        Returns:
+            The admin access token or None if not created yet.
+        """
+        app_data = peer_relation.data[self._charm.app]
+        if JujuVersion.from_environ().has_secrets:
+            secret_id = app_data.get(SECRET_ID)
+            if not secret_id:
+                return None
+            secret = self._charm.model.get_secret(id=secret_id)
+            return secret.get_content().get(SECRET_KEY)
+        return app_data.get(SECRET_KEY)
+
+    def _create(self, container: ops.Container, peer_relation: ops.Relation) -> str:
+        """Create an admin user and store its access token.
+
+        Args:
+            container: Synapse container.
+            peer_relation: the peer relation.
+
+        Returns:
+            The admin access token.
+
+        Raises:
+            RegisterUserError: if the admin user can not be created.
+        """
+        # The username is random since the access token of an existing user can only be
+        # retrieved with an admin access token, which is what is being created.
+        admin_user = actions.register_user(container, token_hex(16), True)
+        if JujuVersion.from_environ().has_secrets:
+            logger.debug("Adding admin access token secret")
+            secret = self._charm.app.add_secret({SECRET_KEY: admin_user.access_token})
+            peer_relation.data[self._charm.app].update({SECRET_ID: typing.cast(str, secret.id)})
+        else:
+            logger.debug("Updating peer relation data with admin access token")
+            peer_relation.data[self._charm.app].update({SECRET_KEY: admin_user.access_token})
+        return admin_user.access_token
@@ -0,0 +1,68 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Provide the BackgroundUpdatesObserver class to report Synapse background updates."""
+
+import logging
+import typing
+
+import ops
+
+import actions
+import synapse
+from admin_access_token import AdminAccessTokenService
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundUpdatesObserver(ops.Object):  # pylint: disable=too-few-public-methods
+    """Report the progress of the Synapse background updates in the unit status.
+
+    Background updates run after upgrades to migrate existing data and can keep
+    the database busy for hours, so operators are shown which one is running.
+    """
+
+    def __init__(self, charm: ops.CharmBase):
+        """Initialize a new instance of the BackgroundUpdatesObserver class.
+
+        Args:
+            charm: The charm object that the observer belongs to.
+        """
+        super().__init__(charm, "background-updates-observer")
+        self._charm = charm
+        self._admin_access_token = AdminAccessTokenService(charm)
+        self.framework.observe(charm.on.update_status, self._on_update_status)
+
+    def _on_update_status(self, _: ops.UpdateStatusEvent) -> None:
+        """Show the running background updates in the unit status message."""
+        # Only the message of an active unit is updated to not hide other statuses.
+        if not isinstance(self._charm.unit.status, ops.ActiveStatus):
+            return
+        container = self._charm.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        if not synapse.is_synapse_running(container):
+            return
+        try:
+            admin_access_token = self._admin_access_token.get(container)
+            if admin_access_token is None:
+                return
+            current_updates = synapse.get_background_updates_status(admin_access_token)
+        except (actions.RegisterUserError, synapse.APIError) as exc:
+            logger.warning("Failed to get background updates status: %s", exc)
+            return
+        self._charm.unit.status = ops.ActiveStatus(_format_updates(current_updates))
+
+
+def _format_updates(current_updates: typing.Dict[str, typing.Dict]) -> str:
+    """Format the running background updates as a status message.
+
+    Args:
+        current_updates: the update running on each database.
+
+    Returns:
+        The status message, empty if no update is running.
+    """
+    return "; ".join(
+        f"Background update {update.get('name')} on {database}: "
+        f"{update.get('total_item_count', 0)} items processed"
+        for database, update in sorted(current_updates.items())
+    )
@@ -5,10 +5,12 @@
 
 """Charm for Synapse on kubernetes."""
 
+import dataclasses
 import logging
 import typing
 
 import ops
+import psycopg2
 from charms.nginx_ingress_integrator.v0.nginx_route import require_nginx_route
 from charms.traefik_k8s.v1.ingress import IngressPerAppRequirer
 from ops.charm import ActionEvent
@@ -16,17 +18,22 @@ from ops.main import main
 
 import actions
 import synapse
+from background_updates import BackgroundUpdatesObserver
 from charm_state import CharmConfigInvalidError, CharmState
+from charm_types import DatasourcePostgreSQL
+from database_client import DatabaseClient
 from database_observer import DatabaseObserver
+from media_cache import MediaCacheObserver
 from mjolnir import Mjolnir
 from observability import Observability
 from pebble import PebbleService, PebbleServiceError
+from s3_observer import S3Observer
 from saml_observer import SAMLObserver
 
 logger = logging.getLogger(__name__)
 
 
-class SynapseCharm(ops.CharmBase):
+class SynapseCharm(ops.CharmBase):  # pylint: disable=too-many-instance-attributes
     """Charm the service."""
 
     def __init__(self, *args: typing.Any) -> None:
@@ -37,17 +44,27 @@ class SynapseCharm(ops.CharmBase):
         """
         super().__init__(*args)
         self._database = DatabaseObserver(self)
+        self._pgbouncer = DatabaseObserver(self, relation_name="pgbouncer")
+        self._state_database = DatabaseObserver(
+            self, relation_name="state-database", database_name=f"{self.app.name}_state"
+        )
         self._saml = SAMLObserver(self)
+        self._s3 = S3Observer(self)
+        # When both relations exist, Synapse connects through the pooler.
+        pooled_datasource = self._pgbouncer.get_relation_as_datasource()
         try:
             self._charm_state = CharmState.from_charm(
                 charm=self,
-                datasource=self._database.get_relation_as_datasource(),
+                datasource=pooled_datasource or self._database.get_relation_as_datasource(),
                 saml_config=self._saml.get_relation_as_saml_conf(),
+                datasource_pooled=pooled_datasource is not None,
+                state_datasource=self._state_database.get_relation_as_datasource(),
+                media_s3=self._s3.get_relation_as_s3_parameters(),
             )
         except CharmConfigInvalidError as exc:
             self.model.unit.status = ops.BlockedStatus(exc.msg)
             return
-        self.pebble_service = PebbleService(charm_state=self._charm_state)
+        self.pebble_service = PebbleService(charm_state=self._get_workload_charm_state())
         # service-hostname is a required field so we're hardcoding to the same
         # value as service-name. service-hostname should be set via Nginx
         # Ingress Integrator charm config.
@@ -56,6 +73,9 @@ class SynapseCharm(ops.CharmBase):
             service_hostname=self.app.name,
             service_name=self.app.name,
             service_port=synapse.SYNAPSE_NGINX_PORT,
+            backend_protocol="HTTP",
+            # The ingress accepts the same bodies as the NGINX of the pod does.
+            max_body_size=synapse.get_max_upload_size_mb(self._charm_state),
         )
         self._ingress = IngressPerAppRequirer(
             self,
@@ -66,7 +86,9 @@ class SynapseCharm(ops.CharmBase):
             host=f"{self.app.name}-endpoints.{self.model.name}.svc.cluster.local",
             strip_prefix=True,
         )
-        self._observability = Observability(self)
+        self._observability = Observability(self, self._charm_state)
+        self._background_updates = BackgroundUpdatesObserver(self)
+        self._media_cache = MediaCacheObserver(self, charm_state=self._charm_state)
         # Mjolnir is a moderation tool for Matrix.
         # See https://github.com/matrix-org/mjolnir/ for more details about it.
         if self._charm_state.synapse_config.enable_mjolnir:
@@ -75,6 +97,14 @@ class SynapseCharm(ops.CharmBase):
         self.framework.observe(self.on.reset_instance_action, self._on_reset_instance_action)
         self.framework.observe(self.on.synapse_pebble_ready, self._on_pebble_ready)
         self.framework.observe(self.on.register_user_action, self._on_register_user_action)
+        self.framework.observe(self.on.db_maintenance_action, self._on_db_maintenance_action)
+        self.framework.observe(
+            self.on.migrate_to_postgresql_action, self._on_migrate_to_postgresql_action
+        )
+        self.framework.observe(self.on.estimate_purge_action, self._on_estimate_purge_action)
+        self.framework.observe(
+            self.on.migrate_media_to_s3_action, self._on_migrate_media_to_s3_action
+        )
 
     def replan_nginx(self) -> None:
         """Replan NGINX."""
@@ -83,7 +113,11 @@ class SynapseCharm(ops.CharmBase):
             self.unit.status = ops.MaintenanceStatus("Waiting for pebble")
             return
         self.model.unit.status = ops.MaintenanceStatus("Configuring Synapse NGINX")
-        self.pebble_service.replan_nginx(container)
+        try:
+            self.pebble_service.replan_nginx(container, self.charm_dir / "templates")
+        except PebbleServiceError as exc:
+            self.model.unit.status = ops.BlockedStatus(str(exc))
+            return
         self.model.unit.status = ops.ActiveStatus()
 
     def change_config(self) -> None:
@@ -92,6 +126,12 @@ class SynapseCharm(ops.CharmBase):
         if not container.can_connect():
             self.unit.status = ops.MaintenanceStatus("Waiting for pebble")
             return
+        if self._is_state_database_missing_state():
+            self.unit.status = ops.BlockedStatus(
+                "The state-database is empty but the main database has state, "
+                "remove the state-database integration"
+            )
+            return
         self.model.unit.status = ops.MaintenanceStatus("Configuring Synapse")
         try:
             self.pebble_service.change_config(container)
@@ -112,6 +152,72 @@ class SynapseCharm(ops.CharmBase):
         except synapse.APIError as exc:
             logger.debug("Cannot set workload version at this time: %s", exc)
 
+    def _get_admin_datasource(self) -> typing.Optional[DatasourcePostgreSQL]:
+        """Get the datasource to use for administrative operations on the database.
+
+        The direct relation is preferred over the pooler since the pooler may only
+        expose Synapse's database and runs in transaction pooling mode.
+
+        Returns:
+            The datasource or None if there is no database relation.
+        """
+        return (
+            self._database.get_relation_as_datasource()
+            or self._pgbouncer.get_relation_as_datasource()
+        )
+
+    def _is_sqlite_migration_pending(self) -> bool:
+        """Check if the SQLite database of Synapse has not been migrated to PostgreSQL yet.
+
+        Returns:
+            True if there is a database relation and the SQLite database still exists.
+        """
+        container = self.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        return (
+            self._charm_state.datasource is not None
+            and container.can_connect()
+            and container.exists(synapse.SYNAPSE_SQLITE_DATABASE_PATH)
+        )
+
+    def _get_workload_charm_state(self) -> CharmState:
+        """Get the charm state Synapse is configured with.
+
+        Synapse is kept on SQLite until the migrate-to-postgresql action ports its
+        database, since Synapse would otherwise create its schema in PostgreSQL and
+        the SQLite data could no longer be ported there.
+
+        Returns:
+            The charm state, without the databases while the SQLite migration is pending.
+        """
+        if not self._is_sqlite_migration_pending():
+            return self._charm_state
+        logger.info("Keeping Synapse on SQLite until migrate-to-postgresql is run")
+        return dataclasses.replace(
+            self._charm_state, datasource=None, datasource_pooled=False, state_datasource=None
+        )
+
+    def _is_state_database_missing_state(self) -> bool:
+        """Check if the state database would hide the state kept in the main database.
+
+        Existing state is not moved to the state database, so it can only be used
+        by a deployment that has no state yet.
+
+        Returns:
+            True if the main database has state and the state database has none.
+        """
+        state_datasource = self._charm_state.state_datasource
+        admin_datasource = self._get_admin_datasource()
+        if state_datasource is None or admin_datasource is None:
+            return False
+        try:
+            return (
+                DatabaseClient(datasource=admin_datasource).has_state()
+                and not DatabaseClient(datasource=state_datasource).has_state()
+            )
+        except psycopg2.Error:
+            logger.warning("Failed to compare the state of the databases, skipping the check")
+            return False
+
     def _on_config_changed(self, _: ops.HookEvent) -> None:
         """Handle changed configuration."""
         self.change_config()
@@ -139,13 +245,20 @@ class SynapseCharm(ops.CharmBase):
             return
         try:
             self.model.unit.status = ops.MaintenanceStatus("Resetting Synapse instance")
-            self.pebble_service.reset_instance(container)
-            datasource = self._database.get_relation_as_datasource()
+            event.log("Stopping Synapse")
+            # This is needed in the case of relation with Postgresql.
+            # If there is open connections it won't be possible to drop the database.
+            self.pebble_service.stop_synapse(container)
             actions.reset_instance(
-                container=container, charm_state=self._charm_state, datasource=datasource
+                container=container,
+                charm_state=self._charm_state,
+                datasource=self._get_admin_datasource(),
+                log=event.log,
             )
-            logger.info("Start Synapse")
-            self.pebble_service.restart_synapse(container)
+            # The SQLite database is erased too, so Synapse can now use the databases.
+            self.pebble_service = PebbleService(charm_state=self._charm_state)
+            event.log("Starting Synapse")
+            self.pebble_service.start_synapse(container)
             results["reset-instance"] = True
         except (PebbleServiceError, actions.ResetInstanceError) as exc:
             self.model.unit.status = ops.BlockedStatus(str(exc))
@@ -174,6 +287,130 @@ class SynapseCharm(ops.CharmBase):
         results = {"register-user": True, "user-password": user.password}
         event.set_results(results)
 
+    def _on_db_maintenance_action(self, event: ActionEvent) -> None:
+        """Run maintenance on the Synapse database and report action result.
+
+        Args:
+            event: Event triggering the db maintenance action.
+        """
+        if not self.model.unit.is_leader():
+            event.fail("Only the juju leader unit can run db maintenance action")
+            return
+        datasources = [
+            datasource
+            for datasource in (self._get_admin_datasource(), self._charm_state.state_datasource)
+            if datasource is not None
+        ]
+        tables = [table.strip() for table in event.params.get("tables", "").split(",")]
+        try:
+            result = actions.db_maintenance(
+                datasources=datasources,
+                log=event.log,
+                tables=[table for table in tables if table],
+                bloat_threshold=event.params.get("bloat-threshold", 0),
+                reindex=event.params.get("reindex", False),
+            )
+        except actions.DBMaintenanceError as exc:
+            event.fail(str(exc))
+            return
+        results = {
+            "db-maintenance": True,
+            "tables": ",".join(result.tables),
+            "bytes-reclaimed": result.bytes_reclaimed,
+        }
+        event.set_results(results)
+
+    def _on_migrate_to_postgresql_action(self, event: ActionEvent) -> None:
+        """Migrate the SQLite database to PostgreSQL and report action result.
+
+        Args:
+            event: Event triggering the migrate to PostgreSQL action.
+        """
+        if not self.model.unit.is_leader():
+            event.fail("Only the juju leader unit can run migrate to postgresql action")
+            return
+        container = self.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        if not container.can_connect():
+            event.fail("Failed to connect to container")
+            return
+        try:
+            actions.check_migration(container=container, charm_state=self._charm_state)
+        except actions.MigrateToPostgreSQLError as exc:
+            event.fail(str(exc))
+            return
+        # The pooler may not allow the session level statements run by synapse_port_db.
+        datasource = typing.cast(DatasourcePostgreSQL, self._get_admin_datasource())
+        try:
+            self.model.unit.status = ops.MaintenanceStatus("Migrating Synapse to PostgreSQL")
+            self.pebble_service.stop_synapse(container)
+            actions.migrate_to_postgresql(
+                container=container,
+                datasource=datasource,
+                log=event.log,
+                batch_size=event.params.get("batch-size", 1000),
+            )
+        except (PebbleServiceError, actions.MigrateToPostgreSQLError) as exc:
+            # Synapse is kept stopped to not write to a partially migrated database.
+            # Running the action again resumes the migration.
+            self.model.unit.status = ops.BlockedStatus(str(exc))
+            event.fail(str(exc))
+            return
+        self.pebble_service = PebbleService(charm_state=self._charm_state)
+        self.change_config()
+        event.set_results({"migrate-to-postgresql": True})
+
+    def _on_estimate_purge_action(self, event: ActionEvent) -> None:
+        """Estimate the events eligible for purge and report action result.
+
+        Args:
+            event: Event triggering the estimate purge action.
+        """
+        max_lifetime = (
+            event.params.get("max-lifetime")
+            or self._charm_state.synapse_config.retention_default_policy_max_lifetime
+        )
+        if not max_lifetime:
+            event.fail("Set max-lifetime or the retention_default_policy_max_lifetime config")
+            return
+        try:
+            result = actions.estimate_purge(
+                datasource=self._get_admin_datasource(), max_lifetime=max_lifetime
+            )
+        except actions.EstimatePurgeError as exc:
+            event.fail(str(exc))
+            return
+        results = {
+            "estimate-purge": True,
+            "events": result.events,
+            "before-ts": result.before_ts,
+        }
+        event.set_results(results)
+
+    def _on_migrate_media_to_s3_action(self, event: ActionEvent) -> None:
+        """Upload the local media to S3 and report action result.
+
+        Args:
+            event: Event triggering the migrate media to S3 action.
+        """
+        if not self.model.unit.is_leader():
+            event.fail("Only the juju leader unit can run migrate media to s3 action")
+            return
+        container = self.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        if not container.can_connect():
+            event.fail("Failed to connect to container")
+            return
+        try:
+            actions.migrate_media_to_s3(
+                container=container,
+                charm_state=self._charm_state,
+                delete_local=event.params.get("delete-local", False),
+                log=event.log,
+            )
+        except actions.MigrateMediaToS3Error as exc:
+            event.fail(str(exc))
+            return
+        event.set_results({"migrate-media-to-s3": True})
+
 
 if __name__ == "__main__":  # pragma: nocover
     main(SynapseCharm)
@@ -5,7 +5,9 @@
 
 """State of the Charm."""
 import dataclasses
+import ipaddress
 import itertools
+import re
 import typing
 
 import ops
@@ -18,13 +20,53 @@ from pydantic import (  # pylint: disable=no-name-in-module,import-error
     ValidationError,
     validator,
 )
+from pydantic.fields import ModelField  # pylint: disable=no-name-in-module,import-error
 
-from charm_types import DatasourcePostgreSQL, SAMLConfiguration
+from charm_types import DatasourcePostgreSQL, S3Parameters, SAMLConfiguration
 
 KNOWN_CHARM_CONFIG = (
+    "alive_check_period",
+    "alive_check_threshold",
+    "alive_check_timeout",
+    "background_update_default_batch_size",
+    "background_update_duration_ms",
+    "background_update_min_batch_size",
+    "background_update_sleep_duration_ms",
+    "background_update_sleep_enabled",
+    "enable_media_repository_worker",
     "enable_mjolnir",
+    "dynamic_thumbnails",
+    "enable_retention",
+    "enable_state_compressor",
+    "max_image_pixels",
+    "max_upload_size",
+    "media_cache_max_size",
+    "nginx_access_log_format",
+    "nginx_connection_limit",
+    "nginx_federation_rate_limit",
+    "nginx_gzip_comp_level",
+    "nginx_gzip_min_length",
+    "nginx_login_rate_limit",
+    "nginx_long_poll_read_timeout",
+    "nginx_media_upload_rate_limit",
+    "nginx_register_rate_limit",
+    "nginx_sync_access_log_sample_rate",
+    "nginx_trusted_proxies",
+    "nginx_worker_connections",
     "public_baseurl",
+    "ready_check_period",
+    "ready_check_threshold",
+    "ready_check_timeout",
+    "remote_media_cache_max_age",
+    "remote_media_cache_purge_batch_period",
     "report_stats",
+    "retention_allowed_lifetime_max",
+    "retention_allowed_lifetime_min",
+    "retention_default_policy_max_lifetime",
+    "retention_default_policy_min_lifetime",
+    "retention_purge_job_interval",
+    "retention_purge_job_longest_max_lifetime",
+    "retention_purge_job_shortest_max_lifetime",
     "server_name",
     "smtp_enable_tls",
     "smtp_host",
@@ -32,8 +74,47 @@ KNOWN_CHARM_CONFIG = (
     "smtp_pass",
     "smtp_port",
     "smtp_user",
+    "state_compressor_chunk_size",
+    "state_compressor_interval",
+    "state_compressor_number_of_chunks",
+    "thumbnail_sizes",
 )
 
+# Durations as accepted by Synapse, for example 30d. An empty string means unset.
+DURATION_REGEX = r"^([1-9][0-9]*(ms|s|m|h|d|w|y))?$"
+# Sizes as accepted by Synapse, for example 50M.
+SIZE_REGEX = r"^[1-9][0-9]*[KM]$"
+# NGINX request rates, for example 10r/m. An empty string disables the limit.
+RATE_LIMIT_REGEX = r"^([1-9][0-9]*r/[sm])?$"
+THUMBNAIL_SIZE_REGEX = r"[1-9][0-9]*x[1-9][0-9]*-(crop|scale)"
+DURATION_UNITS_MS = {
+    "ms": 1,
+    "s": 1000,
+    "m": 60 * 1000,
+    "h": 60 * 60 * 1000,
+    "d": 24 * 60 * 60 * 1000,
+    "w": 7 * 24 * 60 * 60 * 1000,
+    "y": 365 * 24 * 60 * 60 * 1000,
+}
+
+
+def duration_to_ms(duration: str) -> int:
+    """Convert a duration like 30d to milliseconds, the same way Synapse does.
+
+    Args:
+        duration: the duration, a number followed by one of ms, s, m, h, d, w or y.
+
+    Returns:
+        The duration in milliseconds.
+
+    Raises:
+        ValueError: if the duration is not valid.
+    """
+    match = re.fullmatch(r"([0-9]+)(ms|s|m|h|d|w|y)", duration)
+    if not match:
+        raise ValueError(f"invalid duration: {duration}")
+    return int(match.group(1)) * DURATION_UNITS_MS[match.group(2)]
+
 
 class CharmConfigInvalidError(Exception):
     """Exception raised when a charm configuration is found to be invalid.
@@ -65,6 +146,49 @@ class SynapseConfig(BaseModel):  # pylint: disable=too-few-public-methods
         smtp_pass: password to authenticate to SMTP host.
         smtp_port: SMTP port.
         smtp_user: username to autehtncate to SMTP host.
+        enable_state_compressor: enable_state_compressor config.
+        state_compressor_chunk_size: state groups processed in each compressor chunk.
+        state_compressor_interval: time between two runs of the state compressor.
+        state_compressor_number_of_chunks: chunks processed in each compressor run.
+        background_update_duration_ms: time spent running each background update batch.
+        background_update_sleep_enabled: whether to sleep between background update batches.
+        background_update_sleep_duration_ms: time to sleep between background update batches.
+        background_update_min_batch_size: minimum number of items in a background update batch.
+        background_update_default_batch_size: number of items in the first batch of an update.
+        enable_retention: enable_retention config.
+        retention_default_policy_min_lifetime: default minimum lifetime of events.
+        retention_default_policy_max_lifetime: default maximum lifetime of events.
+        retention_allowed_lifetime_min: minimum lifetime allowed in room policies.
+        retention_allowed_lifetime_max: maximum lifetime allowed in room policies.
+        retention_purge_job_shortest_max_lifetime: shortest max_lifetime handled by the purge job.
+        retention_purge_job_longest_max_lifetime: longest max_lifetime handled by the purge job.
+        retention_purge_job_interval: time between two runs of the purge job.
+        remote_media_cache_max_age: remote media not accessed for this long is purged.
+        remote_media_cache_purge_batch_period: period of last access purged in each batch.
+        media_cache_max_size: size bound of the NGINX media cache, empty to disable it.
+        enable_media_repository_worker: enable_media_repository_worker config.
+        max_upload_size: largest media upload accepted by Synapse and NGINX.
+        max_image_pixels: largest image that Synapse thumbnails, in pixels.
+        dynamic_thumbnails: whether to generate thumbnails of any size on request.
+        thumbnail_sizes: comma separated thumbnails generated on upload, like 32x32-crop.
+        nginx_worker_connections: maximum connections of each NGINX worker process.
+        nginx_gzip_comp_level: gzip compression level of the NGINX responses.
+        nginx_gzip_min_length: minimum length of the NGINX responses to compress.
+        nginx_long_poll_read_timeout: seconds to wait for a long-polling response.
+        nginx_login_rate_limit: rate of login requests accepted from each client.
+        nginx_register_rate_limit: rate of register requests accepted from each client.
+        nginx_media_upload_rate_limit: rate of media uploads accepted from each client.
+        nginx_federation_rate_limit: rate of federation requests accepted from each server.
+        nginx_connection_limit: connections accepted from each client, 0 for no limit.
+        nginx_trusted_proxies: comma separated addresses of the proxies in front of NGINX.
+        nginx_access_log_format: format of the NGINX access log, main or json.
+        nginx_sync_access_log_sample_rate: percentage of the /sync requests logged by NGINX.
+        ready_check_period: seconds between two ready checks of the Synapse processes.
+        ready_check_timeout: seconds to wait for a ready check of the Synapse processes.
+        ready_check_threshold: failed ready checks before a Synapse process is not ready.
+        alive_check_period: seconds between two alive checks of the Synapse processes.
+        alive_check_timeout: seconds to wait for an alive check of the Synapse processes.
+        alive_check_threshold: failed alive checks before a Synapse process is not alive.
     """
 
     server_name: str | None = Field(..., min_length=2)
@@ -77,6 +201,54 @@ class SynapseConfig(BaseModel):  # pylint: disable=too-few-public-methods
     smtp_pass: str | None = Field(None)
     smtp_port: int | None = Field(None)
     smtp_user: str | None = Field(None)
+    enable_state_compressor: bool = False
+    state_compressor_chunk_size: int = Field(500, ge=1)
+    state_compressor_interval: str = Field("1h", regex=r"^[1-9][0-9]*(s|m|h)$")
+    state_compressor_number_of_chunks: int = Field(100, ge=1)
+    background_update_duration_ms: int = Field(100, ge=1)
+    background_update_sleep_enabled: bool = True
+    background_update_sleep_duration_ms: int = Field(1000, ge=0)
+    background_update_min_batch_size: int = Field(1, ge=1)
+    background_update_default_batch_size: int = Field(100, ge=1)
+    enable_retention: bool = False
+    retention_default_policy_min_lifetime: str = Field("", regex=DURATION_REGEX)
+    retention_default_policy_max_lifetime: str = Field("", regex=DURATION_REGEX)
+    retention_allowed_lifetime_min: str = Field("", regex=DURATION_REGEX)
+    retention_allowed_lifetime_max: str = Field("", regex=DURATION_REGEX)
+    retention_purge_job_shortest_max_lifetime: str = Field("", regex=DURATION_REGEX)
+    retention_purge_job_longest_max_lifetime: str = Field("", regex=DURATION_REGEX)
+    retention_purge_job_interval: str = Field("1d", regex=r"^[1-9][0-9]*(ms|s|m|h|d|w|y)$")
+    remote_media_cache_max_age: str = Field("", regex=DURATION_REGEX)
+    remote_media_cache_purge_batch_period: str = Field(
+        "1d", regex=r"^[1-9][0-9]*(ms|s|m|h|d|w|y)$"
+    )
+    media_cache_max_size: str = Field("1g", regex=r"^([1-9][0-9]*[kmg])?$")
+    enable_media_repository_worker: bool = False
+    max_upload_size: str = Field("50M", regex=SIZE_REGEX)
+    max_image_pixels: str = Field("32M", regex=SIZE_REGEX)
+    dynamic_thumbnails: bool = False
+    thumbnail_sizes: str = Field(
+        "32x32-crop,96x96-crop,320x240-scale,640x480-scale,800x600-scale",
+        regex=rf"^({THUMBNAIL_SIZE_REGEX}(, *{THUMBNAIL_SIZE_REGEX})*)?$",
+    )
+    nginx_worker_connections: int = Field(4096, ge=512)
+    nginx_gzip_comp_level: int = Field(5, ge=1, le=9)
+    nginx_gzip_min_length: int = Field(256, ge=0)
+    nginx_long_poll_read_timeout: int = Field(120, ge=60)
+    nginx_login_rate_limit: str = Field("10r/m", regex=RATE_LIMIT_REGEX)
+    nginx_register_rate_limit: str = Field("5r/m", regex=RATE_LIMIT_REGEX)
+    nginx_media_upload_rate_limit: str = Field("30r/m", regex=RATE_LIMIT_REGEX)
+    nginx_federation_rate_limit: str = Field("50r/s", regex=RATE_LIMIT_REGEX)
+    nginx_connection_limit: int = Field(0, ge=0)
+    nginx_trusted_proxies: str = ""
+    nginx_access_log_format: str = Field("main", regex=r"^(main|json)$")
+    nginx_sync_access_log_sample_rate: int = Field(100, ge=0, le=100)
+    ready_check_period: int = Field(10, ge=1)
+    ready_check_timeout: int = Field(3, ge=1)
+    ready_check_threshold: int = Field(3, ge=1)
+    alive_check_period: int = Field(10, ge=1)
+    alive_check_timeout: int = Field(3, ge=1)
+    alive_check_threshold: int = Field(3, ge=1)
 
     class Config:  # pylint: disable=too-few-public-methods
         """Config class.
@@ -106,6 +278,83 @@ class SynapseConfig(BaseModel):  # pylint: disable=too-few-public-methods
             return server_name
         return smtp_notif_from
 
+    @validator(
+        "retention_default_policy_max_lifetime",
+        "retention_allowed_lifetime_max",
+        "retention_purge_job_longest_max_lifetime",
+    )
+    @classmethod
+    def check_lifetime_range(cls, value: str, values: dict, field: ModelField) -> str:
+        """Check that a maximum lifetime is not lower than its minimum.
+
+        Args:
+            value: the maximum lifetime.
+            values: values already defined.
+            field: the maximum lifetime field.
+
+        Returns:
+            The maximum lifetime.
+
+        Raises:
+            ValueError: if the maximum lifetime is lower than the minimum lifetime.
+        """
+        min_field = {
+            "retention_default_policy_max_lifetime": "retention_default_policy_min_lifetime",
+            "retention_allowed_lifetime_max": "retention_allowed_lifetime_min",
+            "retention_purge_job_longest_max_lifetime": (
+                "retention_purge_job_shortest_max_lifetime"
+            ),
+        }[field.name]
+        min_value = values.get(min_field)
+        if value and min_value and duration_to_ms(value) < duration_to_ms(min_value):
+            raise ValueError(f"{field.name} is lower than {min_field}")
+        return value
+
+    @validator("ready_check_timeout", "alive_check_timeout")
+    @classmethod
+    def check_timeout_below_period(cls, value: int, values: dict, field: ModelField) -> int:
+        """Check that a check timeout is lower than its period, as required by Pebble.
+
+        Args:
+            value: the check timeout.
+            values: values already defined.
+            field: the check timeout field.
+
+        Returns:
+            The check timeout.
+
+        Raises:
+            ValueError: if the check timeout is not lower than the check period.
+        """
+        period_field = field.name.replace("_timeout", "_period")
+        period = values.get(period_field)
+        if period is not None and value >= period:
+            raise ValueError(f"{field.name} is not lower than {period_field}")
+        return value
+
+    @validator("nginx_trusted_proxies")
+    @classmethod
+    def check_trusted_proxies(cls, value: str) -> str:
+        """Check that the trusted proxies are IP addresses or networks, as NGINX requires.
+
+        Args:
+            value: the comma separated trusted proxies.
+
+        Returns:
+            The trusted proxies.
+
+        Raises:
+            ValueError: if a trusted proxy is not an IP address or network.
+        """
+        if not value.strip():
+            return value
+        for trusted_proxy in value.split(","):
+            try:
+                ipaddress.ip_network(trusted_proxy.strip(), strict=False)
+            except ValueError as exc:
+                raise ValueError(f"invalid trusted proxy {trusted_proxy.strip()!r}") from exc
+        return value
+
     @validator("report_stats")
     @classmethod
     def to_yes_or_no(cls, value: str) -> str:
@@ -130,18 +379,28 @@ class CharmState:
         synapse_config: synapse configuration.
         datasource: datasource information.
         saml_config: saml configuration.
+        datasource_pooled: whether the datasource is a transaction pooler like PgBouncer.
+        state_datasource: datasource information of the database holding the state store.
+        media_s3: parameters of the S3 bucket storing the media.
     """
 
     synapse_config: SynapseConfig
     datasource: typing.Optional[DatasourcePostgreSQL]
     saml_config: typing.Optional[SAMLConfiguration]
+    datasource_pooled: bool = False
+    state_datasource: typing.Optional[DatasourcePostgreSQL] = None
+    media_s3: typing.Optional[S3Parameters] = None
 
     @classmethod
-    def from_charm(
+    def from_charm(  # pylint: disable=too-many-arguments
         cls,
         charm: ops.CharmBase,
+        *,
         datasource: typing.Optional[DatasourcePostgreSQL],
         saml_config: typing.Optional[SAMLConfiguration],
+        datasource_pooled: bool = False,
+        state_datasource: typing.Optional[DatasourcePostgreSQL] = None,
+        media_s3: typing.Optional[S3Parameters] = None,
     ) -> "CharmState":
         """Initialize a new instance of the CharmState class from the associated charm.
 
@@ -149,6 +408,9 @@ class CharmState:
             charm: The charm instance associated with this state.
             datasource: datasource information to be used by Synapse.
             saml_config: saml configuration to be used by Synapse.
+            datasource_pooled: whether the datasource is a transaction pooler.
+            state_datasource: datasource of the database holding the state store.
+            media_s3: parameters of the S3 bucket storing the media.
 
         Return:
             The CharmState instance created by the provided charm.
@@ -169,4 +431,7 @@ class CharmState:
             synapse_config=valid_synapse_config,
             datasource=datasource,
             saml_config=saml_config,
+            datasource_pooled=datasource_pooled,
+            state_datasource=state_datasource,
+            media_s3=media_s3,
         )
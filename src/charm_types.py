@@ -36,3 +36,23 @@ class SAMLConfiguration(typing.TypedDict):
 
     entity_id: str
     metadata_url: str
+
+
+class S3Parameters(typing.TypedDict):
+    """A named tuple representing the parameters of an S3 bucket.
+
+    Attributes:
+        access_key: Access key.
+        secret_key: Secret key.
+        bucket: Bucket name.
+        endpoint: Endpoint URL, empty for AWS.
+        region: Region, may be empty.
+        path: Prefix of the objects in the bucket, may be empty.
+    """
+
+    access_key: str
+    secret_key: str
+    bucket: str
+    endpoint: str
+    region: str
+    path: str
@@ -7,7 +7,7 @@ import typing
 
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extensions import connection
+from psycopg2.extensions import connection, cursor
 
 from charm_types import DatasourcePostgreSQL
 from exceptions import CharmDatabaseRelationNotFoundError
@@ -50,13 +50,14 @@ class DatabaseClient:
                 user = self._datasource["user"]
                 password = self._datasource["password"]
                 host = self._datasource["host"]
+                port = self._datasource["port"]
                 database_name = (
                     self._alternative_database
                     if self._alternative_database
                     else self._datasource["db"]
                 )
                 self._conn = psycopg2.connect(
-                    f"dbname='{database_name}' user='{user}' host='{host}'"
+                    f"dbname='{database_name}' user='{user}' host='{host}' port='{port}'"
                     f" password='{password}' connect_timeout=5"
                 )
                 self._conn.autocommit = True
@@ -115,3 +116,180 @@ class DatabaseClient:
             raise
         finally:
             self._close()
+
+    def estimate_events_before(self, timestamp_ms: int) -> int:
+        """Estimate the number of events sent before a timestamp.
+
+        The planner estimate is used instead of counting the events, which would
+        require scanning a large part of the events table.
+
+        Args:
+            timestamp_ms: timestamp in milliseconds since the epoch.
+
+        Returns:
+            The estimated number of events.
+
+        Raises:
+            Error: something went wrong while querying the database.
+        """
+        try:
+            self._connect()
+            with self._conn.cursor() as curs:
+                curs.execute(
+                    sql.SQL(
+                        "EXPLAIN (FORMAT JSON) SELECT 1 FROM events WHERE origin_server_ts < {}"
+                    ).format(sql.Literal(timestamp_ms))
+                )
+                plan = curs.fetchone()[0]
+                return int(plan[0]["Plan"]["Plan Rows"])
+        except psycopg2.Error as exc:
+            logger.exception("Failed to estimate events: %r", exc)
+            raise
+        finally:
+            self._close()
+
+    def get_remote_media_cache_usage(
+        self, before_ts: int
+    ) -> typing.Tuple[typing.Optional[int], int]:
+        """Get the remote media cache not accessed since a timestamp.
+
+        Args:
+            before_ts: timestamp in milliseconds since the epoch.
+
+        Returns:
+            The oldest last access timestamp, None if there is no such media,
+            and the total size in bytes of the media.
+
+        Raises:
+            Error: something went wrong while querying the database.
+        """
+        try:
+            self._connect()
+            with self._conn.cursor() as curs:
+                curs.execute(
+                    "SELECT MIN(last_access_ts), COALESCE(SUM(media_length), 0) "
+                    "FROM remote_media_cache WHERE last_access_ts < %s",
+                    (before_ts,),
+                )
+                oldest_ts, total_bytes = curs.fetchone()
+                return oldest_ts, int(total_bytes)
+        except psycopg2.Error as exc:
+            logger.exception("Failed to get remote media cache usage: %r", exc)
+            raise
+        finally:
+            self._close()
+
+    def has_state(self) -> bool:
+        """Check if the database holds Synapse room state.
+
+        Returns:
+            True if the state_groups_state table exists and has rows.
+
+        Raises:
+            Error: something went wrong while querying the database.
+        """
+        try:
+            self._connect()
+            with self._conn.cursor() as curs:
+                curs.execute("SELECT to_regclass('state_groups_state') IS NOT NULL")
+                if not curs.fetchone()[0]:
+                    return False
+                curs.execute("SELECT EXISTS (SELECT 1 FROM state_groups_state)")
+                return bool(curs.fetchone()[0])
+        except psycopg2.Error as exc:
+            logger.exception("Failed to check the database state: %r", exc)
+            raise
+        finally:
+            self._close()
+
+    def get_bloated_tables(self, dead_tuple_ratio: float) -> typing.List[str]:
+        """Get the tables with a dead tuple ratio above the threshold.
+
+        Args:
+            dead_tuple_ratio: ratio between dead tuples and all tuples, from 0 to 1.
+
+        Returns:
+            List of table names, the most bloated first.
+
+        Raises:
+            Error: something went wrong while querying the database.
+        """
+        try:
+            self._connect()
+            with self._conn.cursor() as curs:
+                curs.execute(
+                    sql.SQL(
+                        "SELECT relname FROM pg_stat_user_tables WHERE n_dead_tup > 0 "
+                        "AND n_dead_tup::float / (n_live_tup + n_dead_tup) >= {} "
+                        "ORDER BY n_dead_tup DESC"
+                    ).format(sql.Literal(dead_tuple_ratio))
+                )
+                return [row[0] for row in curs.fetchall()]
+        except psycopg2.Error as exc:
+            logger.exception("Failed to get bloated tables: %r", exc)
+            raise
+        finally:
+            self._close()
+
+    def maintain_tables(
+        self,
+        tables: typing.List[str],
+        reindex: bool,
+        log: typing.Callable[[str], None],
+    ) -> typing.Dict[str, int]:
+        """Run VACUUM (ANALYZE) and optionally REINDEX on tables.
+
+        The same connection is reused for every table. Tables not found in the
+        database are skipped.
+
+        Args:
+            tables: names of the tables to maintain.
+            reindex: whether to rebuild the table indexes as well.
+            log: function called to report progress.
+
+        Returns:
+            Bytes reclaimed by maintained table, including indexes and TOAST data.
+
+        Raises:
+            Error: something went wrong while maintaining the tables.
+        """
+        reclaimed: typing.Dict[str, int] = {}
+        try:
+            self._connect()
+            with self._conn.cursor() as curs:
+                curs.execute(
+                    "SELECT relname FROM pg_stat_user_tables WHERE relname = ANY(%s)",
+                    (tables,),
+                )
+                existing_tables = {row[0] for row in curs.fetchall()}
+                for table in (table for table in tables if table in existing_tables):
+                    size_before = self._get_table_size(curs, table)
+                    log(f"Vacuuming {table} in {self._database_name}")
+                    curs.execute(sql.SQL("VACUUM (ANALYZE) {}").format(sql.Identifier(table)))
+                    if reindex:
+                        log(f"Reindexing {table} in {self._database_name}")
+                        curs.execute(
+                            sql.SQL("REINDEX TABLE CONCURRENTLY {}").format(sql.Identifier(table))
+                        )
+                    reclaimed[table] = max(size_before - self._get_table_size(curs, table), 0)
+                    log(f"Reclaimed {reclaimed[table]} bytes from {table}")
+        except psycopg2.Error as exc:
+            logger.exception("Failed to maintain tables: %r", exc)
+            raise
+        finally:
+            self._close()
+        return reclaimed
+
+    @staticmethod
+    def _get_table_size(curs: cursor, table: str) -> int:
+        """Get the total size of a table.
+
+        Args:
+            curs: cursor to run the query with.
+            table: table name.
+
+        Returns:
+            Size in bytes of the table, its indexes and TOAST data.
+        """
+        curs.execute("SELECT pg_total_relation_size(quote_ident(%s))", (table,))
+        return int(curs.fetchone()[0])
@@ -14,7 +14,6 @@ from charms.data_platform_libs.v0.data_interfaces import (
 from ops.charm import CharmBase
 from ops.framework import Object
 
-import synapse
 from charm_types import DatasourcePostgreSQL
 from database_client import DatabaseClient
 from exceptions import CharmDatabaseRelationNotFoundError
@@ -25,25 +24,35 @@ logger = logging.getLogger(__name__)
 class DatabaseObserver(Object):
     """The Database relation observer.
 
+    The same observer handles a direct PostgreSQL relation and a relation to a
+    connection pooler such as PgBouncer, both using the postgresql_client interface.
+
     Attrs:
         _pebble_service: instance of pebble service.
     """
 
-    _RELATION_NAME = "database"
-
-    def __init__(self, charm: CharmBase):
+    def __init__(
+        self,
+        charm: CharmBase,
+        relation_name: str = "database",
+        database_name: typing.Optional[str] = None,
+    ):
         """Initialize the observer and register event handlers.
 
         Args:
             charm: The parent charm to attach the observer to.
+            relation_name: Name of the postgresql_client relation to observe.
+            database_name: Name of the database requested. Defaults to the application name.
         """
-        super().__init__(charm, "database-observer")
+        super().__init__(charm, f"{relation_name}-observer")
         self._charm = charm
+        self._relation_name = relation_name
+        self._database_name = database_name or self._charm.app.name
         # SUPERUSER is required to update pg_database
         self.database = DatabaseRequires(
             self._charm,
-            relation_name=self._RELATION_NAME,
-            database_name=self._charm.app.name,
+            relation_name=self._relation_name,
+            database_name=self._database_name,
             extra_user_roles="SUPERUSER",
         )
         self.framework.observe(self.database.on.database_created, self._on_database_created)
@@ -59,18 +68,16 @@ class DatabaseObserver(Object):
         return getattr(self._charm, "pebble_service", None)
 
     def _change_config(self) -> None:
-        """Change the configuration."""
-        container = self._charm.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
-        if not container.can_connect() or self._pebble_service is None:
+        """Change the configuration through the charm.
+
+        The charm checks the databases before configuring Synapse, for example that a
+        new state database does not hide the state kept in the main database.
+        """
+        change_config = getattr(self._charm, "change_config", None)
+        if change_config is None or self._pebble_service is None:
             self._charm.unit.status = ops.MaintenanceStatus("Waiting for pebble")
             return
-        try:
-            self._pebble_service.change_config(container)
-        # Avoiding duplication of code with _change_config in charm.py
-        except Exception as exc:  # pylint: disable=broad-exception-caught
-            self._charm.model.unit.status = ops.BlockedStatus(f"Database failed: {exc}")
-            return
-        self._charm.unit.status = ops.ActiveStatus()
+        change_config()
 
     def _on_database_created(self, _: DatabaseCreatedEvent) -> None:
         """Handle database created."""
@@ -79,6 +86,9 @@ class DatabaseObserver(Object):
         # See discussion here:
         # https://github.com/canonical/synapse-operator/pull/13#discussion_r1253285244
         datasource = self.get_relation_as_datasource()
+        if datasource is None:
+            logger.info("Waiting for the %s endpoints", self._relation_name)
+            return
         db_client = DatabaseClient(datasource=datasource)
         db_client.prepare()
         self._change_config()
@@ -91,22 +101,27 @@ class DatabaseObserver(Object):
         """Get database data from relation.
 
         Returns:
-            Dict: Information needed for setting environment variables.
+            Dict: Information needed for setting environment variables, or None until
+                the provider has published the endpoints and credentials.
         """
-        if self.model.get_relation(self._RELATION_NAME) is None:
+        if self.model.get_relation(self._relation_name) is None:
             return None
 
         relation_id = self.database.relations[0].id
         relation_data = self.database.fetch_relation_data()[relation_id]
+        if not all(relation_data.get(key) for key in ("endpoints", "username", "password")):
+            return None
 
-        endpoint = relation_data.get("endpoints", ":")
+        # Providers may publish several comma separated endpoints, for example
+        # one per PgBouncer unit. Any of them can be used to reach the database.
+        endpoint = relation_data["endpoints"].split(",")[0]
 
         return DatasourcePostgreSQL(
-            user=relation_data.get("username", ""),
-            password=relation_data.get("password", ""),
+            user=relation_data["username"],
+            password=relation_data["password"],
             host=endpoint.split(":")[0],
             port=endpoint.split(":")[1],
-            db=self._charm.app.name,
+            db=self._database_name,
         )
 
     def get_database_name(self) -> str:
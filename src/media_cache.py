@@ -0,0 +1,144 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Provide the MediaCacheObserver class to evict the Synapse remote media cache."""
+
+import logging
+import time
+import typing
+
+import ops
+import psycopg2
+
+import actions
+import synapse
+from admin_access_token import AdminAccessTokenService
+from charm_state import CharmState, duration_to_ms
+from database_client import DatabaseClient
+
+logger = logging.getLogger(__name__)
+
+# Bounds the time spent purging in a single hook, the next run continues from
+# the oldest media left.
+MAX_PURGE_BATCHES_PER_RUN = 10
+
+
+class MediaCachePurgeResult(typing.NamedTuple):
+    """A named tuple representing the result of a remote media cache purge.
+
+    Attributes:
+        deleted: number of media files deleted.
+        bytes_freed: total size of the media deleted, 0 if unknown.
+    """
+
+    deleted: int
+    bytes_freed: int
+
+
+class MediaCacheObserver(ops.Object):  # pylint: disable=too-few-public-methods
+    """Purge the remote media cache on update-status.
+
+    Remote media cached from federation is never evicted by Synapse, so it keeps
+    growing on the data storage.
+    """
+
+    def __init__(self, charm: ops.CharmBase, charm_state: CharmState):
+        """Initialize a new instance of the MediaCacheObserver class.
+
+        Args:
+            charm: The charm object that the observer belongs to.
+            charm_state: Instance of CharmState.
+        """
+        super().__init__(charm, "media-cache-observer")
+        self._charm = charm
+        self._charm_state = charm_state
+        self._admin_access_token = AdminAccessTokenService(charm)
+        self.framework.observe(charm.on.update_status, self._on_update_status)
+
+    def _on_update_status(self, _: ops.UpdateStatusEvent) -> None:
+        """Purge the remote media not accessed for longer than the configured age."""
+        synapse_config = self._charm_state.synapse_config
+        if not synapse_config.remote_media_cache_max_age or not self._charm.unit.is_leader():
+            return
+        container = self._charm.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        if not synapse.is_synapse_running(container):
+            return
+        before_ts = int(time.time() * 1000) - duration_to_ms(
+            synapse_config.remote_media_cache_max_age
+        )
+        try:
+            admin_access_token = self._admin_access_token.get(container)
+            if admin_access_token is None:
+                return
+            result = purge_remote_media_cache(
+                admin_access_token=admin_access_token,
+                charm_state=self._charm_state,
+                before_ts=before_ts,
+                batch_period_ms=duration_to_ms(
+                    synapse_config.remote_media_cache_purge_batch_period
+                ),
+            )
+        except (actions.RegisterUserError, synapse.APIError, psycopg2.Error) as exc:
+            logger.warning("Failed to purge the remote media cache: %s", exc)
+            return
+        logger.info(
+            "Purged %d remote media files, freeing %d bytes", result.deleted, result.bytes_freed
+        )
+
+
+def purge_remote_media_cache(
+    admin_access_token: str, charm_state: CharmState, before_ts: int, batch_period_ms: int
+) -> MediaCachePurgeResult:
+    """Purge the remote media not accessed since a timestamp, in batches.
+
+    Each batch purges the media whose last access is within a period, from the
+    oldest, to keep the work done by each request to Synapse bounded. The oldest
+    access and the size of the media are read from the database, if available.
+    At most MAX_PURGE_BATCHES_PER_RUN batches are purged, the remaining media
+    is left to the next run.
+
+    Args:
+        admin_access_token: server admin access token to be used.
+        charm_state: Instance of CharmState.
+        before_ts: purge media not accessed since this timestamp in milliseconds.
+        batch_period_ms: period of last access times purged in each batch.
+
+    Returns:
+        The number of media files deleted and the bytes freed.
+
+    Raises:
+        Error: if something went wrong while querying the database.
+    """
+    oldest_ts: typing.Optional[int] = None
+    bytes_freed = 0
+    if charm_state.datasource is not None:
+        oldest_ts, bytes_freed = DatabaseClient(
+            datasource=charm_state.datasource
+        ).get_remote_media_cache_usage(before_ts)
+        if oldest_ts is None:
+            return MediaCachePurgeResult(deleted=0, bytes_freed=0)
+    batch_before_ts = [before_ts]
+    if oldest_ts is not None:
+        batch_before_ts = list(range(oldest_ts + batch_period_ms, before_ts, batch_period_ms))
+        batch_before_ts.append(before_ts)
+    if len(batch_before_ts) > MAX_PURGE_BATCHES_PER_RUN:
+        batch_before_ts = batch_before_ts[:MAX_PURGE_BATCHES_PER_RUN]
+        logger.info(
+            "Purging the remote media cache up to %d, the rest is left to the next run",
+            batch_before_ts[-1],
+        )
+        if charm_state.datasource is not None:
+            _, bytes_freed = DatabaseClient(
+                datasource=charm_state.datasource
+            ).get_remote_media_cache_usage(batch_before_ts[-1])
+    synapse_url = (
+        synapse.MEDIA_REPOSITORY_URL
+        if charm_state.synapse_config.enable_media_repository_worker
+        else synapse.SYNAPSE_URL
+    )
+    deleted = 0
+    for batch_ts in batch_before_ts:
+        deleted += synapse.purge_media_cache(
+            admin_access_token=admin_access_token, before_ts=batch_ts, synapse_url=synapse_url
+        )
+    return MediaCachePurgeResult(deleted=deleted, bytes_freed=bytes_freed)
@@ -8,22 +8,39 @@ from charms.grafana_k8s.v0.grafana_dashboard import GrafanaDashboardProvider
 from charms.prometheus_k8s.v0.prometheus_scrape import MetricsEndpointProvider
 
 import synapse
+from charm_state import CharmState
 
 
 class Observability:  # pylint: disable=too-few-public-methods
     """A class representing the observability stack for Synapse application."""
 
-    def __init__(self, charm: ops.CharmBase):
+    def __init__(self, charm: ops.CharmBase, charm_state: CharmState):
         """Initialize a new instance of the Observability class.
 
         Args:
             charm: The charm object that the Observability instance belongs to.
+            charm_state: The charm state.
         """
         self._grafana_dashboards = GrafanaDashboardProvider(
             charm, relation_name="grafana-dashboard"
         )
+        ports = [
+            synapse.PROMETHEUS_TARGET_PORT,
+            synapse.NGINX_EXPORTER_PORT,
+            synapse.NGINX_LOG_EXPORTER_PORT,
+        ]
+        # The database exporter only runs when there is a database.
+        if charm_state.datasource is not None:
+            ports.append(synapse.DB_EXPORTER_PORT)
         self._metrics_endpoint = MetricsEndpointProvider(
             charm,
             relation_name="metrics-endpoint",
-            jobs=[{"static_configs": [{"targets": [f"*:{synapse.PROMETHEUS_TARGET_PORT}"]}]}],
+            jobs=[{"static_configs": [{"targets": [f"*:{port}"]}]} for port in ports],
+            refresh_event=[
+                charm.on.update_status,
+                charm.on["database"].relation_changed,
+                charm.on["database"].relation_broken,
+                charm.on["pgbouncer"].relation_changed,
+                charm.on["pgbouncer"].relation_broken,
+            ],
         )
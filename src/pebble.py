@@ -6,6 +6,7 @@
 """Class to interact with pebble."""
 
 import logging
+import pathlib
 import typing
 
 import ops
@@ -43,6 +44,15 @@ class PebbleService:
         """
         self._charm_state = charm_state
 
+    @property
+    def charm_state(self) -> CharmState:
+        """Return the charm state the services are configured from.
+
+        Returns:
+            The charm state.
+        """
+        return self._charm_state
+
     def restart_synapse(self, container: ops.model.Container) -> None:
         """Restart Synapse service.
 
@@ -53,15 +63,43 @@ class PebbleService:
         """
         logger.debug("Restarting the Synapse container")
         container.add_layer(synapse.SYNAPSE_CONTAINER_NAME, self._pebble_layer, combine=True)
+        if self._charm_state.synapse_config.enable_media_repository_worker:
+            container.restart(
+                synapse.REDIS_SERVICE_NAME,
+                synapse.SYNAPSE_SERVICE_NAME,
+                synapse.MEDIA_REPOSITORY_SERVICE_NAME,
+            )
+            return
+        self._stop_services(
+            container, synapse.MEDIA_REPOSITORY_SERVICE_NAME, synapse.REDIS_SERVICE_NAME
+        )
         container.restart(synapse.SYNAPSE_SERVICE_NAME)
 
-    def replan_nginx(self, container: ops.model.Container) -> None:
+    def replan_nginx(self, container: ops.model.Container, templates_path: pathlib.Path) -> None:
         """Replan Synapse NGINX service.
 
+        NGINX is reloaded if its configuration changed, which keeps serving the
+        open connections with the old configuration.
+
         Args:
             container: Charm container.
+            templates_path: directory of the charm templates.
+
+        Raises:
+            PebbleServiceError: if something goes wrong while pushing the NGINX configuration.
         """
+        try:
+            config_changed = synapse.push_nginx_config(
+                container, self._charm_state, templates_path
+            )
+        except synapse.WorkloadError as exc:
+            raise PebbleServiceError(str(exc)) from exc
         container.add_layer("synapse-nginx", self._nginx_pebble_layer, combine=True)
+        service = container.get_services(synapse.SYNAPSE_NGINX_SERVICE_NAME).get(
+            synapse.SYNAPSE_NGINX_SERVICE_NAME
+        )
+        if config_changed and service is not None and service.is_running():
+            container.send_signal("SIGHUP", synapse.SYNAPSE_NGINX_SERVICE_NAME)
         container.replan()
 
     def replan_mjolnir(self, container: ops.model.Container) -> None:
@@ -73,6 +111,21 @@ class PebbleService:
         container.add_layer("synapse-mjolnir", self._mjolnir_pebble_layer, combine=True)
         container.replan()
 
+    def replan_database_services(self, container: ops.model.Container) -> None:
+        """Replan the services using the Synapse database directly.
+
+        These are the database exporter and, if enabled, the state compressor.
+
+        Args:
+            container: Synapse container.
+
+        Raises:
+            WorkloadError: if the connection file of the state compressor can not be written.
+        """
+        synapse.push_state_compressor_connection(container, self._charm_state)
+        container.add_layer("synapse-database", self._database_services_pebble_layer, combine=True)
+        container.replan()
+
     def change_config(self, container: ops.model.Container) -> None:
         """Change the configuration.
 
@@ -85,14 +138,34 @@ class PebbleService:
         try:
             synapse.execute_migrate_config(container=container, charm_state=self._charm_state)
             synapse.enable_metrics(container=container)
-            synapse.enable_serve_server_wellknown(container=container)
+            synapse.enable_health_listener(container=container)
+            synapse.configure_background_updates(
+                container=container, charm_state=self._charm_state
+            )
+            synapse.configure_media(container=container, charm_state=self._charm_state)
+            if self._charm_state.datasource_pooled:
+                synapse.enable_database_pooling(container=container)
+            if self._charm_state.state_datasource is not None:
+                synapse.enable_state_database(container=container, charm_state=self._charm_state)
+            if self._charm_state.synapse_config.enable_retention:
+                synapse.enable_retention(container=container, charm_state=self._charm_state)
+            if self._charm_state.media_s3 is not None:
+                synapse.enable_s3_media_storage(container=container, charm_state=self._charm_state)
             if self._charm_state.saml_config is not None:
                 logger.debug("pebble.change_config: Enabling SAML")
                 synapse.enable_saml(container=container, charm_state=self._charm_state)
             if self._charm_state.synapse_config.smtp_host:
                 synapse.enable_smtp(container=container, charm_state=self._charm_state)
+            if self._charm_state.synapse_config.enable_media_repository_worker:
+                synapse.enable_media_repository_worker(container=container)
             self.restart_synapse(container)
-        except (synapse.WorkloadError, ops.pebble.PathError) as exc:
+            self.replan_database_services(container)
+        except (
+            synapse.WorkloadError,
+            ops.pebble.APIError,
+            ops.pebble.ChangeError,
+            ops.pebble.PathError,
+        ) as exc:
             raise PebbleServiceError(str(exc)) from exc
 
     def enable_saml(self, container: ops.model.Container) -> None:
@@ -111,8 +184,11 @@ class PebbleService:
         except (synapse.WorkloadError, ops.pebble.PathError) as exc:
             raise PebbleServiceError(str(exc)) from exc
 
-    def reset_instance(self, container: ops.model.Container) -> None:
-        """Reset instance.
+    def stop_synapse(self, container: ops.model.Container) -> None:
+        """Stop Synapse services and prevent Pebble from restarting them.
+
+        The services using the database directly are stopped too, so that no
+        connection to the database is left open.
 
         Args:
             container: Charm container.
@@ -120,8 +196,6 @@ class PebbleService:
         Raises:
             PebbleServiceError: if something goes wrong while interacting with Pebble.
         """
-        # This is needed in the case of relation with Postgresql.
-        # If there is open connections it won't be possible to drop the database.
         try:
             logger.info("Replan service to not restart")
             container.add_layer(
@@ -129,16 +203,55 @@ class PebbleService:
             )
             container.replan()
             logger.info("Stop Synapse instance")
-            container.stop(synapse.SYNAPSE_SERVICE_NAME)
-            logger.info("Erase Synapse data")
-            synapse.reset_instance(container)
-        except ops.pebble.PathError as exc:
+            self._stop_services(
+                container,
+                synapse.MEDIA_REPOSITORY_SERVICE_NAME,
+                synapse.SYNAPSE_SERVICE_NAME,
+                synapse.DB_EXPORTER_SERVICE_NAME,
+                synapse.STATE_COMPRESSOR_SERVICE_NAME,
+            )
+        except (ops.pebble.APIError, ops.pebble.ChangeError, ops.pebble.PathError) as exc:
             raise PebbleServiceError(str(exc)) from exc
 
+    def start_synapse(self, container: ops.model.Container) -> None:
+        """Start the Synapse services stopped by stop_synapse.
+
+        Args:
+            container: Charm container.
+
+        Raises:
+            PebbleServiceError: if something goes wrong while interacting with Pebble.
+        """
+        try:
+            self.restart_synapse(container)
+            self.replan_database_services(container)
+        except (
+            synapse.WorkloadError,
+            ops.pebble.APIError,
+            ops.pebble.ChangeError,
+            ops.pebble.PathError,
+        ) as exc:
+            raise PebbleServiceError(str(exc)) from exc
+
+    def _stop_services(self, container: ops.model.Container, *service_names: str) -> None:
+        """Stop the services that are running.
+
+        Args:
+            container: Charm container.
+            service_names: names of the services to stop.
+        """
+        services = container.get_services(*service_names)
+        running = [
+            name for name in service_names if name in services and services[name].is_running()
+        ]
+        if running:
+            container.stop(*running)
+
     @property
     def _pebble_layer(self) -> ops.pebble.LayerDict:
         """Return a dictionary representing a Pebble layer."""
-        layer = {
+        worker_enabled = self._charm_state.synapse_config.enable_media_repository_worker
+        layer: dict = {
             "summary": "Synapse layer",
             "description": "pebble config layer for Synapse",
             "services": {
@@ -148,11 +261,28 @@ class PebbleService:
                     "startup": "enabled",
                     "command": synapse.SYNAPSE_COMMAND_PATH,
                     "environment": synapse.get_environment(self._charm_state),
-                }
+                },
+                synapse.REDIS_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Redis for the replication between Synapse processes",
+                    "startup": "enabled" if worker_enabled else "disabled",
+                    "command": synapse.get_redis_command(),
+                },
+                synapse.MEDIA_REPOSITORY_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Synapse media repository worker",
+                    "startup": "enabled" if worker_enabled else "disabled",
+                    "command": synapse.get_media_repository_command(),
+                    "environment": synapse.get_environment(self._charm_state),
+                    "after": [synapse.REDIS_SERVICE_NAME, synapse.SYNAPSE_SERVICE_NAME],
+                },
             },
             "checks": {
-                synapse.CHECK_READY_NAME: synapse.check_ready(),
-                synapse.CHECK_ALIVE_NAME: synapse.check_alive(),
+                synapse.CHECK_READY_NAME: synapse.check_ready(self._charm_state),
+                synapse.CHECK_ALIVE_NAME: synapse.check_alive(self._charm_state),
+                synapse.CHECK_MEDIA_REPOSITORY_READY_NAME: synapse.check_media_repository_ready(
+                    self._charm_state
+                ),
             },
         }
         return typing.cast(ops.pebble.LayerDict, layer)
@@ -161,8 +291,9 @@ class PebbleService:
     def _pebble_layer_without_restart(self) -> ops.pebble.LayerDict:
         """Return a dictionary representing a Pebble layer without restart."""
         new_layer = self._pebble_layer
-        new_layer["services"][synapse.SYNAPSE_SERVICE_NAME]["on-success"] = "ignore"
-        new_layer["services"][synapse.SYNAPSE_SERVICE_NAME]["on-failure"] = "ignore"
+        for service_name in (synapse.SYNAPSE_SERVICE_NAME, synapse.MEDIA_REPOSITORY_SERVICE_NAME):
+            new_layer["services"][service_name]["on-success"] = "ignore"
+            new_layer["services"][service_name]["on-failure"] = "ignore"
         ignore = {synapse.CHECK_READY_NAME: "ignore"}
         new_layer["services"][synapse.SYNAPSE_SERVICE_NAME]["on-check-failure"] = ignore
         return new_layer
@@ -178,15 +309,76 @@ class PebbleService:
             "summary": "Synapse nginx layer",
             "description": "Synapse nginx layer",
             "services": {
-                "synapse-nginx": {
+                synapse.SYNAPSE_NGINX_SERVICE_NAME: {
                     "override": "replace",
                     "summary": "Nginx service",
                     "command": "/usr/sbin/nginx",
                     "startup": "enabled",
                 },
+                synapse.NGINX_EXPORTER_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Nginx metrics exporter",
+                    "command": synapse.get_nginx_exporter_command(),
+                    "startup": "enabled",
+                    "after": [synapse.SYNAPSE_NGINX_SERVICE_NAME],
+                },
+                synapse.NGINX_LOG_EXPORTER_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Nginx log exporter for the cache, rate limit and upstream metrics",
+                    "command": f"{synapse.NGINX_LOG_EXPORTER_COMMAND_PATH} "
+                    f"-config-file {synapse.NGINX_LOG_EXPORTER_CONFIG_PATH}",
+                    "startup": "enabled",
+                },
             },
             "checks": {
                 synapse.CHECK_NGINX_READY_NAME: synapse.check_nginx_ready(),
+                synapse.CHECK_NGINX_ALIVE_NAME: synapse.check_nginx_alive(),
+            },
+        }
+        return typing.cast(ops.pebble.LayerDict, layer)
+
+    @property
+    def _database_services_pebble_layer(self) -> ops.pebble.LayerDict:
+        """Generate pebble config for the services using the Synapse database.
+
+        The services are kept disabled if there is no database relation.
+
+        Returns:
+            The pebble configuration for the database services.
+        """
+        has_database = self._charm_state.datasource is not None
+        compressor_command = synapse.get_state_compressor_command(self._charm_state)
+        compressor_enabled = (
+            self._charm_state.synapse_config.enable_state_compressor
+            and compressor_command is not None
+        )
+        interval = self._charm_state.synapse_config.state_compressor_interval
+        layer = {
+            "summary": "Synapse database layer",
+            "description": "Synapse database layer",
+            "services": {
+                synapse.DB_EXPORTER_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Synapse database metrics exporter",
+                    "command": (
+                        f"{synapse.DB_EXPORTER_COMMAND_PATH} --port {synapse.DB_EXPORTER_PORT}"
+                    ),
+                    "startup": "enabled" if has_database else "disabled",
+                    "environment": synapse.get_db_exporter_environment(self._charm_state),
+                },
+                # Pebble has no timers, so the schedule is implemented by restarting the
+                # compressor once it is done, with a constant backoff equal to the interval.
+                synapse.STATE_COMPRESSOR_SERVICE_NAME: {
+                    "override": "replace",
+                    "summary": "Synapse state compressor",
+                    "command": compressor_command or synapse.STATE_COMPRESSOR_COMMAND_PATH,
+                    "startup": "enabled" if compressor_enabled else "disabled",
+                    "on-success": "restart",
+                    "on-failure": "restart",
+                    "backoff-delay": interval,
+                    "backoff-factor": 1,
+                    "backoff-limit": interval,
+                },
             },
         }
         return typing.cast(ops.pebble.LayerDict, layer)
@@ -0,0 +1,121 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""The S3 relation observer."""
+
+# ignoring duplicate-code with container connect check in the database observer.
+# pylint: disable=R0801
+
+import dataclasses
+import logging
+import typing
+
+import ops
+from ops.charm import CharmBase
+from ops.framework import Object
+
+import synapse
+from charm_types import S3Parameters
+from pebble import PebbleService, PebbleServiceError
+
+logger = logging.getLogger(__name__)
+
+
+class S3Observer(Object):
+    """The S3 relation observer.
+
+    The relation uses the s3 interface, as provided by the s3-integrator charm, to
+    get the bucket storing the Synapse media. The provider only publishes the
+    credentials once the requirer has requested a bucket.
+
+    Attrs:
+        _pebble_service: instance of pebble service.
+    """
+
+    _RELATION_NAME = "media-s3"
+
+    def __init__(self, charm: CharmBase):
+        """Initialize the observer and register event handlers.
+
+        Args:
+            charm: The parent charm to attach the observer to.
+        """
+        super().__init__(charm, "s3-observer")
+        self._charm = charm
+        relation_events = self._charm.on[self._RELATION_NAME]
+        self.framework.observe(relation_events.relation_joined, self._on_relation_joined)
+        self.framework.observe(relation_events.relation_changed, self._on_relation_changed)
+        self.framework.observe(relation_events.relation_broken, self._on_relation_broken)
+
+    @property
+    def _pebble_service(self) -> typing.Any:
+        """Return instance of pebble service.
+
+        Returns:
+            instance of pebble service or none.
+        """
+        return getattr(self._charm, "pebble_service", None)
+
+    def _on_relation_joined(self, event: ops.RelationJoinedEvent) -> None:
+        """Request the bucket storing the media.
+
+        Args:
+            event: Event triggering the relation joined handler.
+        """
+        if not self._charm.unit.is_leader():
+            return
+        event.relation.data[self._charm.app].update({"bucket": self._charm.app.name})
+
+    def _on_relation_changed(self, _: ops.RelationChangedEvent) -> None:
+        """Handle S3 relation changes."""
+        self._change_config(self._pebble_service)
+
+    def _on_relation_broken(self, _: ops.RelationBrokenEvent) -> None:
+        """Handle S3 relation removal."""
+        # The broken relation is still listed by the model, so the charm state
+        # built from it is rebuilt without the S3 bucket.
+        if self._pebble_service is None:
+            self._change_config(None)
+            return
+        charm_state = dataclasses.replace(self._pebble_service.charm_state, media_s3=None)
+        self._change_config(PebbleService(charm_state=charm_state))
+
+    def _change_config(self, pebble_service: typing.Optional[PebbleService]) -> None:
+        """Change the Synapse configuration for the S3 media storage.
+
+        Args:
+            pebble_service: pebble service built from the charm state to apply.
+        """
+        container = self._charm.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+        if not container.can_connect() or pebble_service is None:
+            self._charm.unit.status = ops.MaintenanceStatus("Waiting for pebble")
+            return
+        self.model.unit.status = ops.MaintenanceStatus("Configuring the S3 media storage")
+        try:
+            pebble_service.change_config(container)
+        except PebbleServiceError as exc:
+            self._charm.model.unit.status = ops.BlockedStatus(f"S3 integration failed: {exc}")
+            return
+        self._charm.unit.status = ops.ActiveStatus()
+
+    def get_relation_as_s3_parameters(self) -> typing.Optional[S3Parameters]:
+        """Get S3 parameters from relation.
+
+        Returns:
+            The S3 parameters or None if the relation is missing or not ready.
+        """
+        relation = self.model.get_relation(self._RELATION_NAME)
+        if relation is None or relation.app is None:
+            return None
+        relation_data = relation.data[relation.app]
+        if not all(relation_data.get(key) for key in ("access-key", "secret-key", "bucket")):
+            logger.debug("S3 relation data is not complete yet")
+            return None
+        return S3Parameters(
+            access_key=relation_data["access-key"],
+            secret_key=relation_data["secret-key"],
+            bucket=relation_data["bucket"],
+            endpoint=relation_data.get("endpoint", ""),
+            region=relation_data.get("region", ""),
+            path=relation_data.get("path", "").strip("/"),
+        )
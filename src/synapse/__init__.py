@@ -6,6 +6,7 @@
 # Exporting methods to be used for another modules
 from .api import (  # noqa: F401
     ADD_USER_ROOM_URL,
+    BACKGROUND_UPDATES_STATUS_URL,
     CREATE_ROOM_URL,
     DEACTIVATE_ACCOUNT_URL,
     LIST_ROOMS_URL,
@@ -13,6 +14,7 @@ from .api import (  # noqa: F401
     LOGIN_URL,
     MJOLNIR_MANAGEMENT_ROOM,
     MJOLNIR_MEMBERSHIP_ROOM,
+    PURGE_MEDIA_CACHE_PATH,
     REGISTER_URL,
     SYNAPSE_PORT,
     SYNAPSE_URL,
@@ -22,42 +24,126 @@ from .api import (  # noqa: F401
     create_management_room,
     deactivate_user,
     get_access_token,
+    get_background_updates_status,
     get_room_id,
     get_version,
     make_room_admin,
     override_rate_limit,
+    purge_media_cache,
     register_user,
 )
-from .workload import (  # noqa: F401
+from .health import (  # noqa: F401
     CHECK_ALIVE_NAME,
+    CHECK_READY_NAME,
+    SYNAPSE_HEALTH_PORT,
+    SYNAPSE_HEALTH_URL,
+    check_alive,
+    check_ready,
+    enable_health_listener,
+)
+from .media import configure_media, get_max_upload_size_mb  # noqa: F401
+from .nginx import (  # noqa: F401
+    NGINX_CLIENT_KEEPALIVE_REQUESTS,
+    NGINX_EXPORTER_COMMAND_PATH,
+    NGINX_EXPORTER_PORT,
+    NGINX_EXPORTER_SERVICE_NAME,
+    NGINX_HEALTH_CACHE_VALID,
+    NGINX_LOG_EXPORTER_COMMAND_PATH,
+    NGINX_LOG_EXPORTER_CONFIG_PATH,
+    NGINX_LOG_EXPORTER_PORT,
+    NGINX_LOG_EXPORTER_RATE_LIMIT_SYSLOG_PORT,
+    NGINX_LOG_EXPORTER_SERVICE_NAME,
+    NGINX_LOG_EXPORTER_SYSLOG_PORT,
+    NGINX_LOG_EXPORTER_UPSTREAM_SYSLOG_PORT,
+    NGINX_MEDIA_CACHE_VALID,
+    NGINX_RATE_LIMIT_BURSTS,
+    NGINX_STUB_STATUS_PORT,
+    NGINX_UPSTREAM_KEEPALIVE,
+    NGINX_WELL_KNOWN_MAX_AGE,
+    SYNAPSE_NGINX_CONFIG_PATH,
+    SYNAPSE_NGINX_HEALTH_CACHE_PATH,
+    SYNAPSE_NGINX_MEDIA_CACHE_PATH,
+    get_nginx_config,
+    get_nginx_exporter_command,
+    push_nginx_config,
+)
+from .workers import (  # noqa: F401
+    CHECK_MEDIA_REPOSITORY_READY_NAME,
+    MEDIA_REPOSITORY_CONFIG_PATH,
+    MEDIA_REPOSITORY_HEALTH_PORT,
+    MEDIA_REPOSITORY_PORT,
+    MEDIA_REPOSITORY_SERVICE_NAME,
+    MEDIA_REPOSITORY_URL,
+    MEDIA_REPOSITORY_WORKER_NAME,
+    REDIS_PORT,
+    REDIS_SERVICE_NAME,
+    SYNAPSE_REPLICATION_PORT,
+    check_media_repository_ready,
+    enable_media_repository_worker,
+    get_media_repository_command,
+    get_redis_command,
+)
+from .workload import (  # noqa: F401
     CHECK_MJOLNIR_READY_NAME,
+    CHECK_NGINX_ALIVE_NAME,
     CHECK_NGINX_READY_NAME,
-    CHECK_READY_NAME,
     COMMAND_MIGRATE_CONFIG,
+    DATABASE_POOLED_CP_MAX,
+    DATABASE_POOLED_CP_MIN,
+    DATABASE_POOLED_KEEPALIVES_COUNT,
+    DATABASE_POOLED_KEEPALIVES_IDLE,
+    DATABASE_POOLED_KEEPALIVES_INTERVAL,
+    DB_EXPORTER_COMMAND_PATH,
+    DB_EXPORTER_PORT,
+    DB_EXPORTER_SERVICE_NAME,
+    MEDIA_STORE_PATH,
     MJOLNIR_CONFIG_PATH,
     MJOLNIR_HEALTH_PORT,
     MJOLNIR_SERVICE_NAME,
+    PORT_DB_COMMAND_PATH,
+    PORT_DB_CONFIG_PATH,
     PROMETHEUS_TARGET_PORT,
+    S3_MEDIA_UPLOAD_COMMAND_PATH,
+    S3_MEDIA_UPLOAD_DIR,
+    S3_STORAGE_PROVIDER_MODULE,
+    STATE_COMPRESSOR_COMMAND_PATH,
+    STATE_COMPRESSOR_CONNECTION_PATH,
+    STATE_COMPRESSOR_SERVICE_NAME,
     SYNAPSE_COMMAND_PATH,
     SYNAPSE_CONFIG_DIR,
     SYNAPSE_CONFIG_PATH,
     SYNAPSE_CONTAINER_NAME,
     SYNAPSE_NGINX_CONTAINER_NAME,
     SYNAPSE_NGINX_PORT,
+    SYNAPSE_NGINX_SERVICE_NAME,
     SYNAPSE_SERVICE_NAME,
+    SYNAPSE_SQLITE_DATABASE_PATH,
+    SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH,
     ExecResult,
+    PortDBError,
+    S3MediaUploadError,
     WorkloadError,
-    check_alive,
     check_mjolnir_ready,
+    check_nginx_alive,
     check_nginx_ready,
-    check_ready,
+    configure_background_updates,
     create_mjolnir_config,
+    enable_database_pooling,
     enable_metrics,
+    enable_retention,
+    enable_s3_media_storage,
     enable_saml,
-    enable_serve_server_wellknown,
     enable_smtp,
+    enable_state_database,
     execute_migrate_config,
+    execute_port_db,
+    execute_s3_media_upload,
+    get_db_exporter_environment,
     get_environment,
     get_registration_shared_secret,
+    get_state_compressor_command,
+    is_synapse_running,
+    push_state_compressor_connection,
     reset_instance,
+    wait_reset_instance,
 )
@@ -28,6 +28,7 @@ logger = logging.getLogger(__name__)
 SYNAPSE_PORT = 8008
 SYNAPSE_URL = f"http://localhost:{SYNAPSE_PORT}"
 ADD_USER_ROOM_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/join"
+BACKGROUND_UPDATES_STATUS_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/background_updates/status"
 CREATE_ROOM_URL = f"{SYNAPSE_URL}/_matrix/client/v3/createRoom"
 DEACTIVATE_ACCOUNT_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/deactivate"
 LIST_ROOMS_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/rooms"
@@ -35,6 +36,8 @@ LIST_USERS_URL = f"{SYNAPSE_URL}/_synapse/admin/v2/users?from=0&limit=10&name="
 LOGIN_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/users"
 MJOLNIR_MANAGEMENT_ROOM = "management"
 MJOLNIR_MEMBERSHIP_ROOM = "moderators"
+# Served by the process running the media repository.
+PURGE_MEDIA_CACHE_PATH = "/_synapse/admin/v1/purge_media_cache"
 REGISTER_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/register"
 SYNAPSE_VERSION_REGEX = r"(\d+\.\d+\.\d+(?:\w+)?)\s?"
 VERSION_URL = f"{SYNAPSE_URL}/_synapse/admin/v1/server_version"
@@ -92,6 +95,14 @@ class RegisterUserError(APIError):
     """Exception raised when registering user fails."""
 
 
+class GetBackgroundUpdatesStatusError(APIError):
+    """Exception raised when getting background updates status fails."""
+
+
+class PurgeMediaCacheError(APIError):
+    """Exception raised when purging the remote media cache fails."""
+
+
 # admin_access_token is not a password
 def register_user(
     registration_shared_secret: str,
@@ -418,6 +429,73 @@ def make_room_admin(user: User, server: str, admin_access_token: str, room_id: s
     _do_request("POST", url, headers=headers, json=data)
 
 
+def get_background_updates_status(admin_access_token: str) -> typing.Dict[str, typing.Dict]:
+    """Get the background updates currently running.
+
+    Expected API output:
+    {
+        "enabled": true,
+        "current_updates": {
+            "main": {
+                "name": "event_stats",
+                "total_item_count": 63,
+                "total_duration_ms": 1.0,
+                "average_items_per_ms": 63.0
+            }
+        }
+    }
+
+    Args:
+        admin_access_token: server admin access token to be used.
+
+    Returns:
+        The update running on each database, keyed by database name.
+
+    Raises:
+        GetBackgroundUpdatesStatusError: if there was an error while reading the status.
+    """
+    authorization_token = f"Bearer {admin_access_token}"
+    headers = {"Authorization": authorization_token}
+    res = _do_request("GET", BACKGROUND_UPDATES_STATUS_URL, headers=headers)
+    try:
+        return dict(res.json()["current_updates"])
+    except (requests.exceptions.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        logger.exception("Failed to decode background updates: %r. Received: %s", exc, res.text)
+        raise GetBackgroundUpdatesStatusError(str(exc)) from exc
+
+
+def purge_media_cache(
+    admin_access_token: str, before_ts: int, synapse_url: str = SYNAPSE_URL
+) -> int:
+    """Purge the remote media not accessed since a timestamp.
+
+    Expected API output:
+    {
+        "deleted": 10
+    }
+
+    Args:
+        admin_access_token: server admin access token to be used.
+        before_ts: timestamp in milliseconds since the epoch.
+        synapse_url: URL of the Synapse process running the media repository.
+
+    Returns:
+        The number of media files deleted.
+
+    Raises:
+        PurgeMediaCacheError: if there was an error while reading the response.
+    """
+    authorization_token = f"Bearer {admin_access_token}"
+    headers = {"Authorization": authorization_token}
+    url = f"{synapse_url}{PURGE_MEDIA_CACHE_PATH}?before_ts={before_ts}"
+    res = _do_request("POST", url, headers=headers)
+    try:
+        return int(res.json()["deleted"])
+    except (requests.exceptions.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+        logger.exception("Failed to decode purge media cache: %r. Received: %s", exc, res.text)
+        raise PurgeMediaCacheError(str(exc)) from exc
+
+
 def _do_request(
     method: str,
     url: str,
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helper module used to manage the health checks of the Synapse processes."""
+
+import typing
+
+import ops
+import yaml
+from ops.pebble import Check, PathError
+
+from charm_state import CharmState
+
+from .workload import SYNAPSE_CONFIG_PATH, WorkloadError
+
+CHECK_ALIVE_NAME = "synapse-alive"
+CHECK_READY_NAME = "synapse-ready"
+# The health resource is served on its own listener, only reached from the pod,
+# so that the checks do not compete with the client traffic.
+SYNAPSE_HEALTH_PORT = 8009
+SYNAPSE_HEALTH_URL = f"http://127.0.0.1:{SYNAPSE_HEALTH_PORT}/health"
+
+
+def get_health_listener(port: int) -> typing.Dict[str, typing.Any]:
+    """Get the configuration of a Synapse listener serving only the health resource.
+
+    Args:
+        port: port of the listener.
+
+    Returns:
+        The listener configuration.
+    """
+    return {
+        "port": port,
+        "type": "http",
+        "bind_addresses": ["127.0.0.1"],
+        "resources": [{"names": ["health"]}],
+    }
+
+
+def set_check_settings(check: Check, charm_state: CharmState) -> None:
+    """Set the period, timeout and threshold of a check from the charm configuration.
+
+    Args:
+        check: ready or alive check of a Synapse process.
+        charm_state: Instance of CharmState.
+    """
+    synapse_config = charm_state.synapse_config
+    if check.level == "alive":
+        check.period = f"{synapse_config.alive_check_period}s"
+        check.timeout = f"{synapse_config.alive_check_timeout}s"
+        check.threshold = synapse_config.alive_check_threshold
+    else:
+        check.period = f"{synapse_config.ready_check_period}s"
+        check.timeout = f"{synapse_config.ready_check_timeout}s"
+        check.threshold = synapse_config.ready_check_threshold
+
+
+def check_ready(charm_state: CharmState) -> ops.pebble.CheckDict:
+    """Return the Synapse container ready check.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        Dict: check object converted to its dict representation.
+    """
+    check = Check(CHECK_READY_NAME)
+    check.override = "replace"
+    check.level = "ready"
+    check.http = {"url": SYNAPSE_HEALTH_URL}
+    set_check_settings(check, charm_state)
+    return check.to_dict()
+
+
+def check_alive(charm_state: CharmState) -> ops.pebble.CheckDict:
+    """Return the Synapse container alive check.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        Dict: check object converted to its dict representation.
+    """
+    check = Check(CHECK_ALIVE_NAME)
+    check.override = "replace"
+    check.level = "alive"
+    check.http = {"url": SYNAPSE_HEALTH_URL}
+    set_check_settings(check, charm_state)
+    return check.to_dict()
+
+
+def enable_health_listener(container: ops.Container) -> None:
+    """Change the Synapse configuration to serve the health resource on its own listener.
+
+    Args:
+        container: Container of the charm.
+
+    Raises:
+        WorkloadError: something went wrong enabling the health listener.
+    """
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["listeners"].append(get_health_listener(SYNAPSE_HEALTH_PORT))
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except PathError as exc:
+        raise WorkloadError(str(exc)) from exc
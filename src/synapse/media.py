@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helper module used to manage the Synapse media repository configuration."""
+
+import math
+import typing
+
+import ops
+import yaml
+
+from charm_state import CharmState
+
+from .workload import SYNAPSE_CONFIG_PATH, WorkloadError
+
+
+def _get_thumbnail_sizes(thumbnail_sizes: str) -> typing.List[typing.Dict]:
+    """Convert the thumbnail_sizes configuration to the Synapse format.
+
+    Args:
+        thumbnail_sizes: comma separated thumbnails, like 32x32-crop.
+
+    Returns:
+        The thumbnail sizes as expected by Synapse.
+    """
+    sizes = []
+    for thumbnail_size in thumbnail_sizes.split(","):
+        if not thumbnail_size.strip():
+            continue
+        dimensions, method = thumbnail_size.strip().split("-")
+        width, height = dimensions.split("x")
+        sizes.append({"width": int(width), "height": int(height), "method": method})
+    return sizes
+
+
+def get_max_upload_size_mb(charm_state: CharmState) -> int:
+    """Get the max_upload_size configuration in megabytes, rounded up.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The largest media upload accepted by Synapse, in megabytes.
+    """
+    max_upload_size = charm_state.synapse_config.max_upload_size
+    size, unit = int(max_upload_size[:-1]), max_upload_size[-1]
+    if unit == "K":
+        return math.ceil(size / 1024)
+    return size
+
+
+def configure_media(container: ops.Container, charm_state: CharmState) -> None:
+    """Change the Synapse configuration to apply the media limits and thumbnails.
+
+    The upload limit is also applied by NGINX, see get_nginx_config, and by
+    the NGINX ingress, see get_max_upload_size_mb.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong configuring the media.
+    """
+    synapse_config = charm_state.synapse_config
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["max_upload_size"] = synapse_config.max_upload_size
+        current_yaml["max_image_pixels"] = synapse_config.max_image_pixels
+        current_yaml["dynamic_thumbnails"] = synapse_config.dynamic_thumbnails
+        current_yaml["thumbnail_sizes"] = _get_thumbnail_sizes(synapse_config.thumbnail_sizes)
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except ops.pebble.PathError as exc:
+        raise WorkloadError(str(exc)) from exc
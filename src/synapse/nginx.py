@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helper module used to manage the NGINX in front of Synapse."""
+
+import json
+import pathlib
+import typing
+import urllib.parse
+
+import jinja2
+import ops
+
+from charm_state import CharmState
+
+from .api import SYNAPSE_PORT
+from .workers import MEDIA_REPOSITORY_PORT
+from .workload import SYNAPSE_NGINX_PORT, WorkloadError
+
+# Requests served on each connection from the ingress before NGINX closes it.
+NGINX_CLIENT_KEEPALIVE_REQUESTS = 1000
+NGINX_EXPORTER_COMMAND_PATH = "/usr/local/bin/nginx-prometheus-exporter"
+NGINX_EXPORTER_PORT = 9113
+NGINX_EXPORTER_SERVICE_NAME = "synapse-nginx-exporter"
+# Seconds the Synapse health is cached, so probes do not all reach Synapse.
+NGINX_HEALTH_CACHE_VALID = 1
+# Hours media responses without Cache-Control are cached. Synapse sends a max-age
+# of one day on media, which takes precedence, so both match.
+NGINX_MEDIA_CACHE_VALID = 24
+NGINX_LOG_EXPORTER_COMMAND_PATH = "/usr/local/bin/prometheus-nginxlog-exporter"
+NGINX_LOG_EXPORTER_CONFIG_PATH = "/etc/prometheus-nginxlog-exporter.yml"
+NGINX_LOG_EXPORTER_PORT = 9114
+NGINX_LOG_EXPORTER_SERVICE_NAME = "synapse-nginx-log-exporter"
+# Must match the syslog sources of the log exporter configuration in the NGINX rock.
+NGINX_LOG_EXPORTER_SYSLOG_PORT = 5531
+NGINX_LOG_EXPORTER_RATE_LIMIT_SYSLOG_PORT = 5532
+NGINX_LOG_EXPORTER_UPSTREAM_SYSLOG_PORT = 5533
+# Requests above the rate accepted at once from each client, by rate limit zone.
+NGINX_RATE_LIMIT_BURSTS = {"login": 5, "register": 3, "media_upload": 10, "federation": 200}
+NGINX_STUB_STATUS_PORT = 8081
+# Idle connections to each upstream kept open by each NGINX worker process.
+NGINX_UPSTREAM_KEEPALIVE = 32
+# Seconds the well-known responses can be cached by clients and servers.
+NGINX_WELL_KNOWN_MAX_AGE = 3600
+SYNAPSE_NGINX_CONFIG_PATH = "/etc/nginx/nginx.conf"
+SYNAPSE_NGINX_HEALTH_CACHE_PATH = "/var/cache/nginx/health"
+SYNAPSE_NGINX_MEDIA_CACHE_PATH = "/var/cache/nginx/media"
+
+
+class RateLimit(typing.NamedTuple):
+    """A named tuple representing the rate limit of an NGINX zone.
+
+    Attributes:
+        rate: rate of requests accepted from each client, like 10r/m.
+        burst: requests above the rate accepted at once from each client.
+    """
+
+    rate: str
+    burst: int
+
+
+def _get_rate_limits(charm_state: CharmState) -> typing.Dict[str, RateLimit]:
+    """Get the enabled NGINX rate limits.
+
+    The rate limits apply to each client address. Without trusted proxies, that
+    address is the ingress one for every request, so nothing is rate limited.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The rate limits by zone, without the disabled ones.
+    """
+    synapse_config = charm_state.synapse_config
+    if not _get_trusted_proxies(charm_state):
+        return {}
+    rates = {
+        "login": synapse_config.nginx_login_rate_limit,
+        "register": synapse_config.nginx_register_rate_limit,
+        "media_upload": synapse_config.nginx_media_upload_rate_limit,
+        "federation": synapse_config.nginx_federation_rate_limit,
+    }
+    return {
+        zone: RateLimit(rate=rate, burst=NGINX_RATE_LIMIT_BURSTS[zone])
+        for zone, rate in rates.items()
+        if rate
+    }
+
+
+def _get_trusted_proxies(charm_state: CharmState) -> typing.List[str]:
+    """Get the addresses of the proxies whose forwarded client address is trusted.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The trusted proxy addresses or networks.
+    """
+    return [
+        trusted_proxy.strip()
+        for trusted_proxy in charm_state.synapse_config.nginx_trusted_proxies.split(",")
+        if trusted_proxy.strip()
+    ]
+
+
+def _to_nginx_json(value: typing.Dict[str, typing.Any]) -> str:
+    """Serialize a value to JSON to be used in a single-quoted NGINX string.
+
+    NGINX expands variables in the returned text and unescapes backslashes and
+    quotes, so the quotes and dollars are escaped as JSON unicode escapes and the
+    backslashes are doubled.
+
+    Args:
+        value: the value to serialize.
+
+    Returns:
+        The JSON, escaped for a single-quoted NGINX string.
+    """
+    response = json.dumps(value).replace("'", "\\u0027").replace("$", "\\u0024")
+    return response.replace("\\", "\\\\")
+
+
+def _get_well_known(charm_state: CharmState) -> typing.Dict[str, str]:
+    """Get the well-known responses served by NGINX, as Synapse would serve them.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The JSON responses by well-known name, server and client.
+    """
+    server_name = charm_state.synapse_config.server_name
+    public_baseurl = charm_state.synapse_config.public_baseurl or f"https://{server_name}/"
+    if not public_baseurl.endswith("/"):
+        public_baseurl += "/"
+    parsed_baseurl = urllib.parse.urlparse(public_baseurl)
+    server_host = parsed_baseurl.hostname or server_name
+    server_port = parsed_baseurl.port or 443
+    return {
+        "server": _to_nginx_json({"m.server": f"{server_host}:{server_port}"}),
+        "client": _to_nginx_json({"m.homeserver": {"base_url": public_baseurl}}),
+    }
+
+
+def get_nginx_config(charm_state: CharmState, templates_path: pathlib.Path) -> str:
+    """Render the NGINX configuration.
+
+    Args:
+        charm_state: Instance of CharmState.
+        templates_path: directory of the charm templates.
+
+    Returns:
+        The NGINX configuration.
+    """
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(templates_path),
+        keep_trailing_newline=True,
+        autoescape=False,
+    )
+    template = environment.get_template("nginx.conf.j2")
+    media_port = (
+        MEDIA_REPOSITORY_PORT
+        if charm_state.synapse_config.enable_media_repository_worker
+        else SYNAPSE_PORT
+    )
+    return template.render(
+        port=SYNAPSE_NGINX_PORT,
+        synapse_port=SYNAPSE_PORT,
+        media_port=media_port,
+        max_upload_size=charm_state.synapse_config.max_upload_size,
+        worker_connections=charm_state.synapse_config.nginx_worker_connections,
+        upstream_keepalive=NGINX_UPSTREAM_KEEPALIVE,
+        client_keepalive_requests=NGINX_CLIENT_KEEPALIVE_REQUESTS,
+        gzip_comp_level=charm_state.synapse_config.nginx_gzip_comp_level,
+        gzip_min_length=charm_state.synapse_config.nginx_gzip_min_length,
+        long_poll_read_timeout=charm_state.synapse_config.nginx_long_poll_read_timeout,
+        media_cache_path=SYNAPSE_NGINX_MEDIA_CACHE_PATH,
+        health_cache_path=SYNAPSE_NGINX_HEALTH_CACHE_PATH,
+        health_cache_valid=NGINX_HEALTH_CACHE_VALID,
+        media_cache_valid=NGINX_MEDIA_CACHE_VALID,
+        media_cache_max_size=charm_state.synapse_config.media_cache_max_size,
+        log_exporter_syslog_port=NGINX_LOG_EXPORTER_SYSLOG_PORT,
+        rate_limits=_get_rate_limits(charm_state),
+        connection_limit=charm_state.synapse_config.nginx_connection_limit,
+        rate_limit_syslog_port=NGINX_LOG_EXPORTER_RATE_LIMIT_SYSLOG_PORT,
+        upstream_syslog_port=NGINX_LOG_EXPORTER_UPSTREAM_SYSLOG_PORT,
+        stub_status_port=NGINX_STUB_STATUS_PORT,
+        access_log_format=charm_state.synapse_config.nginx_access_log_format,
+        sync_access_log_sample_rate=charm_state.synapse_config.nginx_sync_access_log_sample_rate,
+        well_known=_get_well_known(charm_state),
+        well_known_max_age=NGINX_WELL_KNOWN_MAX_AGE,
+        trusted_proxies=_get_trusted_proxies(charm_state),
+    )
+
+
+def get_nginx_exporter_command() -> str:
+    """Get the command to run the NGINX exporter.
+
+    Returns:
+        The NGINX exporter command.
+    """
+    return (
+        f"{NGINX_EXPORTER_COMMAND_PATH} "
+        f"-nginx.scrape-uri=http://127.0.0.1:{NGINX_STUB_STATUS_PORT}/stub_status "
+        f"-web.listen-address=:{NGINX_EXPORTER_PORT}"
+    )
+
+
+def push_nginx_config(
+    container: ops.Container, charm_state: CharmState, templates_path: pathlib.Path
+) -> bool:
+    """Push the NGINX configuration to the NGINX container.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+        templates_path: directory of the charm templates.
+
+    Returns:
+        True if the configuration changed.
+
+    Raises:
+        WorkloadError: something went wrong pushing the configuration.
+    """
+    config = get_nginx_config(charm_state, templates_path)
+    try:
+        if container.exists(SYNAPSE_NGINX_CONFIG_PATH):
+            current_config = container.pull(SYNAPSE_NGINX_CONFIG_PATH).read()
+            if current_config == config:
+                return False
+        container.push(SYNAPSE_NGINX_CONFIG_PATH, config, make_dirs=True)
+    except ops.pebble.PathError as exc:
+        raise WorkloadError(str(exc)) from exc
+    return True
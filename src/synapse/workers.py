@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Helper module used to manage the Synapse workers."""
+
+import ops
+import yaml
+from ops.pebble import Check, PathError
+
+from charm_state import CharmState
+
+from .health import SYNAPSE_HEALTH_URL, get_health_listener, set_check_settings
+from .workload import SYNAPSE_CONFIG_DIR, SYNAPSE_CONFIG_PATH, WorkloadError
+
+CHECK_MEDIA_REPOSITORY_READY_NAME = "synapse-media-repository-ready"
+MEDIA_REPOSITORY_CONFIG_PATH = f"{SYNAPSE_CONFIG_DIR}/media_repository.yaml"
+MEDIA_REPOSITORY_HEALTH_PORT = 8086
+MEDIA_REPOSITORY_PORT = 8085
+MEDIA_REPOSITORY_SERVICE_NAME = "synapse-media-repository"
+MEDIA_REPOSITORY_URL = f"http://localhost:{MEDIA_REPOSITORY_PORT}"
+MEDIA_REPOSITORY_WORKER_NAME = "media_repository1"
+# Workers only replicate through Redis, which runs next to them as it is
+# only reached from the Synapse container.
+REDIS_COMMAND_PATH = "/usr/bin/redis-server"
+REDIS_PORT = 6379
+REDIS_SERVICE_NAME = "synapse-redis"
+SYNAPSE_REPLICATION_PORT = 8034
+
+
+def check_media_repository_ready(charm_state: CharmState) -> ops.pebble.CheckDict:
+    """Return the Synapse media repository worker check.
+
+    Pebble does not remove the checks missing from a combined layer, so the check
+    is kept when the worker is disabled. The media is then served by the main
+    process, whose health is checked instead.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        Dict: check object converted to its dict representation.
+    """
+    check = Check(CHECK_MEDIA_REPOSITORY_READY_NAME)
+    check.override = "replace"
+    check.level = "ready"
+    if charm_state.synapse_config.enable_media_repository_worker:
+        check.http = {"url": f"http://127.0.0.1:{MEDIA_REPOSITORY_HEALTH_PORT}/health"}
+    else:
+        check.http = {"url": SYNAPSE_HEALTH_URL}
+    set_check_settings(check, charm_state)
+    return check.to_dict()
+
+
+def get_media_repository_command() -> str:
+    """Get the command to run the media repository worker.
+
+    Returns:
+        The media repository worker command.
+    """
+    return (
+        "/usr/bin/python3 -m synapse.app.media_repository "
+        f"--config-path {SYNAPSE_CONFIG_PATH} --config-path {MEDIA_REPOSITORY_CONFIG_PATH}"
+    )
+
+
+def get_redis_command() -> str:
+    """Get the command to run Redis for the replication between Synapse processes.
+
+    Returns:
+        The Redis command.
+    """
+    return f"{REDIS_COMMAND_PATH} --bind 127.0.0.1 --port {REDIS_PORT} --save '' --appendonly no"
+
+
+def enable_media_repository_worker(container: ops.Container) -> None:
+    """Change the Synapse configuration to move the media repository to a worker.
+
+    The main process stops serving media and replicates with the worker through
+    Redis. The worker configuration is pushed next to the Synapse configuration.
+
+    Args:
+        container: Container of the charm.
+
+    Raises:
+        WorkloadError: something went wrong enabling the media repository worker.
+    """
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["enable_media_repo"] = False
+        current_yaml["media_instance_running_background_jobs"] = MEDIA_REPOSITORY_WORKER_NAME
+        current_yaml["redis"] = {"enabled": True, "host": "localhost", "port": REDIS_PORT}
+        current_yaml["instance_map"] = {
+            "main": {"host": "localhost", "port": SYNAPSE_REPLICATION_PORT}
+        }
+        current_yaml["listeners"].append(
+            {
+                "port": SYNAPSE_REPLICATION_PORT,
+                "type": "http",
+                "bind_addresses": ["127.0.0.1"],
+                "resources": [{"names": ["replication"]}],
+            }
+        )
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+        worker_config = {
+            "worker_app": "synapse.app.media_repository",
+            "worker_name": MEDIA_REPOSITORY_WORKER_NAME,
+            "worker_listeners": [
+                {
+                    "port": MEDIA_REPOSITORY_PORT,
+                    "type": "http",
+                    "x_forwarded": True,
+                    "bind_addresses": ["::"],
+                    "resources": [{"names": ["media"]}],
+                },
+                get_health_listener(MEDIA_REPOSITORY_HEALTH_PORT),
+            ],
+        }
+        container.push(MEDIA_REPOSITORY_CONFIG_PATH, yaml.safe_dump(worker_config))
+    except PathError as exc:
+        raise WorkloadError(str(exc)) from exc
@@ -5,6 +5,7 @@
 
 """Helper module used to manage interactions with Synapse."""
 
+import collections
 import logging
 import typing
 
@@ -13,25 +14,49 @@ import yaml
 from ops.pebble import Check, ExecError, PathError
 
 from charm_state import CharmState
+from charm_types import DatasourcePostgreSQL, S3Parameters
 
-from .api import SYNAPSE_PORT, SYNAPSE_URL, VERSION_URL
+from .api import SYNAPSE_URL
 
-CHECK_ALIVE_NAME = "synapse-alive"
 CHECK_MJOLNIR_READY_NAME = "synapse-mjolnir-ready"
+CHECK_NGINX_ALIVE_NAME = "synapse-nginx-alive"
 CHECK_NGINX_READY_NAME = "synapse-nginx-ready"
-CHECK_READY_NAME = "synapse-ready"
 COMMAND_MIGRATE_CONFIG = "migrate_config"
+# Connection pool of each Synapse process when connected through a transaction pooler.
+# It is smaller than the Synapse default of 5 to 10 connections: the pooler multiplexes
+# them into PostgreSQL server connections, so few are needed even with many processes.
+DATABASE_POOLED_CP_MIN = 1
+DATABASE_POOLED_CP_MAX = 5
+# TCP keepalives detecting connections dropped by the pooler within about a minute.
+DATABASE_POOLED_KEEPALIVES_COUNT = 3
+DATABASE_POOLED_KEEPALIVES_IDLE = 10
+DATABASE_POOLED_KEEPALIVES_INTERVAL = 10
+DB_EXPORTER_COMMAND_PATH = "/usr/local/bin/synapse_db_exporter.py"
+DB_EXPORTER_PORT = 9187
+DB_EXPORTER_SERVICE_NAME = "synapse-db-exporter"
 SYNAPSE_CONFIG_DIR = "/data"
+MEDIA_STORE_PATH = f"{SYNAPSE_CONFIG_DIR}/media_store"
 MJOLNIR_CONFIG_PATH = f"{SYNAPSE_CONFIG_DIR}/config/production.yaml"
 MJOLNIR_HEALTH_PORT = 7777
 MJOLNIR_SERVICE_NAME = "mjolnir"
+PORT_DB_COMMAND_PATH = "/usr/local/bin/synapse_port_db"
+PORT_DB_CONFIG_PATH = f"{SYNAPSE_CONFIG_DIR}/port_db.yaml"
 PROMETHEUS_TARGET_PORT = "9000"
+S3_MEDIA_UPLOAD_COMMAND_PATH = "/usr/local/bin/s3_media_upload"
+S3_MEDIA_UPLOAD_DIR = f"{SYNAPSE_CONFIG_DIR}/s3_media_upload"
+S3_STORAGE_PROVIDER_MODULE = "s3_storage_provider.S3StorageProviderBackend"
 SYNAPSE_COMMAND_PATH = "/start.py"
 SYNAPSE_CONFIG_PATH = f"{SYNAPSE_CONFIG_DIR}/homeserver.yaml"
 SYNAPSE_CONTAINER_NAME = "synapse"
 SYNAPSE_NGINX_CONTAINER_NAME = "synapse-nginx"
 SYNAPSE_NGINX_PORT = 8080
+SYNAPSE_NGINX_SERVICE_NAME = "synapse-nginx"
 SYNAPSE_SERVICE_NAME = "synapse"
+SYNAPSE_SQLITE_DATABASE_PATH = f"{SYNAPSE_CONFIG_DIR}/homeserver.db"
+SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH = f"{SYNAPSE_SQLITE_DATABASE_PATH}.migrated"
+STATE_COMPRESSOR_COMMAND_PATH = "/usr/local/bin/synapse_auto_compressor"
+STATE_COMPRESSOR_CONNECTION_PATH = f"{SYNAPSE_CONFIG_DIR}/state_compressor.conn"
+STATE_COMPRESSOR_SERVICE_NAME = "synapse-state-compressor"
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +97,14 @@ class EnableSAMLError(WorkloadError):
     """Exception raised when something goes wrong while enabling SAML."""
 
 
+class PortDBError(WorkloadError):
+    """Exception raised when something goes wrong while porting the SQLite database."""
+
+
+class S3MediaUploadError(WorkloadError):
+    """Exception raised when something goes wrong while uploading media to S3."""
+
+
 class ExecResult(typing.NamedTuple):
     """A named tuple representing the result of executing a command.
 
@@ -86,56 +119,63 @@ class ExecResult(typing.NamedTuple):
     stderr: str
 
 
-def check_ready() -> ops.pebble.CheckDict:
-    """Return the Synapse container ready check.
+def check_nginx_ready() -> ops.pebble.CheckDict:
+    """Return the Synapse NGINX container check.
+
+    NGINX is ready only when Synapse is, so that the unit is drained while
+    Synapse is restarting.
 
     Returns:
         Dict: check object converted to its dict representation.
     """
-    check = Check(CHECK_READY_NAME)
+    check = Check(CHECK_NGINX_READY_NAME)
     check.override = "replace"
     check.level = "ready"
-    check.http = {"url": VERSION_URL}
+    check.http = {"url": f"http://localhost:{SYNAPSE_NGINX_PORT}/health"}
     return check.to_dict()
 
 
-def check_alive() -> ops.pebble.CheckDict:
-    """Return the Synapse container alive check.
+def check_nginx_alive() -> ops.pebble.CheckDict:
+    """Return the Synapse NGINX container alive check.
 
     Returns:
         Dict: check object converted to its dict representation.
     """
-    check = Check(CHECK_ALIVE_NAME)
+    check = Check(CHECK_NGINX_ALIVE_NAME)
     check.override = "replace"
     check.level = "alive"
-    check.tcp = {"port": SYNAPSE_PORT}
+    check.http = {"url": f"http://localhost:{SYNAPSE_NGINX_PORT}/health/live"}
     return check.to_dict()
 
 
-def check_nginx_ready() -> ops.pebble.CheckDict:
-    """Return the Synapse NGINX container check.
+def check_mjolnir_ready() -> ops.pebble.CheckDict:
+    """Return the Synapse Mjolnir service check.
 
     Returns:
         Dict: check object converted to its dict representation.
     """
-    check = Check(CHECK_NGINX_READY_NAME)
+    check = Check(CHECK_MJOLNIR_READY_NAME)
     check.override = "replace"
     check.level = "ready"
-    check.tcp = {"port": SYNAPSE_NGINX_PORT}
+    check.http = {"url": f"http://localhost:{MJOLNIR_HEALTH_PORT}/healthz"}
     return check.to_dict()
 
 
-def check_mjolnir_ready() -> ops.pebble.CheckDict:
-    """Return the Synapse Mjolnir service check.
+def is_synapse_running(container: ops.Container) -> bool:
+    """Check if the Synapse service is running, as required to call its API.
+
+    Args:
+        container: Container of the charm.
 
     Returns:
-        Dict: check object converted to its dict representation.
+        True if the container is reachable and the Synapse service is running.
     """
-    check = Check(CHECK_MJOLNIR_READY_NAME)
-    check.override = "replace"
-    check.level = "ready"
-    check.http = {"url": f"http://localhost:{MJOLNIR_HEALTH_PORT}/healthz"}
-    return check.to_dict()
+    if not container.can_connect():
+        return False
+    synapse_service = container.get_services(SYNAPSE_SERVICE_NAME)
+    return bool(synapse_service) and all(
+        service.is_running() for service in synapse_service.values()
+    )
 
 
 def _get_configuration_field(container: ops.Container, fieldname: str) -> typing.Optional[str]:
@@ -236,6 +276,45 @@ def _exec(
         )
 
 
+def _exec_streaming(
+    container: ops.Container,
+    command: typing.List[str],
+    log: typing.Callable[[str], None],
+    environment: typing.Optional[typing.Dict[str, str]] = None,
+    working_dir: str = SYNAPSE_CONFIG_DIR,
+) -> None:
+    """Execute a long running Python script, passing each line of its output to log.
+
+    Args:
+        container: Container of the charm.
+        command: A list of strings representing the command to be executed.
+        log: callback receiving the output lines of the command.
+        environment: Environment variables for the command to be executed.
+        working_dir: Working directory of the command.
+
+    Raises:
+        WorkloadError: if the command failed, with the last lines of its output.
+    """
+    last_lines: typing.Deque[str] = collections.deque(maxlen=5)
+    # Unbuffered output so progress is reported while the command runs.
+    process = container.exec(
+        command,
+        environment={**(environment or {}), "PYTHONUNBUFFERED": "1"},
+        working_dir=working_dir,
+        combine_stderr=True,
+    )
+    try:
+        for line in typing.cast(typing.TextIO, process.stdout):
+            line = line.strip()
+            if line:
+                last_lines.append(line)
+                log(line)
+        process.wait()
+    except ExecError as exc:
+        logger.error("%s failed: %s", command[0], "\n".join(last_lines))
+        raise WorkloadError(" ".join(last_lines)) from exc
+
+
 def execute_migrate_config(container: ops.Container, charm_state: CharmState) -> None:
     """Run the Synapse command migrate_config.
 
@@ -289,8 +368,193 @@ def enable_metrics(container: ops.Container) -> None:
         raise EnableMetricsError(str(exc)) from exc
 
 
-def enable_serve_server_wellknown(container: ops.Container) -> None:
-    """Change the Synapse configuration to enable server wellknown file.
+def configure_background_updates(container: ops.Container, charm_state: CharmState) -> None:
+    """Change the Synapse configuration to throttle background updates.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong configuring background updates.
+    """
+    synapse_config = charm_state.synapse_config
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["background_updates"] = {
+            "background_update_duration_ms": synapse_config.background_update_duration_ms,
+            "sleep_enabled": synapse_config.background_update_sleep_enabled,
+            "sleep_duration_ms": synapse_config.background_update_sleep_duration_ms,
+            "min_batch_size": synapse_config.background_update_min_batch_size,
+            "default_batch_size": synapse_config.background_update_default_batch_size,
+        }
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except ops.pebble.PathError as exc:
+        raise WorkloadError(str(exc)) from exc
+
+
+def _get_retention_config(charm_state: CharmState) -> typing.Dict:
+    """Create the retention configuration.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The retention configuration, without the unset lifetimes.
+    """
+    synapse_config = charm_state.synapse_config
+    default_policy = {
+        "min_lifetime": synapse_config.retention_default_policy_min_lifetime,
+        "max_lifetime": synapse_config.retention_default_policy_max_lifetime,
+    }
+    purge_job = {
+        "shortest_max_lifetime": synapse_config.retention_purge_job_shortest_max_lifetime,
+        "longest_max_lifetime": synapse_config.retention_purge_job_longest_max_lifetime,
+        "interval": synapse_config.retention_purge_job_interval,
+    }
+    retention = {
+        "enabled": True,
+        "default_policy": {key: value for key, value in default_policy.items() if value},
+        "allowed_lifetime_min": synapse_config.retention_allowed_lifetime_min,
+        "allowed_lifetime_max": synapse_config.retention_allowed_lifetime_max,
+        "purge_jobs": [{key: value for key, value in purge_job.items() if value}],
+    }
+    return {key: value for key, value in retention.items() if value}
+
+
+def enable_retention(container: ops.Container, charm_state: CharmState) -> None:
+    """Change the Synapse configuration to enable message retention policies.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong enabling retention.
+    """
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["retention"] = _get_retention_config(charm_state)
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except ops.pebble.PathError as exc:
+        raise WorkloadError(str(exc)) from exc
+
+
+def enable_s3_media_storage(container: ops.Container, charm_state: CharmState) -> None:
+    """Change the Synapse configuration to store media in S3.
+
+    Media is still stored locally first, which acts as a cache, and uploaded to
+    the bucket asynchronously.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong enabling the S3 media storage.
+    """
+    media_s3 = typing.cast(S3Parameters, charm_state.media_s3)
+    provider_config = {
+        "bucket": media_s3["bucket"],
+        "access_key_id": media_s3["access_key"],
+        "secret_access_key": media_s3["secret_key"],
+        "region_name": media_s3["region"],
+        "endpoint_url": media_s3["endpoint"],
+        "prefix": media_s3["path"],
+    }
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        current_yaml["media_storage_providers"] = [
+            {
+                "module": S3_STORAGE_PROVIDER_MODULE,
+                "store_local": True,
+                "store_remote": True,
+                "store_synchronous": False,
+                "config": {key: value for key, value in provider_config.items() if value},
+            }
+        ]
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except ops.pebble.PathError as exc:
+        raise WorkloadError(str(exc)) from exc
+
+
+def execute_s3_media_upload(
+    container: ops.Container,
+    charm_state: CharmState,
+    delete_local: bool,
+    log: typing.Callable[[str], None],
+) -> None:
+    """Upload the media of the local media store to S3 with s3_media_upload.
+
+    The script keeps track of the uploaded files in a cache in S3_MEDIA_UPLOAD_DIR,
+    so it can be run again to upload the remaining files.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+        delete_local: whether to delete the local files once uploaded.
+        log: callback receiving the progress lines printed by the script.
+
+    Raises:
+        S3MediaUploadError: something went wrong uploading the media.
+    """
+    media_s3 = typing.cast(S3Parameters, charm_state.media_s3)
+    datasource = charm_state.datasource
+    database_config: typing.Dict[str, typing.Dict[str, str]] = (
+        {
+            "postgres": {
+                "user": datasource["user"],
+                "password": datasource["password"],
+                "database": datasource["db"],
+                "host": datasource["host"],
+                "port": datasource["port"],
+            }
+        }
+        if datasource is not None
+        else {"sqlite": {"database": SYNAPSE_SQLITE_DATABASE_PATH}}
+    )
+    environment = {
+        "AWS_ACCESS_KEY_ID": media_s3["access_key"],
+        "AWS_SECRET_ACCESS_KEY": media_s3["secret_key"],
+    }
+    if media_s3["region"]:
+        environment["AWS_DEFAULT_REGION"] = media_s3["region"]
+    upload_command = [S3_MEDIA_UPLOAD_COMMAND_PATH, "upload", MEDIA_STORE_PATH, media_s3["bucket"]]
+    if media_s3["endpoint"]:
+        upload_command += ["--endpoint-url", media_s3["endpoint"]]
+    if media_s3["path"]:
+        upload_command += ["--prefix", media_s3["path"]]
+    if delete_local:
+        upload_command.append("--delete")
+    update_command = [S3_MEDIA_UPLOAD_COMMAND_PATH, "update", MEDIA_STORE_PATH, "0d"]
+    try:
+        # The script reads database.yaml and writes its cache in the working directory.
+        container.push(
+            f"{S3_MEDIA_UPLOAD_DIR}/database.yaml",
+            yaml.safe_dump(database_config),
+            make_dirs=True,
+            permissions=0o600,
+        )
+        for command in (update_command, upload_command):
+            _exec_streaming(
+                container,
+                command,
+                log=log,
+                environment=environment,
+                working_dir=S3_MEDIA_UPLOAD_DIR,
+            )
+    except (PathError, WorkloadError) as exc:
+        raise S3MediaUploadError(f"s3_media_upload failed: {exc}") from exc
+
+
+def enable_database_pooling(container: ops.Container) -> None:
+    """Change the Synapse configuration to connect through a transaction pooler.
+
+    psycopg2 does not use server-side prepared statements so only the connection pool
+    of Synapse needs to be adjusted to play along with transaction pooling.
 
     Args:
         container: Container of the charm.
@@ -301,7 +565,61 @@ def enable_serve_server_wellknown(container: ops.Container) -> None:
     try:
         config = container.pull(SYNAPSE_CONFIG_PATH).read()
         current_yaml = yaml.safe_load(config)
-        current_yaml["serve_server_wellknown"] = True
+        database_args = current_yaml["database"].setdefault("args", {})
+        database_args["cp_min"] = DATABASE_POOLED_CP_MIN
+        database_args["cp_max"] = DATABASE_POOLED_CP_MAX
+        # Detect connections dropped by the pooler instead of waiting for TCP timeouts.
+        database_args["keepalives_idle"] = DATABASE_POOLED_KEEPALIVES_IDLE
+        database_args["keepalives_interval"] = DATABASE_POOLED_KEEPALIVES_INTERVAL
+        database_args["keepalives_count"] = DATABASE_POOLED_KEEPALIVES_COUNT
+        container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
+    except (ops.pebble.PathError, KeyError, TypeError) as exc:
+        raise WorkloadError(str(exc)) from exc
+
+
+def enable_state_database(container: ops.Container, charm_state: CharmState) -> None:
+    """Change the Synapse configuration to keep the state store in its own database.
+
+    The single database block is converted into a multi-database one where the main
+    database keeps every data store except the state one. The state database uses
+    the same connection pool settings as the main database.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong enabling configuration.
+    """
+    state_datasource = charm_state.state_datasource
+    if state_datasource is None:
+        raise WorkloadError("State database configuration not found.")
+    try:
+        config = container.pull(SYNAPSE_CONFIG_PATH).read()
+        current_yaml = yaml.safe_load(config)
+        main_database = current_yaml.pop("database", {})
+        if main_database.get("name") != "psycopg2":
+            raise WorkloadError("The state database requires the main database to be PostgreSQL.")
+        pool_args = {
+            arg: value
+            for arg, value in main_database.get("args", {}).items()
+            if arg.startswith(("cp_", "keepalives"))
+        }
+        current_yaml["databases"] = {
+            "main": {**main_database, "data_stores": ["main"]},
+            "state": {
+                "name": "psycopg2",
+                "data_stores": ["state"],
+                "args": {
+                    **pool_args,
+                    "user": state_datasource["user"],
+                    "password": state_datasource["password"],
+                    "database": state_datasource["db"],
+                    "host": state_datasource["host"],
+                    "port": state_datasource["port"],
+                },
+            },
+        }
         container.push(SYNAPSE_CONFIG_PATH, yaml.safe_dump(current_yaml))
     except ops.pebble.PathError as exc:
         raise WorkloadError(str(exc)) from exc
@@ -468,30 +786,185 @@ def enable_smtp(container: ops.Container, charm_state: CharmState) -> None:
         raise WorkloadError(str(exc)) from exc
 
 
-def reset_instance(container: ops.Container) -> None:
-    """Erase data and config server_name.
+def reset_instance(container: ops.Container) -> ops.pebble.ExecProcess:
+    """Start erasing data and config server_name.
+
+    The files are deleted by a single process inside the container, which is much
+    faster than removing them one by one through Pebble when the media store is
+    large. The directory itself is kept since it is a volume mount.
 
     Args:
         container: Container of the charm.
 
+    Returns:
+        The running process, to be passed to wait_reset_instance.
+    """
+    logger.debug("Erasing directory %s", SYNAPSE_CONFIG_DIR)
+    return container.exec(
+        ["find", SYNAPSE_CONFIG_DIR, "-mindepth", "1", "-delete"], combine_stderr=True
+    )
+
+
+def wait_reset_instance(process: ops.pebble.ExecProcess) -> None:
+    """Wait for the data started to be erased by reset_instance.
+
+    Args:
+        process: process returned by reset_instance.
+
     Raises:
-        PathError: if somethings goes wrong while erasing the Synapse directory.
+        WorkloadError: if somethings goes wrong while erasing the Synapse directory.
     """
-    logging.debug("Erasing directory %s", SYNAPSE_CONFIG_DIR)
     try:
-        container.remove_path(SYNAPSE_CONFIG_DIR, recursive=True)
-    except PathError as path_error:
-        # The error "unlinkat //data: device or resource busy" is expected
-        # when removing the entire directory because it's a volume mount.
-        # The files will be removed but SYNAPSE_CONFIG_DIR directory will
-        # remain.
-        if "device or resource busy" in str(path_error):
-            pass
-        else:
-            logger.exception(
-                "exception while erasing directory %s: %r", SYNAPSE_CONFIG_DIR, path_error
-            )
-            raise
+        process.wait_output()
+    except ExecError as exc:
+        logger.error("exception while erasing directory %s: %s", SYNAPSE_CONFIG_DIR, exc.stdout)
+        raise WorkloadError(f"Failed to erase {SYNAPSE_CONFIG_DIR}: {exc.stdout}") from exc
+
+
+def execute_port_db(
+    container: ops.Container,
+    datasource: DatasourcePostgreSQL,
+    batch_size: int,
+    log: typing.Callable[[str], None],
+) -> None:
+    """Copy the SQLite database to PostgreSQL with synapse_port_db.
+
+    The script resumes from where it stopped if run again after a failure.
+    Once ported, the SQLite database is moved aside so it is not ported again
+    over the data written to PostgreSQL.
+
+    Args:
+        container: Container of the charm.
+        datasource: datasource of the target PostgreSQL database.
+        batch_size: number of rows copied per transaction.
+        log: callback receiving the progress lines printed by the script.
+
+    Raises:
+        PortDBError: something went wrong while porting the database.
+    """
+    port_db_config = {
+        "database": {
+            "name": "psycopg2",
+            "args": {
+                "user": datasource["user"],
+                "password": datasource["password"],
+                "database": datasource["db"],
+                "host": datasource["host"],
+                "port": datasource["port"],
+            },
+        }
+    }
+    port_db_command = [
+        PORT_DB_COMMAND_PATH,
+        "--sqlite-database",
+        SYNAPSE_SQLITE_DATABASE_PATH,
+        "--postgres-config",
+        PORT_DB_CONFIG_PATH,
+        "--batch-size",
+        str(batch_size),
+    ]
+    try:
+        container.push(PORT_DB_CONFIG_PATH, yaml.safe_dump(port_db_config), permissions=0o600)
+        _exec_streaming(container, port_db_command, log=log)
+    except PathError as exc:
+        raise PortDBError(str(exc)) from exc
+    except WorkloadError as exc:
+        raise PortDBError(f"synapse_port_db failed: {exc}") from exc
+    finally:
+        if container.exists(PORT_DB_CONFIG_PATH):
+            container.remove_path(PORT_DB_CONFIG_PATH)
+    move_result = _exec(
+        container, ["mv", SYNAPSE_SQLITE_DATABASE_PATH, SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH]
+    )
+    if move_result.exit_code:
+        raise PortDBError(f"Failed to move the SQLite database aside: {move_result.stderr}")
+
+
+def _get_state_compressor_datasource(
+    charm_state: CharmState,
+) -> typing.Optional[DatasourcePostgreSQL]:
+    """Get the datasource of the database compressed by synapse_auto_compressor.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The datasource or None if there is no database to compress.
+    """
+    # The state groups live in the state database if the state store has been split.
+    return charm_state.state_datasource or charm_state.datasource
+
+
+def get_state_compressor_command(charm_state: CharmState) -> typing.Optional[str]:
+    """Generate the synapse_auto_compressor command from the charm configurations.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        The command to run or None if there is no database to compress.
+    """
+    if _get_state_compressor_datasource(charm_state) is None:
+        return None
+    # The compressor only takes the password in its connection string, so the string
+    # is read from a file by a shell to keep the password out of the Pebble plan.
+    synapse_config = charm_state.synapse_config
+    return (
+        f"/bin/sh -c 'exec {STATE_COMPRESSOR_COMMAND_PATH}"
+        f' -p "$(cat {STATE_COMPRESSOR_CONNECTION_PATH})"'
+        f" -c {synapse_config.state_compressor_chunk_size}"
+        f" -n {synapse_config.state_compressor_number_of_chunks}'"
+    )
+
+
+def push_state_compressor_connection(container: ops.Container, charm_state: CharmState) -> None:
+    """Write the connection string of the database compressed by synapse_auto_compressor.
+
+    The file is only readable by its owner since it holds the database password.
+    It is removed if the state compressor is disabled.
+
+    Args:
+        container: Container of the charm.
+        charm_state: Instance of CharmState.
+
+    Raises:
+        WorkloadError: something went wrong writing or removing the file.
+    """
+    datasource = _get_state_compressor_datasource(charm_state)
+    try:
+        if datasource is None or not charm_state.synapse_config.enable_state_compressor:
+            if container.exists(STATE_COMPRESSOR_CONNECTION_PATH):
+                container.remove_path(STATE_COMPRESSOR_CONNECTION_PATH)
+            return
+        connection = (
+            f"host={datasource['host']} port={datasource['port']} user={datasource['user']}"
+            f" dbname={datasource['db']} password={datasource['password']}"
+        )
+        container.push(STATE_COMPRESSOR_CONNECTION_PATH, connection, permissions=0o600)
+    except PathError as exc:
+        raise WorkloadError(str(exc)) from exc
+
+
+def get_db_exporter_environment(charm_state: CharmState) -> typing.Dict[str, str]:
+    """Generate the database exporter environment dictionary.
+
+    Args:
+        charm_state: Instance of CharmState.
+
+    Returns:
+        A dictionary representing the exporter environment variables.
+    """
+    environment = {
+        key: value for key, value in get_environment(charm_state).items() if "POSTGRES_" in key
+    }
+    state_datasource = charm_state.state_datasource
+    if state_datasource is not None:
+        environment["STATE_POSTGRES_DB"] = state_datasource["db"]
+        environment["STATE_POSTGRES_HOST"] = state_datasource["host"]
+        environment["STATE_POSTGRES_PORT"] = state_datasource["port"]
+        environment["STATE_POSTGRES_USER"] = state_datasource["user"]
+        environment["STATE_POSTGRES_PASSWORD"] = state_datasource["password"]
+    return environment
 
 
 def get_environment(charm_state: CharmState) -> typing.Dict[str, str]:
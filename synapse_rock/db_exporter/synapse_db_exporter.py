@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Prometheus exporter for the Synapse database.
+
+The exporter reuses psycopg2 and prometheus_client, both installed as Synapse
+dependencies. Database connection details are read from the same POSTGRES_*
+environment variables used by Synapse. If the state store lives in its own
+database, STATE_POSTGRES_* variables are used to reach it.
+
+Table statistics come from pg_stat_user_tables, which is readable by the table
+owner, so no additional privilege is required.
+"""
+
+import argparse
+import logging
+import os
+import time
+import typing
+
+import psycopg2
+from prometheus_client import start_http_server
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+
+class Database:
+    """A lazily (re)connected PostgreSQL database."""
+
+    def __init__(self, prefix: str):
+        """Initialize the database from environment variables.
+
+        Args:
+            prefix: prefix of the environment variables holding the connection details.
+        """
+        self.name = os.environ[f"{prefix}POSTGRES_DB"]
+        self._connection_args = {
+            "dbname": self.name,
+            "user": os.environ[f"{prefix}POSTGRES_USER"],
+            "password": os.environ[f"{prefix}POSTGRES_PASSWORD"],
+            "host": os.environ[f"{prefix}POSTGRES_HOST"],
+            "port": os.environ.get(f"{prefix}POSTGRES_PORT", "5432"),
+            "connect_timeout": 5,
+            "application_name": "synapse_db_exporter",
+        }
+        self._conn = None
+
+    def query(self, query: str) -> list[tuple]:
+        """Run a query and fetch all rows.
+
+        Args:
+            query: query to be executed.
+
+        Returns:
+            Fetched rows.
+        """
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(**self._connection_args)
+            self._conn.autocommit = True
+        try:
+            with self._conn.cursor() as curs:
+                curs.execute(query)
+                return curs.fetchall()
+        except psycopg2.OperationalError:
+            self._conn.close()
+            raise
+
+
+TABLE_STATS_QUERY = """
+SELECT relname, n_live_tup, n_dead_tup, seq_scan, seq_tup_read, COALESCE(idx_scan, 0),
+    pg_total_relation_size(relid)
+FROM pg_stat_user_tables
+"""
+
+
+class SynapseDatabaseCollector:
+    """Collect Synapse database metrics on each scrape."""
+
+    def __init__(self, databases: list[Database], state: Database):
+        """Initialize the collector.
+
+        Args:
+            databases: databases to collect table statistics from.
+            state: database holding the state data store.
+        """
+        self._databases = databases
+        self._state = state
+
+    def describe(self) -> list:
+        """Avoid querying the database when registering the collector.
+
+        Returns:
+            An empty list of metrics.
+        """
+        return []
+
+    def collect(self) -> typing.Iterator[GaugeMetricFamily]:
+        """Collect metrics.
+
+        Each metric family is created once and holds the samples of every database, as
+        Prometheus rejects a scrape exposing the same family twice.
+
+        Yields:
+            Metrics families.
+        """
+        labels = ["database", "table"]
+        table_families = (
+            GaugeMetricFamily(
+                "synapse_db_table_live_tuples", "Estimated number of live rows.", labels=labels
+            ),
+            GaugeMetricFamily(
+                "synapse_db_table_dead_tuples", "Estimated number of dead rows.", labels=labels
+            ),
+            CounterMetricFamily(
+                "synapse_db_table_seq_scans", "Number of sequential scans.", labels=labels
+            ),
+            CounterMetricFamily(
+                "synapse_db_table_seq_tuples_read",
+                "Number of live rows fetched by sequential scans.",
+                labels=labels,
+            ),
+            CounterMetricFamily(
+                "synapse_db_table_index_scans", "Number of index scans.", labels=labels
+            ),
+            GaugeMetricFamily(
+                "synapse_db_table_size_bytes",
+                "Total size of the table including indexes and TOAST data.",
+                labels=labels,
+            ),
+        )
+        database_size = GaugeMetricFamily(
+            "synapse_db_size_bytes", "Total size of the database.", labels=["database"]
+        )
+        up = GaugeMetricFamily(
+            "synapse_db_exporter_up",
+            "Whether the last query to the database succeeded.",
+            labels=["database"],
+        )
+        state_compressor: list[GaugeMetricFamily] = []
+        for database in self._databases:
+            try:
+                # Query everything first so that a failing database adds no partial samples.
+                tables = database.query(TABLE_STATS_QUERY)
+                size = database.query("SELECT pg_database_size(current_database())")[0][0]
+                if database is self._state:
+                    state_compressor = self._collect_state_compressor()
+            except psycopg2.Error as exc:
+                logger.error("Failed to collect metrics from %s: %s", database.name, exc)
+                up.add_metric([database.name], 0)
+                continue
+            for table, *values in tables:
+                for family, value in zip(table_families, values):
+                    family.add_metric([database.name, table], value)
+            database_size.add_metric([database.name], size)
+            up.add_metric([database.name], 1)
+        yield from table_families
+        yield database_size
+        yield from state_compressor
+        yield up
+
+    def _collect_state_compressor(self) -> list[GaugeMetricFamily]:
+        """Collect synapse_auto_compressor progress.
+
+        Returns:
+            Metrics families, empty if the compressor has not run yet.
+        """
+        exists = self._state.query("SELECT to_regclass('state_compressor_total_progress')")
+        if exists[0][0] is None:
+            return []
+        lowest_uncompressed = self._state.query(
+            "SELECT lowest_uncompressed_group FROM state_compressor_total_progress"
+        )
+        max_group = self._state.query("SELECT COALESCE(MAX(id), 0) FROM state_groups")
+        rooms = self._state.query("SELECT COUNT(*) FROM state_compressor_progress")
+        return [
+            GaugeMetricFamily(
+                "synapse_state_compressor_lowest_uncompressed_group",
+                "Lowest state group not yet processed by the state compressor.",
+                value=lowest_uncompressed[0][0] if lowest_uncompressed else 0,
+            ),
+            GaugeMetricFamily(
+                "synapse_state_compressor_max_state_group",
+                "Highest state group in the database.",
+                value=max_group[0][0],
+            ),
+            GaugeMetricFamily(
+                "synapse_state_compressor_rooms",
+                "Number of rooms processed by the state compressor.",
+                value=rooms[0][0],
+            ),
+        ]
+
+
+def main() -> None:
+    """Start the exporter."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=9187, help="Port to expose metrics on.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    databases = [Database("")]
+    if "STATE_POSTGRES_DB" in os.environ:
+        databases.append(Database("STATE_"))
+    REGISTRY.register(SynapseDatabaseCollector(databases=databases, state=databases[-1]))
+    start_http_server(args.port)
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 
 # pylint: disable=too-few-public-methods, protected-access
 
+import io
 import typing
 import unittest.mock
 
@@ -65,6 +66,23 @@ def inject_register_command_handler(monkeypatch: pytest.MonkeyPatch, harness: Ha
                 stderr=self._stderr,
             )
 
+        @property
+        def stdout(self) -> io.StringIO:
+            """Simulate the stdout stream of the process.
+
+            Returns:
+                stdout from command execution.
+            """
+            return io.StringIO(self._stdout)
+
+        def wait(self):
+            """Simulate the wait method of the container object.
+
+            Raises:
+                ExecError: something wrong with the command execution.
+            """
+            self.wait_output()
+
     def exec_stub(command: list[str], **_kwargs):
         """A mock implementation of the `exec` method of the container object.
 
@@ -159,6 +177,11 @@ def harness_fixture(request, monkeypatch) -> typing.Generator[Harness, None, Non
     harness.register_command_handler(  # type: ignore # pylint: disable=no-member
         container=synapse_container, executable=command_path, handler=start_cmd_handler
     )
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=synapse_container,
+        executable="find",
+        handler=lambda _: synapse.ExecResult(0, "", ""),
+    )
     yield harness
     harness.cleanup()
 
@@ -177,6 +200,18 @@ def saml_configured_fixture(harness: Harness) -> Harness:
     return harness
 
 
+@pytest.fixture(name="database_related")
+def database_related_fixture(harness: Harness) -> Harness:
+    """Harness fixture with database relation configured"""
+    postgresql_relation_data = {
+        "endpoints": "myhost:5432",
+        "username": "user",
+        "password": "pass",
+    }
+    harness.add_relation("database", "postgresql", app_data=postgresql_relation_data)
+    return harness
+
+
 @pytest.fixture(name="container_mocked")
 def container_mocked_fixture(monkeypatch: pytest.MonkeyPatch) -> unittest.mock.MagicMock:
     """Mock container base to others fixtures."""
@@ -189,25 +224,13 @@ def container_mocked_fixture(monkeypatch: pytest.MonkeyPatch) -> unittest.mock.M
     return container
 
 
-@pytest.fixture(name="container_with_path_error_blocked")
-def container_with_path_error_blocked_fixture(
-    container_mocked: unittest.mock.MagicMock, monkeypatch: pytest.MonkeyPatch
-) -> unittest.mock.MagicMock:
-    """Mock container that gives an error on remove_path that blocks the action."""
-    path_error = ops.pebble.PathError(kind="fake", message="Error erasing directory")
-    remove_path_mock = unittest.mock.MagicMock(side_effect=path_error)
-    monkeypatch.setattr(container_mocked, "remove_path", remove_path_mock)
-    return container_mocked
-
-
-@pytest.fixture(name="container_with_path_error_pass")
-def container_with_path_error_pass_fixture(
-    container_mocked: unittest.mock.MagicMock, monkeypatch: pytest.MonkeyPatch
+@pytest.fixture(name="container_with_data_wipe_error")
+def container_with_data_wipe_error_fixture(
+    container_mocked: unittest.mock.MagicMock,
 ) -> unittest.mock.MagicMock:
-    """Mock container that gives an error on remove_path that doesn't block the action."""
-    path_error = ops.pebble.PathError(
-        kind="generic-file-error", message="unlinkat //data: device or resource busy"
+    """Mock container that fails to erase the Synapse data."""
+    exec_error = ExecError(
+        command=["find"], exit_code=1, stdout="Error erasing directory", stderr=None
     )
-    remove_path_mock = unittest.mock.MagicMock(side_effect=path_error)
-    monkeypatch.setattr(container_mocked, "remove_path", remove_path_mock)
+    container_mocked.exec.return_value.wait_output.side_effect = exec_error
     return container_mocked
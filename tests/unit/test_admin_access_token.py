@@ -0,0 +1,113 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Admin access token service unit tests."""
+
+from secrets import token_hex
+from unittest.mock import MagicMock, patch
+
+import ops
+import pytest
+from ops.testing import Harness
+
+import actions
+from admin_access_token import AdminAccessTokenService
+from user import User
+
+
+@patch.object(ops.JujuVersion, "from_environ")
+def test_get_admin_access_token_existing(mock_juju_env, harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, with secrets, store a token in a secret.
+    act: get the admin access token.
+    assert: the token from the secret is returned.
+    """
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    mock_juju_env.return_value = MagicMock(has_secrets=True)
+    expected_token = token_hex(16)
+    secret = harness.charm.app.add_secret({"secret-key": expected_token})
+    peer_relation = harness.model.get_relation("synapse-peers")
+    assert peer_relation
+    harness.update_relation_data(peer_relation.id, "synapse", {"secret-id": str(secret.id)})
+    register_user_mock = MagicMock()
+
+    with patch.object(actions, "register_user", register_user_mock):
+        token = AdminAccessTokenService(harness.charm).get(
+            harness.model.unit.get_container("synapse")
+        )
+
+    assert token == expected_token
+    register_user_mock.assert_not_called()
+
+
+@patch.object(ops.JujuVersion, "from_environ")
+def test_get_admin_access_token_existing_no_secrets(mock_juju_env, harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, no secrets, store a token in the peer relation data.
+    act: get the admin access token.
+    assert: the token from the peer relation data is returned.
+    """
+    expected_token = token_hex(16)
+    harness.begin_with_initial_hooks()
+    mock_juju_env.return_value = MagicMock(has_secrets=False)
+    peer_relation = harness.model.get_relation("synapse-peers")
+    assert peer_relation
+    harness.update_relation_data(peer_relation.id, "synapse", {"secret-key": expected_token})
+
+    token = AdminAccessTokenService(harness.charm).get(harness.model.unit.get_container("synapse"))
+
+    assert token == expected_token
+
+
+@patch.object(ops.JujuVersion, "from_environ")
+def test_get_admin_access_token_create(
+    mock_juju_env, harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm as leader, with secrets and no token.
+    act: get the admin access token.
+    assert: an admin user is created and its token stored in a secret.
+    """
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    mock_juju_env.return_value = MagicMock(has_secrets=True)
+    user = User(username="admin", admin=True)
+    user.access_token = token_hex(16)
+    register_user_mock = MagicMock(return_value=user)
+    monkeypatch.setattr(actions, "register_user", register_user_mock)
+    container = harness.model.unit.get_container("synapse")
+
+    token = AdminAccessTokenService(harness.charm).get(container)
+
+    assert token == user.access_token
+    register_user_mock.assert_called_once()
+    assert register_user_mock.call_args[0][2] is True
+    peer_relation = harness.model.get_relation("synapse-peers")
+    assert peer_relation
+    secret_id = peer_relation.data[harness.charm.app]["secret-id"]
+    assert harness.model.get_secret(id=secret_id).get_content() == {
+        "secret-key": user.access_token
+    }
+
+
+@patch.object(ops.JujuVersion, "from_environ")
+def test_get_admin_access_token_not_leader(
+    mock_juju_env, harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm as non leader, without token.
+    act: get the admin access token.
+    assert: no admin user is created and no token is returned.
+    """
+    harness.set_leader(False)
+    harness.begin_with_initial_hooks()
+    mock_juju_env.return_value = MagicMock(has_secrets=False)
+    register_user_mock = MagicMock()
+    monkeypatch.setattr(actions, "register_user", register_user_mock)
+    container = harness.model.unit.get_container("synapse")
+
+    token = AdminAccessTokenService(harness.charm).get(container)
+
+    assert token is None
+    register_user_mock.assert_not_called()
@@ -0,0 +1,110 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Background updates unit tests."""
+
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+import ops
+import pytest
+from ops.testing import Harness
+
+import actions
+import synapse
+from admin_access_token import AdminAccessTokenService
+
+
+def test_update_status_background_update_running(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and mock the background updates status API.
+    act: run update-status.
+    assert: the unit is active with the progress of the background update.
+    """
+    harness.begin_with_initial_hooks()
+    monkeypatch.setattr(AdminAccessTokenService, "get", MagicMock(return_value="token"))
+    status_mock = MagicMock(return_value={"main": {"name": "event_stats", "total_item_count": 63}})
+    monkeypatch.setattr(synapse, "get_background_updates_status", status_mock)
+
+    harness.charm.on.update_status.emit()
+
+    status_mock.assert_called_once_with("token")
+    assert harness.model.unit.status == ops.ActiveStatus(
+        "Background update event_stats on main: 63 items processed"
+    )
+
+
+def test_update_status_no_background_update(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and mock the background updates status API.
+    act: run update-status with no background update running.
+    assert: the unit is active without message.
+    """
+    harness.begin_with_initial_hooks()
+    harness.model.unit.status = ops.ActiveStatus("Background update event_stats on main")
+    monkeypatch.setattr(AdminAccessTokenService, "get", MagicMock(return_value="token"))
+    monkeypatch.setattr(synapse, "get_background_updates_status", MagicMock(return_value={}))
+
+    harness.charm.on.update_status.emit()
+
+    assert harness.model.unit.status == ops.ActiveStatus()
+
+
+def test_update_status_blocked(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm and set the unit as blocked.
+    act: run update-status.
+    assert: the background updates are not checked and the unit is still blocked.
+    """
+    harness.begin_with_initial_hooks()
+    harness.model.unit.status = ops.BlockedStatus("invalid configuration")
+    status_mock = MagicMock()
+    monkeypatch.setattr(synapse, "get_background_updates_status", status_mock)
+
+    harness.charm.on.update_status.emit()
+
+    status_mock.assert_not_called()
+    assert harness.model.unit.status == ops.BlockedStatus("invalid configuration")
+
+
+def test_update_status_api_error(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm and mock the background updates status API to fail.
+    act: run update-status.
+    assert: the unit status is unchanged.
+    """
+    harness.begin_with_initial_hooks()
+    monkeypatch.setattr(AdminAccessTokenService, "get", MagicMock(return_value="token"))
+    monkeypatch.setattr(
+        synapse,
+        "get_background_updates_status",
+        MagicMock(side_effect=synapse.APIError("Failed to connect")),
+    )
+
+    harness.charm.on.update_status.emit()
+
+    assert harness.model.unit.status == ops.ActiveStatus()
+
+
+def test_collect_status_no_api_call(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm as leader without admin access token.
+    act: evaluate the unit status.
+    assert: no admin user is created and the background updates are not checked.
+    """
+    harness.set_leader(True)
+    harness.begin_with_initial_hooks()
+    register_user_mock = MagicMock()
+    monkeypatch.setattr(actions, "register_user", register_user_mock)
+    status_mock = MagicMock()
+    monkeypatch.setattr(synapse, "get_background_updates_status", status_mock)
+
+    harness.evaluate_status()
+
+    register_user_mock.assert_not_called()
+    status_mock.assert_not_called()
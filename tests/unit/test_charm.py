@@ -63,6 +63,26 @@ def test_synapse_migrate_config_error(harness: Harness) -> None:
     assert "Migrate config failed" in str(harness.model.unit.status)
 
 
+def test_change_config_pebble_error(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm and make Pebble fail to replan the database services.
+    act: change the configuration.
+    assert: Synapse charm is blocked instead of failing the hook.
+    """
+    harness.begin()
+    change_error = ops.pebble.ChangeError(err="exited quickly", change=MagicMock())
+    monkeypatch.setattr(
+        harness.charm.pebble_service,
+        "replan_database_services",
+        MagicMock(side_effect=change_error),
+    )
+
+    harness.charm.change_config()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "exited quickly" in str(harness.model.unit.status)
+
+
 def test_container_down() -> None:
     """
     arrange: charm deployed.
@@ -201,3 +221,127 @@ def test_server_name_change(harness: Harness, monkeypatch: pytest.MonkeyPatch) -
 
     assert isinstance(harness.model.unit.status, ops.BlockedStatus)
     assert "server_name modification is not allowed" in str(harness.model.unit.status)
+
+
+def test_state_compressor_pebble_layer(harness: Harness) -> None:
+    """
+    arrange: add database relation and enable the state compressor.
+    act: start the Synapse charm and set Synapse container to be ready.
+    assert: the database services are enabled and the compressor is scheduled as configured.
+    """
+    harness.add_relation(
+        "database",
+        "postgresql",
+        app_data={"endpoints": "myhost:5432", "username": "user", "password": "p@ss"},
+    )
+    harness.update_config(
+        {
+            "enable_state_compressor": True,
+            "state_compressor_chunk_size": 1000,
+            "state_compressor_number_of_chunks": 10,
+            "state_compressor_interval": "30m",
+        }
+    )
+
+    harness.begin()
+    harness.container_pebble_ready(synapse.SYNAPSE_CONTAINER_NAME)
+
+    services = harness.get_container_pebble_plan(synapse.SYNAPSE_CONTAINER_NAME).to_dict()[
+        "services"
+    ]
+    compressor = services[synapse.STATE_COMPRESSOR_SERVICE_NAME]
+    assert compressor["startup"] == "enabled"
+    assert compressor["command"] == (
+        f"/bin/sh -c 'exec {synapse.STATE_COMPRESSOR_COMMAND_PATH}"
+        f' -p "$(cat {synapse.STATE_COMPRESSOR_CONNECTION_PATH})"'
+        " -c 1000 -n 10'"
+    )
+    assert "p@ss" not in str(compressor)
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    connection_file = container.list_files(synapse.STATE_COMPRESSOR_CONNECTION_PATH)[0]
+    assert connection_file.permissions == 0o600
+    assert container.pull(synapse.STATE_COMPRESSOR_CONNECTION_PATH).read() == (
+        "host=myhost port=5432 user=user dbname=synapse password=p@ss"
+    )
+    assert compressor["backoff-delay"] == "30m"
+    assert compressor["backoff-limit"] == "30m"
+    exporter = services[synapse.DB_EXPORTER_SERVICE_NAME]
+    assert exporter["startup"] == "enabled"
+    assert exporter["environment"]["POSTGRES_HOST"] == "myhost"
+
+
+def test_state_compressor_no_database(harness: Harness) -> None:
+    """
+    arrange: enable the state compressor without database relation.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the database services are disabled.
+    """
+    harness.update_config({"enable_state_compressor": True})
+
+    harness.begin_with_initial_hooks()
+
+    services = harness.get_container_pebble_plan(synapse.SYNAPSE_CONTAINER_NAME).to_dict()[
+        "services"
+    ]
+    assert services[synapse.STATE_COMPRESSOR_SERVICE_NAME]["startup"] == "disabled"
+    assert services[synapse.DB_EXPORTER_SERVICE_NAME]["startup"] == "disabled"
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    assert not container.exists(synapse.STATE_COMPRESSOR_CONNECTION_PATH)
+
+
+def test_state_compressor_invalid_interval(harness: Harness) -> None:
+    """
+    arrange: set an invalid state compressor interval.
+    act: start the Synapse charm.
+    assert: Synapse charm is blocked due to invalid configuration.
+    """
+    harness.update_config({"state_compressor_interval": "1d"})
+
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "state_compressor_interval" in str(harness.model.unit.status)
+
+
+def test_retention_invalid_lifetime_range(harness: Harness) -> None:
+    """
+    arrange: set an allowed lifetime maximum lower than the minimum.
+    act: start the Synapse charm.
+    assert: Synapse charm is blocked due to invalid configuration.
+    """
+    harness.update_config(
+        {"retention_allowed_lifetime_min": "1w", "retention_allowed_lifetime_max": "1d"}
+    )
+
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "retention_allowed_lifetime_max" in str(harness.model.unit.status)
+
+
+@pytest.mark.parametrize(
+    "has_database",
+    [pytest.param(True, id="database"), pytest.param(False, id="no database")],
+)
+def test_db_exporter_scrape_job(harness: Harness, has_database: bool) -> None:
+    """
+    arrange: add metrics-endpoint relation, with a database relation or not.
+    act: start the Synapse charm as leader and relate it to Prometheus.
+    assert: the database exporter is scraped only if there is a database.
+    """
+    if has_database:
+        harness.add_relation(
+            "database",
+            "postgresql",
+            app_data={"endpoints": "myhost:5432", "username": "user", "password": "pass"},
+        )
+    harness.add_network("10.0.0.10")
+    harness.set_leader(True)
+    harness.begin()
+
+    relation_id = harness.add_relation("metrics-endpoint", "prometheus-k8s")
+    harness.add_relation_unit(relation_id, "prometheus-k8s/0")
+
+    scrape_jobs = harness.get_relation_data(relation_id, harness.charm.app.name)["scrape_jobs"]
+    assert (f":{synapse.DB_EXPORTER_PORT}" in scrape_jobs) == has_database
+    assert f":{synapse.PROMETHEUS_TARGET_PORT}" in scrape_jobs
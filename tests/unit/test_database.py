@@ -27,6 +27,7 @@ def postgresql_relation_data_fixture(harness: Harness) -> None:
     postgresql_relation_data = {
         "endpoints": "myhost:5432",
         "username": "user",
+        "password": token_hex(16),
     }
     harness.add_relation("database", "postgresql", app_data=postgresql_relation_data)
 
@@ -105,7 +106,7 @@ def test_connect(harness: Harness, monkeypatch: pytest.MonkeyPatch):
     postgresql_relation_data = harness.get_relation_data(postgresql_relation.id, "postgresql")
     relation_database_password = str(postgresql_relation_data.get("password"))
     query = (
-        "dbname='synapse' user='user' host='myhost' "
+        "dbname='synapse' user='user' host='myhost' port='5432' "
         f"password='{relation_database_password}' connect_timeout=5"
     )
     connect_mock.assert_called_once_with(query)
@@ -270,3 +271,343 @@ def test_on_database_created(harness: Harness, monkeypatch: pytest.MonkeyPatch):
     harness.charm._database._on_database_created(unittest.mock.MagicMock())
 
     db_client_mock.prepare.assert_called_once()
+
+
+def test_relation_as_datasource_multiple_endpoints(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: update database relation with several endpoints.
+    assert: the first endpoint is used as datasource host and port.
+    """
+    postgresql_relation = harness.model.relations["database"][0]
+    harness.update_relation_data(
+        postgresql_relation.id, "postgresql", {"endpoints": "myhost:5432,otherhost:6432"}
+    )
+
+    harness.begin()
+
+    datasource = harness.charm._database.get_relation_as_datasource()
+    assert datasource is not None
+    assert datasource["host"] == "myhost"
+    assert datasource["port"] == "5432"
+
+
+def test_pgbouncer_relation_as_datasource(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add pgbouncer relation.
+    assert: Synapse uses the pgbouncer relation data and the state is marked as pooled.
+    """
+    pgbouncer_relation_data = {
+        "endpoints": "pgbouncer-k8s-0.pgbouncer-k8s-endpoints:6432",
+        "username": "relation_id_1",
+        "password": token_hex(16),
+    }
+    harness.add_relation("pgbouncer", "pgbouncer-k8s", app_data=pgbouncer_relation_data)
+
+    harness.begin()
+
+    charm_state = harness.charm._charm_state
+    assert charm_state.datasource_pooled
+    synapse_env = synapse.get_environment(charm_state)
+    assert synapse_env["POSTGRES_HOST"] == "pgbouncer-k8s-0.pgbouncer-k8s-endpoints"
+    assert synapse_env["POSTGRES_PORT"] == "6432"
+    assert synapse_env["POSTGRES_USER"] == "relation_id_1"
+    assert synapse_env["POSTGRES_DB"] == harness.charm.app.name
+
+
+def test_pgbouncer_relation_without_credentials(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add pgbouncer relation before PgBouncer publishes its credentials.
+    assert: Synapse keeps using the database relation.
+    """
+    harness.add_relation(
+        "pgbouncer",
+        "pgbouncer-k8s",
+        app_data={"endpoints": "pgbouncer-k8s-0.pgbouncer-k8s-endpoints:6432"},
+    )
+
+    harness.begin()
+
+    charm_state = harness.charm._charm_state
+    assert harness.charm._pgbouncer.get_relation_as_datasource() is None
+    assert not charm_state.datasource_pooled
+    assert charm_state.datasource is not None
+    assert charm_state.datasource["host"] == "myhost"
+
+
+def test_pgbouncer_connect(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm with the pgbouncer relation.
+    act: get a connection to the database.
+    assert: the connection is made to the pgbouncer port.
+    """
+    pgbouncer_relation_data = {
+        "endpoints": "pgbouncer-k8s-0.pgbouncer-k8s-endpoints:6432",
+        "username": "relation_id_1",
+        "password": token_hex(16),
+    }
+    harness.add_relation("pgbouncer", "pgbouncer-k8s", app_data=pgbouncer_relation_data)
+    harness.begin()
+    db_client = DatabaseClient(datasource=harness.charm._charm_state.datasource)
+    connect_mock = unittest.mock.MagicMock()
+    monkeypatch.setattr("psycopg2.connect", connect_mock)
+
+    db_client._connect()
+
+    assert "host='pgbouncer-k8s-0.pgbouncer-k8s-endpoints' port='6432'" in (
+        connect_mock.call_args[0][0]
+    )
+
+
+def test_database_relation_not_pooled(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: only keep the database relation.
+    assert: the state is not marked as pooled.
+    """
+    harness.begin()
+
+    assert not harness.charm._charm_state.datasource_pooled
+
+
+def test_state_database_relation_as_datasource(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add state-database relation.
+    assert: the state datasource uses its own database name and relation data.
+    """
+    state_relation_data = {
+        "endpoints": "statehost:5432",
+        "username": "state_user",
+        "password": token_hex(16),
+    }
+    harness.add_relation("state-database", "postgresql-state", app_data=state_relation_data)
+
+    harness.begin()
+
+    state_datasource = harness.charm._charm_state.state_datasource
+    assert state_datasource == DatasourcePostgreSQL(
+        host="statehost",
+        db=f"{harness.charm.app.name}_state",
+        password=state_relation_data["password"],
+        port="5432",
+        user="state_user",
+    )
+    datasource = harness.charm._charm_state.datasource
+    assert datasource is not None
+    assert datasource["db"] == harness.charm.app.name
+
+
+def test_maintain_tables(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and maintain tables.
+    assert: existing tables are vacuumed and reindexed and reclaimed bytes are returned.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchall.return_value = [("events",)]
+    cursor_mock.fetchone.side_effect = [(100,), (60,)]
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+    log_mock = unittest.mock.MagicMock()
+
+    reclaimed = db_client.maintain_tables(tables=["events", "missing"], reindex=True, log=log_mock)
+
+    assert reclaimed == {"events": 40}
+    cursor_mock.execute.assert_any_call(
+        sql.Composed([sql.SQL("VACUUM (ANALYZE) "), sql.Identifier("events")])
+    )
+    cursor_mock.execute.assert_any_call(
+        sql.Composed([sql.SQL("REINDEX TABLE CONCURRENTLY "), sql.Identifier("events")])
+    )
+    assert log_mock.call_count == 3
+
+
+def test_maintain_tables_error(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and maintain tables.
+    assert: exception is raised.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.execute.side_effect = psycopg2.Error("Invalid query")
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+
+    with pytest.raises(psycopg2.Error):
+        db_client.maintain_tables(tables=["events"], reindex=False, log=print)
+
+
+def test_get_bloated_tables(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and get bloated tables.
+    assert: the table names returned by the query are returned.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchall.return_value = [("device_inbox",), ("events",)]
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+
+    assert db_client.get_bloated_tables(0.2) == ["device_inbox", "events"]
+
+
+def test_estimate_events_before(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and estimate the events before a timestamp.
+    assert: the row estimate of the query plan is returned.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchone.return_value = ([{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}],)
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+
+    assert db_client.estimate_events_before(1000) == 42
+    assert "origin_server_ts" in str(cursor_mock.execute.call_args[0][0])
+
+
+def test_get_remote_media_cache_usage(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and get the remote media cache usage before a timestamp.
+    assert: the oldest last access and the size of the media are returned.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchone.return_value = (500, 2048)
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+
+    assert db_client.get_remote_media_cache_usage(1000) == (500, 2048)
+    assert cursor_mock.execute.call_args[0][1] == (1000,)
+
+
+@pytest.mark.parametrize(
+    "fetched, expected",
+    [
+        pytest.param([(False,)], False, id="no state table"),
+        pytest.param([(True,), (False,)], False, id="empty state table"),
+        pytest.param([(True,), (True,)], True, id="state"),
+    ],
+)
+def test_has_state(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch, fetched: list, expected: bool
+) -> None:
+    """
+    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
+    act: add database relation and check if the database has state.
+    assert: the database has state only if the state_groups_state table has rows.
+    """
+    harness.begin()
+    datasource = harness.charm._database.get_relation_as_datasource()
+    db_client = DatabaseClient(datasource=datasource)
+    conn_mock = unittest.mock.MagicMock()
+    cursor_mock = conn_mock.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchone.side_effect = fetched
+    monkeypatch.setattr(db_client, "_connect", unittest.mock.MagicMock())
+    db_client._conn = conn_mock
+
+    assert db_client.has_state() == expected
+
+
+@pytest.mark.parametrize(
+    "main_has_state, state_has_state, blocked",
+    [
+        pytest.param(True, False, True, id="state left in the main database"),
+        pytest.param(True, True, False, id="state database in use"),
+        pytest.param(False, False, False, id="new deployment"),
+    ],
+)
+def test_state_database_missing_state(
+    harness: Harness,
+    monkeypatch: pytest.MonkeyPatch,
+    main_has_state: bool,
+    state_has_state: bool,
+    blocked: bool,
+) -> None:
+    """
+    arrange: start the Synapse charm with the state-database relation and mock the databases.
+    act: change the configuration.
+    assert: the charm is blocked only if the state in the main database would be hidden.
+    """
+    harness.add_relation(
+        "state-database",
+        "postgresql-state",
+        app_data={"endpoints": "statehost:5432", "username": "user", "password": "pass"},
+    )
+    harness.begin()
+
+    def has_state(db_client: DatabaseClient) -> bool:
+        """Mock DatabaseClient.has_state.
+
+        Args:
+            db_client: the database client.
+
+        Returns:
+            Whether the mocked database has state.
+        """
+        if db_client._datasource["host"] == "statehost":
+            return state_has_state
+        return main_has_state
+
+    monkeypatch.setattr(DatabaseClient, "has_state", has_state)
+    change_config_mock = unittest.mock.MagicMock()
+    monkeypatch.setattr(harness.charm.pebble_service, "change_config", change_config_mock)
+
+    harness.charm.change_config()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus) == blocked
+    assert change_config_mock.called != blocked
+
+
+def test_state_database_created_missing_state(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with the state-database relation, the main database
+        having state and the state database none.
+    act: trigger the database created event of the state-database relation.
+    assert: the charm is blocked and Synapse is not configured.
+    """
+    harness.add_relation(
+        "state-database",
+        "postgresql-state",
+        app_data={"endpoints": "statehost:5432", "username": "user", "password": "pass"},
+    )
+    harness.begin()
+    monkeypatch.setattr(DatabaseClient, "prepare", unittest.mock.MagicMock())
+    monkeypatch.setattr(
+        DatabaseClient,
+        "has_state",
+        lambda db_client: db_client._datasource["host"] != "statehost",
+    )
+    change_config_mock = unittest.mock.MagicMock()
+    monkeypatch.setattr(harness.charm.pebble_service, "change_config", change_config_mock)
+
+    harness.charm._state_database._on_database_created(unittest.mock.MagicMock())
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "state-database" in str(harness.model.unit.status)
+    change_config_mock.assert_not_called()
@@ -0,0 +1,152 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""DB maintenance action unit tests."""
+
+# Disable no-member to allow tests on generated mock attributes
+# pylint: disable=protected-access,no-member
+
+import unittest.mock
+
+import psycopg2
+import pytest
+from ops.testing import Harness
+
+from actions.db_maintenance import HOT_TABLES
+from database_client import DatabaseClient
+
+
+def test_db_maintenance_action(database_related: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm with database relation and mock the database client.
+    act: run db-maintenance action.
+    assert: the curated tables are maintained and the bytes reclaimed are reported.
+    """
+    harness = database_related
+    harness.begin()
+    harness.set_leader(True)
+    maintain_tables_mock = unittest.mock.MagicMock(return_value={"events": 10, "event_json": 5})
+    monkeypatch.setattr(DatabaseClient, "maintain_tables", maintain_tables_mock)
+    event = unittest.mock.MagicMock()
+    event.params = {"tables": "", "bloat-threshold": 0, "reindex": True}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    maintain_tables_mock.assert_called_once_with(tables=HOT_TABLES, reindex=True, log=event.log)
+    event.set_results.assert_called_once_with(
+        {"db-maintenance": True, "tables": "events,event_json", "bytes-reclaimed": 15}
+    )
+
+
+def test_db_maintenance_action_tables(
+    database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and mock the database client.
+    act: run db-maintenance action with a list of tables.
+    assert: only the given tables are maintained.
+    """
+    harness = database_related
+    harness.begin()
+    harness.set_leader(True)
+    maintain_tables_mock = unittest.mock.MagicMock(return_value={"events": 0})
+    monkeypatch.setattr(DatabaseClient, "maintain_tables", maintain_tables_mock)
+    event = unittest.mock.MagicMock()
+    event.params = {"tables": "events, receipts_linearized", "bloat-threshold": 50}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    maintain_tables_mock.assert_called_once_with(
+        tables=["events", "receipts_linearized"], reindex=False, log=event.log
+    )
+
+
+def test_db_maintenance_action_bloat_threshold(
+    database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and mock the database client.
+    act: run db-maintenance action with a bloat threshold.
+    assert: the tables above the threshold are maintained.
+    """
+    harness = database_related
+    harness.begin()
+    harness.set_leader(True)
+    get_bloated_tables_mock = unittest.mock.MagicMock(return_value=["device_inbox"])
+    monkeypatch.setattr(DatabaseClient, "get_bloated_tables", get_bloated_tables_mock)
+    maintain_tables_mock = unittest.mock.MagicMock(return_value={"device_inbox": 100})
+    monkeypatch.setattr(DatabaseClient, "maintain_tables", maintain_tables_mock)
+    event = unittest.mock.MagicMock()
+    event.params = {"tables": "", "bloat-threshold": 20, "reindex": False}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    get_bloated_tables_mock.assert_called_once_with(0.2)
+    maintain_tables_mock.assert_called_once_with(
+        tables=["device_inbox"], reindex=False, log=event.log
+    )
+    event.set_results.assert_called_once_with(
+        {"db-maintenance": True, "tables": "device_inbox", "bytes-reclaimed": 100}
+    )
+
+
+def test_db_maintenance_action_error(
+    database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and mock the database client.
+    act: run db-maintenance action and raise a database error.
+    assert: the action fails.
+    """
+    harness = database_related
+    harness.begin()
+    harness.set_leader(True)
+    maintain_tables_mock = unittest.mock.MagicMock(side_effect=psycopg2.Error("Invalid query"))
+    monkeypatch.setattr(DatabaseClient, "maintain_tables", maintain_tables_mock)
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    assert event.set_results.call_count == 0
+    assert event.fail.call_count == 1
+
+
+def test_db_maintenance_action_no_database(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm without database relation.
+    act: run db-maintenance action.
+    assert: the action fails.
+    """
+    harness.begin()
+    harness.set_leader(True)
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    assert event.fail.call_count == 1
+    assert "No database relation was found." == event.fail.call_args[0][0]
+
+
+def test_db_maintenance_action_no_leader(database_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with database relation.
+    act: run db-maintenance action on a non leader unit.
+    assert: the action fails.
+    """
+    harness = database_related
+    harness.begin()
+    harness.set_leader(False)
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_db_maintenance_action(event)
+
+    assert event.fail.call_count == 1
+    assert "Only the juju leader unit can run db maintenance action" == event.fail.call_args[0][0]
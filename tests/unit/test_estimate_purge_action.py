@@ -0,0 +1,112 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Estimate purge action unit tests."""
+
+# Disable no-member to allow tests on generated mock attributes
+# pylint: disable=protected-access,no-member
+
+import unittest.mock
+
+import psycopg2
+import pytest
+from ops.testing import Harness
+
+from database_client import DatabaseClient
+
+
+def test_estimate_purge_action(database_related: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm with retention configured and mock the database client.
+    act: run estimate-purge action.
+    assert: the events older than the default max lifetime are estimated.
+    """
+    harness = database_related
+    harness.update_config({"retention_default_policy_max_lifetime": "1d"})
+    harness.begin()
+    estimate_mock = unittest.mock.MagicMock(return_value=1234)
+    monkeypatch.setattr(DatabaseClient, "estimate_events_before", estimate_mock)
+    monkeypatch.setattr("time.time", lambda: 100000.0)
+    event = unittest.mock.MagicMock()
+    event.params = {"max-lifetime": ""}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_estimate_purge_action(event)
+
+    before_ts = 100000 * 1000 - 24 * 60 * 60 * 1000
+    estimate_mock.assert_called_once_with(before_ts)
+    event.set_results.assert_called_once_with(
+        {"estimate-purge": True, "events": 1234, "before-ts": before_ts}
+    )
+
+
+def test_estimate_purge_action_max_lifetime(
+    database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and mock the database client.
+    act: run estimate-purge action with a max lifetime.
+    assert: the events older than the given max lifetime are estimated.
+    """
+    harness = database_related
+    harness.begin()
+    estimate_mock = unittest.mock.MagicMock(return_value=0)
+    monkeypatch.setattr(DatabaseClient, "estimate_events_before", estimate_mock)
+    monkeypatch.setattr("time.time", lambda: 100000.0)
+    event = unittest.mock.MagicMock()
+    event.params = {"max-lifetime": "10s"}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_estimate_purge_action(event)
+
+    estimate_mock.assert_called_once_with(100000 * 1000 - 10 * 1000)
+
+
+@pytest.mark.parametrize(
+    "max_lifetime, error",
+    [
+        pytest.param("", "Set max-lifetime", id="no max lifetime"),
+        pytest.param("1 day", "invalid duration: 1 day", id="invalid max lifetime"),
+    ],
+)
+def test_estimate_purge_action_invalid(
+    database_related: Harness, max_lifetime: str, error: str
+) -> None:
+    """
+    arrange: start the Synapse charm without retention configured.
+    act: run estimate-purge action with an empty or invalid max lifetime.
+    assert: the action fails.
+    """
+    harness = database_related
+    harness.begin()
+    event = unittest.mock.MagicMock()
+    event.params = {"max-lifetime": max_lifetime}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_estimate_purge_action(event)
+
+    assert error in event.fail.call_args[0][0]
+
+
+def test_estimate_purge_action_database_error(
+    database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and mock the database client to fail.
+    act: run estimate-purge action.
+    assert: the action fails.
+    """
+    harness = database_related
+    harness.begin()
+    monkeypatch.setattr(
+        DatabaseClient,
+        "estimate_events_before",
+        unittest.mock.MagicMock(side_effect=psycopg2.Error("Connection refused")),
+    )
+    event = unittest.mock.MagicMock()
+    event.params = {"max-lifetime": "1y"}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_estimate_purge_action(event)
+
+    event.fail.assert_called_once_with("Connection refused")
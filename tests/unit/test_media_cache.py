@@ -0,0 +1,193 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Remote media cache unit tests."""
+
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock, call
+
+import pytest
+from ops.testing import Harness
+
+import media_cache
+import synapse
+from admin_access_token import AdminAccessTokenService
+from database_client import DatabaseClient
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@pytest.fixture(name="media_cache_configured")
+def media_cache_configured_fixture(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> Harness:
+    """Harness fixture with remote media cache eviction configured and Synapse running."""
+    harness.update_config({"remote_media_cache_max_age": "30d"})
+    harness.set_leader(True)
+    monkeypatch.setattr(synapse, "is_synapse_running", MagicMock(return_value=True))
+    monkeypatch.setattr(AdminAccessTokenService, "get", MagicMock(return_value="token"))
+    monkeypatch.setattr(media_cache.time, "time", MagicMock(return_value=100 * 86400))
+    return harness
+
+
+def test_update_status_purge_without_database(
+    media_cache_configured: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm without database and configure the remote media max age.
+    act: emit update-status.
+    assert: the remote media cache is purged in a single call.
+    """
+    harness = media_cache_configured
+    purge_mock = MagicMock(return_value=3)
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    harness.charm.on.update_status.emit()
+
+    purge_mock.assert_called_once_with(
+        admin_access_token="token", before_ts=70 * DAY_MS, synapse_url=synapse.SYNAPSE_URL
+    )
+
+
+def test_update_status_purge_batches(
+    media_cache_configured: Harness, database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and configure the remote media max age.
+    act: emit update-status.
+    assert: the remote media cache is purged in batches from the oldest last access.
+    """
+    harness = media_cache_configured
+    assert harness is database_related
+    monkeypatch.setattr(
+        DatabaseClient,
+        "get_remote_media_cache_usage",
+        MagicMock(return_value=(67 * DAY_MS + 1, 2048)),
+    )
+    purge_mock = MagicMock(return_value=1)
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    harness.charm.on.update_status.emit()
+
+    assert purge_mock.call_args_list == [
+        call(
+            admin_access_token="token", before_ts=68 * DAY_MS + 1, synapse_url=synapse.SYNAPSE_URL
+        ),
+        call(
+            admin_access_token="token", before_ts=69 * DAY_MS + 1, synapse_url=synapse.SYNAPSE_URL
+        ),
+        call(admin_access_token="token", before_ts=70 * DAY_MS, synapse_url=synapse.SYNAPSE_URL),
+    ]
+
+
+def test_update_status_purge_batches_capped(
+    media_cache_configured: Harness, database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and more remote media
+        to purge than the batches of a single run.
+    act: emit update-status.
+    assert: only the oldest batches are purged and the size of those is reported.
+    """
+    harness = media_cache_configured
+    assert harness is database_related
+    usage_mock = MagicMock(side_effect=[(40 * DAY_MS, 4096), (40 * DAY_MS, 1024)])
+    monkeypatch.setattr(DatabaseClient, "get_remote_media_cache_usage", usage_mock)
+    purge_mock = MagicMock(return_value=1)
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    result = media_cache.purge_remote_media_cache(
+        admin_access_token="token",
+        charm_state=harness.charm._charm_state,
+        before_ts=70 * DAY_MS,
+        batch_period_ms=DAY_MS,
+    )
+
+    last_batch_ts = (40 + media_cache.MAX_PURGE_BATCHES_PER_RUN) * DAY_MS
+    assert purge_mock.call_count == media_cache.MAX_PURGE_BATCHES_PER_RUN
+    assert purge_mock.call_args == call(
+        admin_access_token="token", before_ts=last_batch_ts, synapse_url=synapse.SYNAPSE_URL
+    )
+    assert usage_mock.call_args_list == [call(70 * DAY_MS), call(last_batch_ts)]
+    assert result == media_cache.MediaCachePurgeResult(
+        deleted=media_cache.MAX_PURGE_BATCHES_PER_RUN, bytes_freed=1024
+    )
+
+
+def test_update_status_nothing_to_purge(
+    media_cache_configured: Harness, database_related: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with database relation and no remote media to purge.
+    act: emit update-status.
+    assert: Synapse is not requested to purge the remote media cache.
+    """
+    harness = media_cache_configured
+    assert harness is database_related
+    monkeypatch.setattr(
+        DatabaseClient, "get_remote_media_cache_usage", MagicMock(return_value=(None, 0))
+    )
+    purge_mock = MagicMock()
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    harness.charm.on.update_status.emit()
+
+    purge_mock.assert_not_called()
+
+
+def test_update_status_disabled(harness: Harness, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: start the Synapse charm without the remote media max age.
+    act: emit update-status.
+    assert: the remote media cache is not purged.
+    """
+    harness.set_leader(True)
+    purge_mock = MagicMock()
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    harness.charm.on.update_status.emit()
+
+    purge_mock.assert_not_called()
+
+
+def test_update_status_not_leader(
+    media_cache_configured: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm as a non leader unit with the remote media max age.
+    act: emit update-status.
+    assert: the remote media cache is not purged.
+    """
+    harness = media_cache_configured
+    harness.set_leader(False)
+    purge_mock = MagicMock()
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+    harness.begin()
+
+    harness.charm.on.update_status.emit()
+
+    purge_mock.assert_not_called()
+
+
+def test_update_status_api_error(
+    media_cache_configured: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and mock the purge API to fail.
+    act: emit update-status.
+    assert: the error is handled and the unit status is unchanged.
+    """
+    harness = media_cache_configured
+    monkeypatch.setattr(
+        synapse, "purge_media_cache", MagicMock(side_effect=synapse.APIError("error"))
+    )
+    harness.begin()
+    status = harness.model.unit.status
+
+    harness.charm.on.update_status.emit()
+
+    assert harness.model.unit.status == status
@@ -0,0 +1,243 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Media S3 integration unit tests."""
+
+# pylint: disable=protected-access
+
+import unittest.mock
+
+import ops
+import pytest
+import yaml
+from ops.testing import Harness
+
+import synapse
+
+S3_RELATION_DATA = {
+    "access-key": "access",
+    "secret-key": "secret",
+    "bucket": "synapse-media",
+    "endpoint": "http://minio:9000",
+    "path": "/media/",
+}
+
+
+@pytest.fixture(name="s3_related")
+def s3_related_fixture(harness: Harness) -> Harness:
+    """Harness fixture with media-s3 relation configured"""
+    harness.add_relation("media-s3", "s3-integrator", app_data=S3_RELATION_DATA)
+    harness.set_leader(True)
+    return harness
+
+
+def test_media_s3_relation_as_s3_parameters(s3_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation.
+    act: get the S3 parameters from the relation.
+    assert: the parameters match the relation data.
+    """
+    harness = s3_related
+    harness.begin()
+
+    s3_parameters = harness.charm._s3.get_relation_as_s3_parameters()
+
+    assert s3_parameters == {
+        "access_key": "access",
+        "secret_key": "secret",
+        "bucket": "synapse-media",
+        "endpoint": "http://minio:9000",
+        "region": "",
+        "path": "media",
+    }
+
+
+def test_media_s3_relation_incomplete(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation without credentials.
+    act: get the S3 parameters from the relation.
+    assert: no parameters are returned.
+    """
+    harness.add_relation("media-s3", "s3-integrator", app_data={"bucket": "synapse-media"})
+    harness.begin()
+
+    assert harness.charm._s3.get_relation_as_s3_parameters() is None
+
+
+def test_media_s3_relation_changed(s3_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation.
+    act: trigger the media-s3 relation changed event.
+    assert: the S3 storage provider is configured in Synapse.
+    """
+    harness = s3_related
+    harness.begin()
+    harness.container_pebble_ready(synapse.SYNAPSE_CONTAINER_NAME)
+    relation = harness.model.get_relation("media-s3")
+    assert relation and relation.app
+
+    harness.charm.on["media-s3"].relation_changed.emit(relation, relation.app)
+
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    config = yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH))
+    assert config["media_storage_providers"] == [
+        {
+            "module": synapse.S3_STORAGE_PROVIDER_MODULE,
+            "store_local": True,
+            "store_remote": True,
+            "store_synchronous": False,
+            "config": {
+                "bucket": "synapse-media",
+                "access_key_id": "access",
+                "secret_access_key": "secret",
+                "endpoint_url": "http://minio:9000",
+                "prefix": "media",
+            },
+        }
+    ]
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_media_s3_relation_joined(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm as leader.
+    act: integrate with the S3 provider.
+    assert: a bucket is requested in the application data of the relation.
+    """
+    harness.set_leader(True)
+    harness.begin()
+
+    relation_id = harness.add_relation("media-s3", "s3-integrator")
+    harness.add_relation_unit(relation_id, "s3-integrator/0")
+
+    assert harness.get_relation_data(relation_id, harness.charm.app.name) == {
+        "bucket": harness.charm.app.name
+    }
+
+
+def test_media_s3_relation_broken(s3_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation configured.
+    act: remove the media-s3 relation.
+    assert: the S3 storage provider is removed from the Synapse configuration.
+    """
+    harness = s3_related
+    harness.begin()
+    harness.container_pebble_ready(synapse.SYNAPSE_CONTAINER_NAME)
+    relation = harness.model.get_relation("media-s3")
+    assert relation and relation.app
+    harness.charm.on["media-s3"].relation_changed.emit(relation, relation.app)
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    assert yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH)).get(
+        "media_storage_providers"
+    )
+
+    harness.charm.on["media-s3"].relation_broken.emit(relation, relation.app)
+
+    config = yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH))
+    assert not config.get("media_storage_providers")
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_migrate_media_to_s3_action(s3_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation.
+    act: run migrate-media-to-s3 action deleting local media.
+    assert: the media store is updated and uploaded with s3_media_upload.
+    """
+    harness = s3_related
+    harness.begin()
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    commands = []
+
+    def s3_media_upload_handler(argv: list[str]) -> synapse.ExecResult:
+        """Record the s3_media_upload commands.
+
+        Args:
+            argv: arguments list.
+
+        Returns:
+            ExecResult instance.
+        """
+        commands.append(argv)
+        return synapse.ExecResult(0, f"{argv[1]} done\n", "")
+
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=container,
+        executable=synapse.S3_MEDIA_UPLOAD_COMMAND_PATH,
+        handler=s3_media_upload_handler,
+    )
+    event = unittest.mock.MagicMock()
+    event.params = {"delete-local": True}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_media_to_s3_action(event)
+
+    assert commands == [
+        [synapse.S3_MEDIA_UPLOAD_COMMAND_PATH, "update", synapse.MEDIA_STORE_PATH, "0d"],
+        [
+            synapse.S3_MEDIA_UPLOAD_COMMAND_PATH,
+            "upload",
+            synapse.MEDIA_STORE_PATH,
+            "synapse-media",
+            "--endpoint-url",
+            "http://minio:9000",
+            "--prefix",
+            "media",
+            "--delete",
+        ],
+    ]
+    database_config = yaml.safe_load(
+        container.pull(f"{synapse.S3_MEDIA_UPLOAD_DIR}/database.yaml")
+    )
+    assert database_config == {"sqlite": {"database": synapse.SYNAPSE_SQLITE_DATABASE_PATH}}
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    assert event.log.call_args_list == [
+        unittest.mock.call("update done"),
+        unittest.mock.call("upload done"),
+    ]
+    event.set_results.assert_called_once_with({"migrate-media-to-s3": True})
+
+
+def test_migrate_media_to_s3_action_failed(s3_related: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media-s3 relation.
+    act: run migrate-media-to-s3 action with s3_media_upload failing.
+    assert: the action fails with the script output.
+    """
+    harness = s3_related
+    harness.begin()
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME),
+        executable=synapse.S3_MEDIA_UPLOAD_COMMAND_PATH,
+        handler=lambda _: synapse.ExecResult(1, "NoSuchBucket\n", ""),
+    )
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_media_to_s3_action(event)
+
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    event.fail.assert_called_once_with("s3_media_upload failed: NoSuchBucket")
+
+
+def test_migrate_media_to_s3_action_no_relation(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm without the media-s3 relation.
+    act: run migrate-media-to-s3 action.
+    assert: the action fails.
+    """
+    harness.set_leader(True)
+    harness.begin()
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_media_to_s3_action(event)
+
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    event.fail.assert_called_once_with("No media-s3 relation was found.")
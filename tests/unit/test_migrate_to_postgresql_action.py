@@ -0,0 +1,271 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Migrate to PostgreSQL action unit tests."""
+
+# Disable no-member to allow tests on generated mock attributes
+# pylint: disable=protected-access,no-member
+
+import unittest.mock
+
+import ops
+import psycopg2
+import pytest
+import yaml
+from ops.testing import Harness
+
+import synapse
+from database_client import DatabaseClient
+
+
+@pytest.fixture(name="prepare_mock")
+def prepare_mock_fixture(monkeypatch: pytest.MonkeyPatch) -> unittest.mock.MagicMock:
+    """Mock of the preparation of the PostgreSQL database"""
+    prepare_mock = unittest.mock.MagicMock()
+    monkeypatch.setattr(DatabaseClient, "prepare", prepare_mock)
+    return prepare_mock
+
+
+@pytest.fixture(name="sqlite_deployed")
+def sqlite_deployed_fixture(
+    harness: Harness, prepare_mock: unittest.mock.MagicMock  # pylint: disable=unused-argument
+) -> Harness:
+    """Harness fixture with a SQLite database and database relation configured"""
+    postgresql_relation_data = {
+        "endpoints": "myhost:5432",
+        "username": "user",
+        "password": "password",
+    }
+    harness.add_relation("database", "postgresql", app_data=postgresql_relation_data)
+    harness.set_leader(True)
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    container.push(synapse.SYNAPSE_SQLITE_DATABASE_PATH, "")
+    harness.begin()
+    root = harness.get_filesystem_root(container)
+
+    def mv_handler(argv: list[str]) -> synapse.ExecResult:
+        """Move a file of the container.
+
+        Args:
+            argv: arguments list.
+
+        Returns:
+            ExecResult instance.
+        """
+        (root / argv[1].lstrip("/")).rename(root / argv[2].lstrip("/"))
+        return synapse.ExecResult(0, "", "")
+
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=container, executable="mv", handler=mv_handler
+    )
+    return harness
+
+
+def test_migrate_to_postgresql_action(
+    sqlite_deployed: Harness, prepare_mock: unittest.mock.MagicMock
+) -> None:
+    """
+    arrange: start the Synapse charm with a SQLite database and a database relation.
+    act: run migrate-to-postgresql action.
+    assert: synapse_port_db is run with the database config, progress is logged,
+        the SQLite database is moved aside and Synapse is restarted.
+    """
+    harness = sqlite_deployed
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    port_db_calls: dict = {}
+
+    def port_db_handler(argv: list[str]) -> synapse.ExecResult:
+        """Record the synapse_port_db command and its config.
+
+        Args:
+            argv: arguments list.
+
+        Returns:
+            ExecResult instance.
+        """
+        port_db_calls["command"] = argv
+        port_db_calls["config"] = yaml.safe_load(container.pull(synapse.PORT_DB_CONFIG_PATH))
+        return synapse.ExecResult(0, "Table events: 10/100 (10.0%)\n\nAll tables ported\n", "")
+
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=container, executable=synapse.PORT_DB_COMMAND_PATH, handler=port_db_handler
+    )
+    event = unittest.mock.MagicMock()
+    event.params = {"batch-size": 500}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    assert port_db_calls["command"] == [
+        synapse.PORT_DB_COMMAND_PATH,
+        "--sqlite-database",
+        synapse.SYNAPSE_SQLITE_DATABASE_PATH,
+        "--postgres-config",
+        synapse.PORT_DB_CONFIG_PATH,
+        "--batch-size",
+        "500",
+    ]
+    assert port_db_calls["config"]["database"]["args"]["host"] == "myhost"
+    assert port_db_calls["config"]["database"]["args"]["password"] == "password"
+    assert not container.exists(synapse.PORT_DB_CONFIG_PATH)
+    assert event.log.call_args_list == [
+        unittest.mock.call("Table events: 10/100 (10.0%)"),
+        unittest.mock.call("All tables ported"),
+    ]
+    prepare_mock.assert_called_once()
+    assert not container.exists(synapse.SYNAPSE_SQLITE_DATABASE_PATH)
+    assert container.exists(synapse.SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH)
+    event.set_results.assert_called_once_with({"migrate-to-postgresql": True})
+    assert container.get_service(synapse.SYNAPSE_SERVICE_NAME).is_running()
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_sqlite_kept_until_migrated(sqlite_deployed: Harness) -> None:
+    """
+    arrange: start the Synapse charm with a SQLite database and a database relation.
+    act: change the configuration, then run migrate-to-postgresql action.
+    assert: Synapse keeps using SQLite until its database is ported, so that Synapse does
+        not create its schema in PostgreSQL first, then uses PostgreSQL.
+    """
+    harness = sqlite_deployed
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=container,
+        executable=synapse.PORT_DB_COMMAND_PATH,
+        handler=lambda _: synapse.ExecResult(0, "", ""),
+    )
+
+    harness.charm.change_config()
+
+    environment = container.get_plan().services[synapse.SYNAPSE_SERVICE_NAME].environment
+    assert "POSTGRES_HOST" not in environment
+
+    harness.charm._on_migrate_to_postgresql_action(unittest.mock.MagicMock())
+
+    environment = container.get_plan().services[synapse.SYNAPSE_SERVICE_NAME].environment
+    assert environment["POSTGRES_HOST"] == "myhost"
+
+
+def test_migrate_to_postgresql_action_port_db_failed(sqlite_deployed: Harness) -> None:
+    """
+    arrange: start the Synapse charm with a SQLite database and a database relation.
+    act: run migrate-to-postgresql action with synapse_port_db failing.
+    assert: the action fails with the script output and Synapse is kept stopped.
+    """
+    harness = sqlite_deployed
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    harness.register_command_handler(  # type: ignore # pylint: disable=no-member
+        container=container,
+        executable=synapse.PORT_DB_COMMAND_PATH,
+        handler=lambda _: synapse.ExecResult(1, "Database is not empty\n", ""),
+    )
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with("synapse_port_db failed: Database is not empty")
+    assert not container.exists(synapse.PORT_DB_CONFIG_PATH)
+    assert container.exists(synapse.SYNAPSE_SQLITE_DATABASE_PATH)
+    assert not container.get_service(synapse.SYNAPSE_SERVICE_NAME).is_running()
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+
+
+def test_migrate_to_postgresql_action_prepare_failed(
+    sqlite_deployed: Harness, prepare_mock: unittest.mock.MagicMock
+) -> None:
+    """
+    arrange: start the Synapse charm with a SQLite database and a database relation.
+    act: run migrate-to-postgresql action with the database preparation failing.
+    assert: the action fails.
+    """
+    harness = sqlite_deployed
+    prepare_mock.side_effect = psycopg2.Error("Connection refused")
+    event = unittest.mock.MagicMock()
+    event.params = {}
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with("Connection refused")
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+
+
+def test_migrate_to_postgresql_action_no_sqlite(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm with a database relation but no SQLite database.
+    act: run migrate-to-postgresql action.
+    assert: the action fails without stopping Synapse.
+    """
+    harness.add_relation(
+        "database",
+        "postgresql",
+        app_data={"endpoints": "myhost:5432", "username": "user", "password": "pass"},
+    )
+    harness.set_leader(True)
+    harness.begin()
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with(
+        f"SQLite database {synapse.SYNAPSE_SQLITE_DATABASE_PATH} not found."
+    )
+    assert not isinstance(harness.model.unit.status, ops.BlockedStatus)
+
+
+def test_migrate_to_postgresql_action_already_migrated(sqlite_deployed: Harness) -> None:
+    """
+    arrange: start the Synapse charm with a SQLite database already migrated.
+    act: run migrate-to-postgresql action.
+    assert: the action fails without porting the database again.
+    """
+    harness = sqlite_deployed
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    container.push(synapse.SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH, "")
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with(
+        "The SQLite database was already migrated to PostgreSQL, see "
+        f"{synapse.SYNAPSE_SQLITE_MIGRATED_DATABASE_PATH}."
+    )
+    assert not isinstance(harness.model.unit.status, ops.BlockedStatus)
+
+
+def test_migrate_to_postgresql_action_no_database(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm without database relation.
+    act: run migrate-to-postgresql action.
+    assert: the action fails.
+    """
+    harness.set_leader(True)
+    harness.begin()
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with("No database relation was found.")
+
+
+def test_migrate_to_postgresql_action_no_leader(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm and set the unit as non leader.
+    act: run migrate-to-postgresql action.
+    assert: the action fails.
+    """
+    harness.begin()
+    harness.set_leader(False)
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_migrate_to_postgresql_action(event)
+
+    event.fail.assert_called_once_with(
+        "Only the juju leader unit can run migrate to postgresql action"
+    )
@@ -0,0 +1,531 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Synapse NGINX unit tests."""
+
+# pylint: disable=protected-access
+
+import pathlib
+from unittest.mock import MagicMock
+
+import ops
+import pytest
+import yaml
+from ops.testing import Harness
+
+import synapse
+
+from .conftest import TEST_SERVER_NAME
+
+
+def _pull_nginx_config(container: ops.Container) -> str:
+    """Pull the NGINX configuration from the container.
+
+    Args:
+        container: NGINX container.
+
+    Returns:
+        The NGINX configuration decoded as text.
+    """
+    config = container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    return config.decode() if isinstance(config, bytes) else config
+
+
+def test_nginx_config_media_cache(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the NGINX configuration caches media downloads and thumbnails.
+    """
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert f"proxy_cache_path {synapse.SYNAPSE_NGINX_MEDIA_CACHE_PATH}" in config
+    assert "max_size=1g" in config
+    assert "location ~ ^/_matrix/media/[^/]+/(download|thumbnail)/" in config
+    assert "proxy_cache_lock on;" in config
+    assert f"proxy_cache_valid 200 {synapse.NGINX_MEDIA_CACHE_VALID}h;" in config
+    assert "proxy_ignore_headers" not in config
+    assert "add_header X-Cache-Status $upstream_cache_status always;" in config
+    assert f"syslog:server=127.0.0.1:{synapse.NGINX_LOG_EXPORTER_SYSLOG_PORT}" in config
+    assert f"server localhost:{synapse.SYNAPSE_PORT};" in config
+    assert "proxy_pass http://synapse;" in config
+    assert "client_max_body_size 50M;" in config
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_nginx_config_media_cache_disabled(harness: Harness) -> None:
+    """
+    arrange: charm deployed with an empty media_cache_max_size.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the NGINX configuration does not cache media.
+    """
+    harness.update_config({"media_cache_max_size": ""})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "keys_zone=media" not in config
+    assert "proxy_cache media;" not in config
+    assert "X-Cache-Status" not in config
+
+
+def test_nginx_config_workers_and_keepalive(harness: Harness) -> None:
+    """
+    arrange: charm deployed with nginx_worker_connections set.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX runs a worker per CPU and keeps the connections to Synapse and from the
+        ingress open.
+    """
+    harness.update_config({"nginx_worker_connections": 8192})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "worker_processes auto;" in config
+    assert "worker_connections 8192;" in config
+    assert "worker_rlimit_nofile 16384;" in config
+    assert f"keepalive {synapse.NGINX_UPSTREAM_KEEPALIVE};" in config
+    assert 'proxy_set_header Connection "";' in config
+    assert f"keepalive_requests {synapse.NGINX_CLIENT_KEEPALIVE_REQUESTS};" in config
+
+
+def test_nginx_config_gzip(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the gzip compression configured.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX compresses the JSON responses with the configured settings.
+    """
+    harness.update_config({"nginx_gzip_comp_level": 7, "nginx_gzip_min_length": 1024})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "application/json" in config
+    assert "gzip_comp_level 7;" in config
+    assert "gzip_min_length 1024;" in config
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        pytest.param({"nginx_gzip_comp_level": 10}, id="gzip level too high"),
+        pytest.param({"nginx_gzip_min_length": -1}, id="gzip negative length"),
+        pytest.param({"nginx_worker_connections": 10}, id="too few worker connections"),
+        pytest.param({"nginx_long_poll_read_timeout": 30}, id="long poll timeout too low"),
+        pytest.param({"nginx_login_rate_limit": "10/m"}, id="rate limit without unit"),
+        pytest.param({"nginx_trusted_proxies": "10.0.0.0/8;"}, id="invalid trusted proxies"),
+        pytest.param({"nginx_trusted_proxies": "10.0.0.1, cafe"}, id="trusted proxy not an IP"),
+        pytest.param({"nginx_trusted_proxies": "1.2.3"}, id="truncated trusted proxy"),
+        pytest.param({"nginx_access_log_format": "xml"}, id="invalid access log format"),
+        pytest.param({"nginx_sync_access_log_sample_rate": 101}, id="sample rate too high"),
+    ],
+)
+def test_nginx_config_invalid(harness: Harness, config: dict) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm with an invalid NGINX configuration.
+    assert: Synapse charm is blocked.
+    """
+    harness.update_config(config)
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert next(iter(config)) in str(harness.model.unit.status)
+
+
+def test_nginx_config_long_poll(harness: Harness) -> None:
+    """
+    arrange: charm deployed with nginx_long_poll_read_timeout set.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the long-polling requests are not buffered and have their own timeouts.
+    """
+    harness.update_config({"nginx_long_poll_read_timeout": 90})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    long_poll_location = config.split("(sync|events|initialSync)$ {")[1].split("}")[0]
+    assert "proxy_buffering off;" in long_poll_location
+    assert "proxy_read_timeout 90;" in long_poll_location
+    assert "location ~ ^/_matrix/(federation|key)/ {" in config
+
+
+def test_nginx_config_max_upload_size(harness: Harness) -> None:
+    """
+    arrange: charm deployed with max_upload_size set.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX accepts bodies as large as Synapse does.
+    """
+    harness.update_config({"max_upload_size": "200M"})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "client_max_body_size 200M;" in config
+
+
+@pytest.mark.parametrize(
+    "max_upload_size, max_body_size",
+    [
+        pytest.param("200M", "200", id="megabytes"),
+        pytest.param("1500K", "2", id="kilobytes rounded up"),
+    ],
+)
+def test_nginx_route_max_body_size(
+    harness: Harness, max_upload_size: str, max_body_size: str
+) -> None:
+    """
+    arrange: charm deployed with max_upload_size set.
+    act: start the Synapse charm as leader and relate it to the NGINX ingress integrator.
+    assert: the NGINX ingress accepts bodies as large as the NGINX of the pod does.
+    """
+    harness.update_config({"max_upload_size": max_upload_size})
+    harness.set_leader(True)
+    relation_id = harness.add_relation("nginx-route", "nginx-ingress-integrator")
+    harness.begin()
+
+    app_data = harness.get_relation_data(relation_id, harness.charm.app.name)
+    assert app_data["max-body-size"] == max_body_size
+    assert app_data["backend-protocol"] == "HTTP"
+    assert app_data["service-port"] == str(synapse.SYNAPSE_NGINX_PORT)
+
+
+def test_nginx_config_media_cache_invalid_size(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm with an invalid media_cache_max_size.
+    assert: Synapse charm is blocked.
+    """
+    harness.update_config({"media_cache_max_size": "1tb"})
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "media_cache_max_size" in str(harness.model.unit.status)
+
+
+def test_nginx_pebble_layer(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the NGINX container runs NGINX, the metrics exporter and the log exporter.
+    """
+    harness.begin_with_initial_hooks()
+
+    services = harness.get_container_pebble_plan(synapse.SYNAPSE_NGINX_CONTAINER_NAME).to_dict()[
+        "services"
+    ]
+    assert services[synapse.SYNAPSE_NGINX_SERVICE_NAME]["command"] == "/usr/sbin/nginx"
+    assert services[synapse.NGINX_LOG_EXPORTER_SERVICE_NAME]["command"] == (
+        f"{synapse.NGINX_LOG_EXPORTER_COMMAND_PATH} "
+        f"-config-file {synapse.NGINX_LOG_EXPORTER_CONFIG_PATH}"
+    )
+    assert services[synapse.NGINX_EXPORTER_SERVICE_NAME]["command"] == (
+        f"{synapse.NGINX_EXPORTER_COMMAND_PATH} "
+        f"-nginx.scrape-uri=http://127.0.0.1:{synapse.NGINX_STUB_STATUS_PORT}/stub_status "
+        f"-web.listen-address=:{synapse.NGINX_EXPORTER_PORT}"
+    )
+
+
+def test_nginx_config_metrics(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX exposes stub_status locally and logs the upstream response time.
+    """
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert f"listen 127.0.0.1:{synapse.NGINX_STUB_STATUS_PORT};" in config
+    assert "stub_status;" in config
+    assert "log_format upstream '$status $request_time $upstream_response_time';" in config
+    assert (
+        f"access_log syslog:server=127.0.0.1:{synapse.NGINX_LOG_EXPORTER_UPSTREAM_SYSLOG_PORT}"
+        ",tag=nginx upstream;"
+    ) in config
+
+
+@pytest.mark.parametrize(
+    "stale_config, reload_count",
+    [
+        pytest.param(True, 1, id="config changed"),
+        pytest.param(False, 0, id="config unchanged"),
+    ],
+)
+def test_nginx_reload_on_config_change(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch, stale_config: bool, reload_count: int
+) -> None:
+    """
+    arrange: start the Synapse charm with NGINX running, with a stale configuration or not.
+    act: replan NGINX.
+    assert: NGINX is reloaded only if its configuration changed.
+    """
+    harness.begin_with_initial_hooks()
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    if stale_config:
+        nginx_container.push(synapse.SYNAPSE_NGINX_CONFIG_PATH, "stale")
+    send_signal_mock = MagicMock()
+    monkeypatch.setattr(nginx_container, "send_signal", send_signal_mock)
+
+    harness.charm.replan_nginx()
+
+    assert send_signal_mock.call_count == reload_count
+    if reload_count:
+        send_signal_mock.assert_called_once_with("SIGHUP", synapse.SYNAPSE_NGINX_SERVICE_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert config == synapse.get_nginx_config(
+        harness.charm._charm_state, harness.charm.charm_dir / "templates"
+    )
+
+
+def test_nginx_config_working_directory(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """
+    arrange: start the Synapse charm from a working directory other than the charm one.
+    act: replan NGINX.
+    assert: the NGINX configuration is rendered from the charm templates.
+    """
+    harness.begin_with_initial_hooks()
+    monkeypatch.chdir(tmp_path)
+
+    harness.charm.replan_nginx()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    assert nginx_container.exists(synapse.SYNAPSE_NGINX_CONFIG_PATH)
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_nginx_config_rate_limits(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the rate limits configured.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX rate limits the configured zones and logs them for the exporter.
+    """
+    harness.update_config(
+        {
+            "nginx_login_rate_limit": "20r/m",
+            "nginx_register_rate_limit": "",
+            "nginx_connection_limit": 100,
+            "nginx_trusted_proxies": "10.1.0.0/16, 10.2.0.1",
+        }
+    )
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    assert "limit_req_zone $binary_remote_addr zone=login:10m rate=20r/m;" in config
+    assert "zone=register" not in config
+    assert "zone=media_upload:10m rate=30r/m;" in config
+    assert "zone=federation:10m rate=50r/s;" in config
+    login_location = config.split("/login {")[1].split("}")[0]
+    assert "limit_req zone=login burst=5 nodelay;" in login_location
+    register_location = config.split("/register {")[1].split("}")[0]
+    assert "limit_req" not in register_location
+    assert "limit_conn addr 100;" in config
+    assert "set_real_ip_from 10.1.0.0/16;" in config
+    assert "set_real_ip_from 10.2.0.1;" in config
+    port = synapse.NGINX_LOG_EXPORTER_RATE_LIMIT_SYSLOG_PORT
+    assert f"access_log syslog:server=127.0.0.1:{port},tag=nginx rate_limit;" in config
+
+
+def test_nginx_config_no_trusted_proxies(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the default configuration.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX trusts no proxy to forward the client address and does not apply the
+        rate limits, which would be shared by all the clients behind the ingress.
+    """
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    assert "set_real_ip_from" not in config
+    assert "real_ip_header" not in config
+    assert "limit_req_zone" not in config
+    assert "limit_req " not in config
+
+
+def test_nginx_config_rate_limits_disabled(harness: Harness) -> None:
+    """
+    arrange: charm deployed with all the rate limits disabled.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX does not rate limit nor log the undefined rate limit zone.
+    """
+    harness.update_config(
+        {
+            "nginx_login_rate_limit": "",
+            "nginx_register_rate_limit": "",
+            "nginx_media_upload_rate_limit": "",
+            "nginx_federation_rate_limit": "",
+            "nginx_trusted_proxies": "10.1.0.0/16",
+        }
+    )
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "limit_req " not in config
+    assert "limit_conn addr" not in config
+    assert "$rate_limit_zone" not in config
+
+
+def test_nginx_config_access_log_json(harness: Harness) -> None:
+    """
+    arrange: charm deployed with nginx_access_log_format set to json.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX writes the access log in JSON with the timing and upstream fields.
+    """
+    harness.update_config({"nginx_access_log_format": "json"})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert "log_format json escape=json" in config
+    assert '"request_time":$request_time,' in config
+    assert '"upstream_addr":"$upstream_addr",' in config
+    assert '"upstream_response_time":"$upstream_response_time",' in config
+    assert "access_log /var/log/nginx/access.log json;" in config
+    assert "access_log /var/log/nginx/access.log main;" not in config
+
+
+def test_nginx_config_access_log_default(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX writes every request but /health to the access log in the main format.
+    """
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    assert "access_log /var/log/nginx/access.log main;" in config
+    assert "log_format json" not in config
+    assert "$access_log_enabled" not in config
+    health_location = config.split("location = /health {")[1].split("}")[0]
+    assert "access_log off;" in health_location
+
+
+@pytest.mark.parametrize(
+    "sample_rate, sync_log_enabled",
+    [
+        pytest.param(10, "$sync_access_log_sampled", id="sampled"),
+        pytest.param(0, "0", id="excluded"),
+    ],
+)
+def test_nginx_config_sync_access_log_sample_rate(
+    harness: Harness, sample_rate: int, sync_log_enabled: str
+) -> None:
+    """
+    arrange: charm deployed with nginx_sync_access_log_sample_rate set.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX only writes a sample of the /sync requests to the access log.
+    """
+    harness.update_config({"nginx_sync_access_log_sample_rate": sample_rate})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert f"~^/_matrix/client/(api/v1|r0|v3|unstable)/sync$ {sync_log_enabled};" in config
+    assert ("split_clients $request_id $sync_access_log_sampled" in config) == bool(sample_rate)
+    assert "access_log /var/log/nginx/access.log main if=$access_log_enabled;" in config
+    assert (
+        f"access_log syslog:server=127.0.0.1:{synapse.NGINX_LOG_EXPORTER_UPSTREAM_SYSLOG_PORT}"
+        ",tag=nginx upstream;"
+    ) in config
+
+
+@pytest.mark.parametrize(
+    "public_baseurl, server, base_url",
+    [
+        pytest.param(
+            None,
+            f'"{TEST_SERVER_NAME}:443"',
+            f'"https://{TEST_SERVER_NAME}/"',
+            id="server name",
+        ),
+        pytest.param(
+            "https://matrix.example.com:8448",
+            '"matrix.example.com:8448"',
+            '"https://matrix.example.com:8448/"',
+            id="public baseurl",
+        ),
+        pytest.param(
+            "https://matrix.example.com/it's/$host\\",
+            '"matrix.example.com:443"',
+            '"https://matrix.example.com/it\\\\u0027s/\\\\u0024host\\\\\\\\/"',
+            id="public baseurl to escape",
+        ),
+    ],
+)
+def test_nginx_config_well_known(
+    harness: Harness, public_baseurl: str | None, server: str, base_url: str
+) -> None:
+    """
+    arrange: charm deployed with public_baseurl set or not.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: NGINX answers the well-known requests with cache headers and Synapse does not
+        serve them.
+    """
+    if public_baseurl:
+        harness.update_config({"public_baseurl": public_baseurl})
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    server_location = config.split("location = /.well-known/matrix/server {")[1].split("}\n")[0]
+    assert f"""return 200 '{{"m.server": {server}}}';""" in server_location
+    assert (
+        f"add_header Cache-Control 'public, max-age={synapse.NGINX_WELL_KNOWN_MAX_AGE}';"
+        in server_location
+    )
+    client_location = config.split("location = /.well-known/matrix/client {")[1].split("}\n")[0]
+    assert f"""return 200 '{{"m.homeserver": {{"base_url": {base_url}}}}}';""" in client_location
+    assert "add_header Access-Control-Allow-Origin '*';" in client_location
+    synapse_container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    synapse_config = yaml.safe_load(synapse_container.pull(synapse.SYNAPSE_CONFIG_PATH).read())
+    assert "serve_server_wellknown" not in synapse_config
+
+
+def test_nginx_config_health(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the NGINX health reflects the Synapse health, cached, and the liveness is static.
+    """
+    harness.begin_with_initial_hooks()
+
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    config = _pull_nginx_config(nginx_container)
+    assert f"proxy_cache_path {synapse.SYNAPSE_NGINX_HEALTH_CACHE_PATH}" in config
+    health_location = config.split("location = /health {")[1].split("}")[0]
+    assert "proxy_pass http://synapse/health;" in health_location
+    assert "proxy_cache health;" in health_location
+    assert f"proxy_cache_valid any {synapse.NGINX_HEALTH_CACHE_VALID}s;" in health_location
+    assert "error_page 502 504 = @synapse_unavailable;" in health_location
+    unavailable_location = config.split("location @synapse_unavailable {")[1].split("}")[0]
+    assert "return 503;" in unavailable_location
+    live_location = config.split("location = /health/live {")[1].split("}")[0]
+    assert "return 204;" in live_location
+    assert "proxy_pass" not in live_location
+
+
+def test_nginx_pebble_checks(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the NGINX ready check depends on Synapse and the alive check does not.
+    """
+    harness.begin_with_initial_hooks()
+
+    checks = harness.charm.pebble_service._nginx_pebble_layer["checks"]
+    assert checks[synapse.CHECK_NGINX_READY_NAME]["level"] == "ready"
+    assert checks[synapse.CHECK_NGINX_READY_NAME]["http"] == {
+        "url": f"http://localhost:{synapse.SYNAPSE_NGINX_PORT}/health"
+    }
+    assert checks[synapse.CHECK_NGINX_ALIVE_NAME]["level"] == "alive"
+    assert checks[synapse.CHECK_NGINX_ALIVE_NAME]["http"] == {
+        "url": f"http://localhost:{synapse.SYNAPSE_NGINX_PORT}/health/live"
+    }
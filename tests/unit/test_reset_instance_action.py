@@ -9,6 +9,7 @@ import io
 import unittest.mock
 
 import ops
+import psycopg2
 import pytest
 from ops.testing import Harness
 
@@ -82,20 +83,20 @@ def test_reset_instance_action_failed(harness: Harness) -> None:
     assert "Migrate config failed" in str(harness.model.unit.status)
 
 
-def test_reset_instance_action_path_error_blocked(
-    container_with_path_error_blocked: unittest.mock.MagicMock,
+def test_reset_instance_action_data_wipe_error_blocked(
+    container_with_data_wipe_error: unittest.mock.MagicMock,
     harness: Harness,
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     """
     arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
     act: change server_name and run reset-instance action.
-    assert: Synapse charm should be blocked by error on remove_path.
+    assert: Synapse charm should be blocked by error erasing the data.
     """
     harness.begin()
     harness.set_leader(True)
     harness.charm.unit.get_container = unittest.mock.MagicMock(
-        return_value=container_with_path_error_blocked
+        return_value=container_with_data_wipe_error
     )
     event = unittest.mock.MagicMock()
     monkeypatch.setattr(DatabaseClient, "erase", unittest.mock.MagicMock())
@@ -103,39 +104,121 @@ def test_reset_instance_action_path_error_blocked(
     # Calling to test the action since is not possible calling via harness
     harness.charm._on_reset_instance_action(event)
 
-    assert container_with_path_error_blocked.remove_path.call_count == 1
     assert isinstance(harness.model.unit.status, ops.BlockedStatus)
     assert "Error erasing" in str(harness.model.unit.status)
 
 
-def test_reset_instance_action_path_error_pass(
-    container_with_path_error_pass: unittest.mock.MagicMock,
+def test_reset_instance_action_parallel_data_wipe(
+    container_mocked: unittest.mock.MagicMock,
     harness: Harness,
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     """
-    arrange: start the Synapse charm, set Synapse container to be ready and set server_name.
-    act: change server_name and run reset-instance action.
-    assert: Synapse charm should reset the instance.
+    arrange: start the Synapse charm with a database relation and a mocked container.
+    act: run reset-instance action.
+    assert: the data is erased by a single process inside the container that is only
+        waited for after the database has been recreated.
     """
+    harness.add_relation(
+        "database",
+        "postgresql",
+        app_data={"endpoints": "myhost:5432", "username": "user", "password": "pass"},
+    )
     harness.begin()
     harness.set_leader(True)
     content = io.StringIO(f'server_name: "{TEST_SERVER_NAME}"')
-    pull_mock = unittest.mock.MagicMock(return_value=content)
-    monkeypatch.setattr(container_with_path_error_pass, "pull", pull_mock)
-    harness.charm.unit.get_container = unittest.mock.MagicMock(
-        return_value=container_with_path_error_pass
-    )
+    monkeypatch.setattr(container_mocked, "pull", unittest.mock.MagicMock(return_value=content))
+    harness.charm.unit.get_container = unittest.mock.MagicMock(return_value=container_mocked)
+    calls = unittest.mock.MagicMock()
+    calls.attach_mock(container_mocked.exec, "exec")
+    calls.attach_mock(container_mocked.exec.return_value.wait_output, "wait_output")
+    monkeypatch.setattr(DatabaseClient, "erase", calls.erase)
     event = unittest.mock.MagicMock()
-    monkeypatch.setattr(DatabaseClient, "erase", unittest.mock.MagicMock())
 
     # Calling to test the action since is not possible calling via harness
     harness.charm._on_reset_instance_action(event)
 
-    assert container_with_path_error_pass.remove_path.call_count == 1
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    call_names = [
+        name for name, _, _ in calls.mock_calls if name in ("exec", "erase", "wait_output")
+    ]
+    assert call_names[:3] == ["exec", "erase", "wait_output"]
+    assert calls.exec.call_args_list[0][0][0] == [
+        "find",
+        synapse.SYNAPSE_CONFIG_DIR,
+        "-mindepth",
+        "1",
+        "-delete",
+    ]
+    # Only the connection file of the disabled state compressor is removed by path.
+    assert all(
+        remove_call.args[0] == synapse.STATE_COMPRESSOR_CONNECTION_PATH
+        for remove_call in container_mocked.remove_path.call_args_list
+    )
+    event.log.assert_any_call("Erasing Synapse data")
     assert isinstance(harness.model.unit.status, ops.ActiveStatus)
 
 
+def test_reset_instance_action_database_error_waits_data_wipe(
+    container_mocked: unittest.mock.MagicMock,
+    harness: Harness,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    arrange: start the Synapse charm with a database relation and a mocked container.
+    act: run reset-instance action with the database failing to be erased.
+    assert: the data wipe is still waited for and the charm is blocked.
+    """
+    harness.add_relation(
+        "database",
+        "postgresql",
+        app_data={"endpoints": "myhost:5432", "username": "user", "password": "pass"},
+    )
+    harness.begin()
+    harness.set_leader(True)
+    harness.charm.unit.get_container = unittest.mock.MagicMock(return_value=container_mocked)
+    erase_mock = unittest.mock.MagicMock(side_effect=psycopg2.Error("Database busy"))
+    monkeypatch.setattr(DatabaseClient, "erase", erase_mock)
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_reset_instance_action(event)
+
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    container_mocked.exec.return_value.wait_output.assert_called_once()
+    assert event.fail.call_count == 1
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "Database busy" in str(harness.model.unit.status)
+
+
+def test_reset_instance_action_data_wipe_pebble_error(
+    container_mocked: unittest.mock.MagicMock, harness: Harness
+) -> None:
+    """
+    arrange: start the Synapse charm with a mocked container failing to run commands.
+    act: run reset-instance action.
+    assert: the action fails and the charm is blocked.
+    """
+    harness.begin()
+    harness.set_leader(True)
+    harness.charm.unit.get_container = unittest.mock.MagicMock(return_value=container_mocked)
+    container_mocked.exec.side_effect = ops.pebble.APIError(
+        body={}, code=500, status="Internal Server Error", message="exec failed"
+    )
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_reset_instance_action(event)
+
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    assert event.fail.call_count == 1
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert "exec failed" in str(harness.model.unit.status)
+
+
 def test_reset_instance_action_no_leader(
     harness: Harness,
 ) -> None:
@@ -155,3 +238,65 @@ def test_reset_instance_action_no_leader(
     # pylint: disable=no-member
     assert event.fail.call_count == 1
     assert "Only the juju leader unit can run reset instance action" == event.fail.call_args[0][0]
+
+
+def test_reset_instance_action_database_services(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with a database relation and the database services running.
+    act: run reset-instance action.
+    assert: the database services are stopped while the database is erased and
+        started again afterwards.
+    """
+    harness.add_relation(
+        "database",
+        "postgresql",
+        app_data={"endpoints": "myhost:5432", "username": "user", "password": "pass"},
+    )
+    harness.begin()
+    harness.set_leader(True)
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    harness.charm.pebble_service.replan_database_services(container)
+    assert container.get_service(synapse.DB_EXPORTER_SERVICE_NAME).is_running()
+    running_on_erase = []
+
+    def erase(_: DatabaseClient) -> None:
+        """Record if the database exporter is running while the database is erased."""
+        running_on_erase.append(
+            container.get_service(synapse.DB_EXPORTER_SERVICE_NAME).is_running()
+        )
+
+    monkeypatch.setattr(DatabaseClient, "erase", erase)
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_reset_instance_action(event)
+
+    assert running_on_erase == [False]
+    assert container.get_service(synapse.DB_EXPORTER_SERVICE_NAME).is_running()
+    event.set_results.assert_called_once_with({"reset-instance": True})
+
+
+def test_reset_instance_action_pebble_error(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm and make Pebble fail to replan the services.
+    act: run reset-instance action.
+    assert: the action fails and the charm is blocked.
+    """
+    harness.begin()
+    harness.set_leader(True)
+    change_error = ops.pebble.ChangeError(err="Pebble failed", change=unittest.mock.MagicMock())
+    monkeypatch.setattr(ops.Container, "replan", unittest.mock.MagicMock(side_effect=change_error))
+    event = unittest.mock.MagicMock()
+
+    # Calling to test the action since is not possible calling via harness
+    harness.charm._on_reset_instance_action(event)
+
+    # Disable no-member to allow tests on generated mock attributes
+    # pylint: disable=no-member
+    assert event.fail.call_count == 1
+    assert event.set_results.call_count == 0
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
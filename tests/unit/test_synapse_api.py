@@ -649,3 +649,78 @@ def test_get_version_regex_error(mock_session):
 
     with pytest.raises(synapse.APIError, match="server_version has unexpected content"):
         synapse.api.get_version()
+
+
+def test_get_background_updates_status(monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set admin_access_token and mock request.
+    act: get background updates status.
+    assert: the running updates are returned.
+    """
+    admin_access_token = token_hex(16)
+    current_updates = {"main": {"name": "event_stats", "total_item_count": 63}}
+    mock_response = mock.MagicMock()
+    mock_response.json.return_value = {"enabled": True, "current_updates": current_updates}
+    do_request_mock = mock.MagicMock(return_value=mock_response)
+    monkeypatch.setattr("synapse.api._do_request", do_request_mock)
+
+    updates = synapse.get_background_updates_status(admin_access_token=admin_access_token)
+
+    assert updates == current_updates
+    do_request_mock.assert_called_once_with(
+        "GET",
+        synapse.BACKGROUND_UPDATES_STATUS_URL,
+        headers={"Authorization": f"Bearer {admin_access_token}"},
+    )
+
+
+def test_get_background_updates_status_error(monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set admin_access_token and mock request to return unexpected content.
+    act: get background updates status.
+    assert: an error is raised.
+    """
+    mock_response = mock.MagicMock()
+    mock_response.json.return_value = {"enabled": True}
+    do_request_mock = mock.MagicMock(return_value=mock_response)
+    monkeypatch.setattr("synapse.api._do_request", do_request_mock)
+
+    with pytest.raises(synapse.APIError, match="current_updates"):
+        synapse.get_background_updates_status(admin_access_token=token_hex(16))
+
+
+def test_purge_media_cache(monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set admin_access_token and mock request.
+    act: purge the media cache.
+    assert: the number of deleted media is returned.
+    """
+    admin_access_token = token_hex(16)
+    mock_response = mock.MagicMock()
+    mock_response.json.return_value = {"deleted": 10}
+    do_request_mock = mock.MagicMock(return_value=mock_response)
+    monkeypatch.setattr("synapse.api._do_request", do_request_mock)
+
+    deleted = synapse.purge_media_cache(admin_access_token=admin_access_token, before_ts=1000)
+
+    assert deleted == 10
+    do_request_mock.assert_called_once_with(
+        "POST",
+        f"{synapse.SYNAPSE_URL}{synapse.PURGE_MEDIA_CACHE_PATH}?before_ts=1000",
+        headers={"Authorization": f"Bearer {admin_access_token}"},
+    )
+
+
+def test_purge_media_cache_error(monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set admin_access_token and mock request to return unexpected content.
+    act: purge the media cache.
+    assert: an error is raised.
+    """
+    mock_response = mock.MagicMock()
+    mock_response.json.return_value = {}
+    do_request_mock = mock.MagicMock(return_value=mock_response)
+    monkeypatch.setattr("synapse.api._do_request", do_request_mock)
+
+    with pytest.raises(synapse.APIError, match="deleted"):
+        synapse.purge_media_cache(admin_access_token=token_hex(16), before_ts=1000)
@@ -0,0 +1,206 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Synapse database exporter unit tests."""
+
+# pylint: disable=protected-access
+
+import importlib.util
+import pathlib
+import typing
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+from prometheus_client import CollectorRegistry, generate_latest
+
+EXPORTER_PATH = (
+    pathlib.Path(__file__).parents[2] / "synapse_rock" / "db_exporter" / "synapse_db_exporter.py"
+)
+_spec = importlib.util.spec_from_file_location("synapse_db_exporter", EXPORTER_PATH)
+assert _spec is not None and _spec.loader is not None
+synapse_db_exporter = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(synapse_db_exporter)
+
+
+class DatabaseStub:  # pylint: disable=too-few-public-methods
+    """A database answering the exporter queries with canned rows."""
+
+    def __init__(self, name: str, rows: typing.Dict[str, list]):
+        """Initialize the database stub.
+
+        Args:
+            name: database name.
+            rows: rows returned by the queries containing each key.
+        """
+        self.name = name
+        self._rows = rows
+
+    def query(self, query: str) -> list:
+        """Return the canned rows of a query.
+
+        Args:
+            query: query to be executed.
+
+        Returns:
+            Rows of the first key found in the query.
+
+        Raises:
+            Error: if the query is unknown, as a failing database would.
+        """
+        for key, rows in self._rows.items():
+            if key in query:
+                return rows
+        raise psycopg2.Error(f"unexpected query: {query}")
+
+
+def _get_samples(collector: typing.Any) -> typing.Dict[tuple, float]:
+    """Collect the samples of a collector by name and labels.
+
+    Args:
+        collector: the collector.
+
+    Returns:
+        The sample values by metric name and label values.
+    """
+    return {
+        (sample.name, *sample.labels.values()): sample.value
+        for family in collector.collect()
+        for sample in family.samples
+    }
+
+
+TABLE_ROWS: typing.Dict[str, list] = {
+    "pg_stat_user_tables": [("events", 100, 10, 3, 300, 7, 8192)],
+    "pg_database_size": [(65536,)],
+}
+
+
+def test_database_connection(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: set the state database environment variables and mock psycopg2.
+    act: run a query on the state database.
+    assert: the exporter connects with the prefixed environment variables.
+    """
+    monkeypatch.setenv("STATE_POSTGRES_DB", "synapse_state")
+    monkeypatch.setenv("STATE_POSTGRES_USER", "user")
+    monkeypatch.setenv("STATE_POSTGRES_PASSWORD", "pass")
+    monkeypatch.setenv("STATE_POSTGRES_HOST", "statehost")
+    monkeypatch.setenv("STATE_POSTGRES_PORT", "6432")
+    connect_mock = MagicMock()
+    cursor_mock = connect_mock.return_value.cursor.return_value.__enter__.return_value
+    cursor_mock.fetchall.return_value = [(1,)]
+    monkeypatch.setattr(psycopg2, "connect", connect_mock)
+
+    database = synapse_db_exporter.Database("STATE_")
+
+    assert database.query("SELECT 1") == [(1,)]
+    connect_args = connect_mock.call_args.kwargs
+    assert connect_args["dbname"] == "synapse_state"
+    assert connect_args["host"] == "statehost"
+    assert connect_args["port"] == "6432"
+    assert connect_args["password"] == "pass"
+
+
+def test_database_reconnect_after_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: set the database environment variables and mock a connection that fails.
+    act: run a query.
+    assert: the error is raised and the connection is closed to be reopened later.
+    """
+    for variable in ("POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST"):
+        monkeypatch.setenv(variable, "synapse")
+    connect_mock = MagicMock()
+    cursor_mock = connect_mock.return_value.cursor.return_value.__enter__.return_value
+    cursor_mock.execute.side_effect = psycopg2.OperationalError("connection lost")
+    monkeypatch.setattr(psycopg2, "connect", connect_mock)
+    database = synapse_db_exporter.Database("")
+
+    with pytest.raises(psycopg2.OperationalError):
+        database.query("SELECT 1")
+
+    connect_mock.return_value.close.assert_called_once()
+    assert database._connection_args["port"] == "5432"
+
+
+def test_collect_tables() -> None:
+    """
+    arrange: stub the main and state databases.
+    act: collect the metrics.
+    assert: the table and database statistics of both databases are exported.
+    """
+    main = DatabaseStub("synapse", TABLE_ROWS)
+    state = DatabaseStub("synapse_state", {**TABLE_ROWS, "to_regclass": [(None,)]})
+    collector = synapse_db_exporter.SynapseDatabaseCollector(databases=[main, state], state=state)
+
+    samples = _get_samples(collector)
+
+    for database in ("synapse", "synapse_state"):
+        assert samples[("synapse_db_table_size_bytes", database, "events")] == 8192
+        assert samples[("synapse_db_table_live_tuples", database, "events")] == 100
+        assert samples[("synapse_db_table_dead_tuples", database, "events")] == 10
+        assert samples[("synapse_db_table_seq_scans_total", database, "events")] == 3
+        assert samples[("synapse_db_table_index_scans_total", database, "events")] == 7
+        assert samples[("synapse_db_size_bytes", database)] == 65536
+        assert samples[("synapse_db_exporter_up", database)] == 1
+    assert not any(key[0].startswith("synapse_state_compressor") for key in samples)
+
+
+def test_collect_state_compressor() -> None:
+    """
+    arrange: stub a database on which the state compressor has run.
+    act: collect the metrics.
+    assert: the progress of the state compressor is exported.
+    """
+    database = DatabaseStub(
+        "synapse",
+        {
+            **TABLE_ROWS,
+            "to_regclass": [("state_compressor_total_progress",)],
+            "lowest_uncompressed_group": [(500,)],
+            "MAX(id)": [(2000,)],
+            "state_compressor_progress": [(12,)],
+        },
+    )
+    collector = synapse_db_exporter.SynapseDatabaseCollector(databases=[database], state=database)
+
+    samples = _get_samples(collector)
+
+    assert samples[("synapse_state_compressor_lowest_uncompressed_group",)] == 500
+    assert samples[("synapse_state_compressor_max_state_group",)] == 2000
+    assert samples[("synapse_state_compressor_rooms",)] == 12
+
+
+def test_collect_database_error() -> None:
+    """
+    arrange: stub a database failing every query.
+    act: collect the metrics.
+    assert: the database is reported as down.
+    """
+    database = DatabaseStub("synapse", {})
+    collector = synapse_db_exporter.SynapseDatabaseCollector(databases=[database], state=database)
+
+    samples = _get_samples(collector)
+
+    assert samples == {("synapse_db_exporter_up", "synapse"): 0}
+
+
+def test_collect_families_once() -> None:
+    """
+    arrange: stub the main and state databases.
+    act: expose the metrics in the Prometheus text format.
+    assert: each metric family is described once.
+    """
+    main = DatabaseStub("synapse", TABLE_ROWS)
+    state = DatabaseStub("synapse_state", {**TABLE_ROWS, "to_regclass": [(None,)]})
+    registry = CollectorRegistry()
+    registry.register(
+        synapse_db_exporter.SynapseDatabaseCollector(databases=[main, state], state=state)
+    )
+
+    exposition = generate_latest(registry).decode()
+
+    help_lines = [line for line in exposition.splitlines() if line.startswith("# HELP")]
+    assert len(help_lines) == len(set(help_lines))
+    assert "# HELP synapse_db_size_bytes Total size of the database." in help_lines
+    assert 'synapse_db_size_bytes{database="synapse_state"} 65536.0' in exposition
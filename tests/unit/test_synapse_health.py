@@ -0,0 +1,102 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Synapse health unit tests."""
+
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+import ops
+import pytest
+import yaml
+from ops.testing import Harness
+
+import synapse
+
+
+def test_health_listener(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: Synapse serves the health resource on its own listener, used by the checks.
+    """
+    harness.begin_with_initial_hooks()
+
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    config = yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH).read())
+    assert {
+        "port": synapse.SYNAPSE_HEALTH_PORT,
+        "type": "http",
+        "bind_addresses": ["127.0.0.1"],
+        "resources": [{"names": ["health"]}],
+    } in config["listeners"]
+    checks = harness.charm.pebble_service._pebble_layer["checks"]
+    assert checks[synapse.CHECK_READY_NAME]["http"] == {"url": synapse.SYNAPSE_HEALTH_URL}
+    assert checks[synapse.CHECK_ALIVE_NAME]["http"] == {"url": synapse.SYNAPSE_HEALTH_URL}
+
+
+def test_check_settings(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the check settings and the media repository worker enabled.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the checks of the Synapse processes use the settings of their level.
+    """
+    harness.update_config(
+        {
+            "enable_media_repository_worker": True,
+            "ready_check_period": 5,
+            "ready_check_timeout": 2,
+            "ready_check_threshold": 6,
+            "alive_check_period": 30,
+            "alive_check_timeout": 10,
+            "alive_check_threshold": 2,
+        }
+    )
+    harness.begin_with_initial_hooks()
+
+    checks = harness.charm.pebble_service._pebble_layer["checks"]
+    for check_name in (synapse.CHECK_READY_NAME, synapse.CHECK_MEDIA_REPOSITORY_READY_NAME):
+        assert checks[check_name]["period"] == "5s"
+        assert checks[check_name]["timeout"] == "2s"
+        assert checks[check_name]["threshold"] == 6
+    assert checks[synapse.CHECK_ALIVE_NAME]["period"] == "30s"
+    assert checks[synapse.CHECK_ALIVE_NAME]["timeout"] == "10s"
+    assert checks[synapse.CHECK_ALIVE_NAME]["threshold"] == 2
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        pytest.param({"ready_check_timeout": 10}, id="ready timeout equal to period"),
+        pytest.param(
+            {"alive_check_period": 5, "alive_check_timeout": 6}, id="alive timeout above period"
+        ),
+        pytest.param({"ready_check_threshold": 0}, id="no threshold"),
+    ],
+)
+def test_check_settings_invalid(harness: Harness, config: dict) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm with invalid check settings.
+    assert: Synapse charm is blocked.
+    """
+    harness.update_config(config)
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+
+
+def test_enable_health_listener_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    arrange: set mock container failing to pull the Synapse configuration.
+    act: call enable_health_listener.
+    assert: raise WorkloadError.
+    """
+    error_message = "Error pulling file"
+    path_error = ops.pebble.PathError(kind="fake", message=error_message)
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", MagicMock(side_effect=path_error))
+
+    with pytest.raises(synapse.WorkloadError, match=error_message):
+        synapse.enable_health_listener(container_mock)
@@ -0,0 +1,159 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Synapse workers unit tests."""
+
+# pylint: disable=protected-access
+
+import dataclasses
+from unittest.mock import MagicMock
+
+import ops
+import pytest
+import yaml
+from ops.testing import Harness
+
+import synapse
+from media_cache import purge_remote_media_cache
+from pebble import PebbleService
+
+
+def test_media_repository_worker_disabled(harness: Harness) -> None:
+    """
+    arrange: charm deployed.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the media is served by the main process and the worker is not started.
+    """
+    harness.begin_with_initial_hooks()
+
+    plan = harness.get_container_pebble_plan(synapse.SYNAPSE_CONTAINER_NAME).to_dict()
+    assert plan["services"][synapse.MEDIA_REPOSITORY_SERVICE_NAME]["startup"] == "disabled"
+    assert plan["services"][synapse.REDIS_SERVICE_NAME]["startup"] == "disabled"
+    layer = harness.charm.pebble_service._pebble_layer
+    assert layer["checks"][synapse.CHECK_MEDIA_REPOSITORY_READY_NAME]["http"] == {
+        "url": synapse.SYNAPSE_HEALTH_URL
+    }
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    config = yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH).read())
+    assert "enable_media_repo" not in config
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    nginx_config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert f"localhost:{synapse.MEDIA_REPOSITORY_PORT}" not in nginx_config
+    assert "upstream media_repository" not in nginx_config
+
+
+def test_media_repository_worker_disabled_after_enabled(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the media repository worker enabled.
+    act: get the Pebble layer once the media repository worker is disabled.
+    assert: the layer still defines the worker check, which Pebble keeps once added,
+        and checks the main process with it.
+    """
+    harness.update_config({"enable_media_repository_worker": True})
+    harness.begin_with_initial_hooks()
+    enabled_layer = harness.charm.pebble_service._pebble_layer
+    charm_state = harness.charm._charm_state
+    synapse_config = charm_state.synapse_config.copy(
+        update={"enable_media_repository_worker": False}
+    )
+
+    disabled_layer = PebbleService(
+        charm_state=dataclasses.replace(charm_state, synapse_config=synapse_config)
+    )._pebble_layer
+
+    enabled_check = enabled_layer["checks"][synapse.CHECK_MEDIA_REPOSITORY_READY_NAME]
+    assert enabled_check["http"] == {
+        "url": f"http://127.0.0.1:{synapse.MEDIA_REPOSITORY_HEALTH_PORT}/health"
+    }
+    disabled_check = disabled_layer["checks"][synapse.CHECK_MEDIA_REPOSITORY_READY_NAME]
+    assert disabled_check["override"] == "replace"
+    assert disabled_check["http"] == {"url": synapse.SYNAPSE_HEALTH_URL}
+
+
+def test_media_repository_worker_enabled(harness: Harness) -> None:
+    """
+    arrange: charm deployed with the media repository worker enabled.
+    act: start the Synapse charm, set Synapse container to be ready and set server_name.
+    assert: the media is served by the worker, replicating with the main process through Redis.
+    """
+    harness.update_config({"enable_media_repository_worker": True})
+    harness.begin_with_initial_hooks()
+
+    plan = harness.get_container_pebble_plan(synapse.SYNAPSE_CONTAINER_NAME).to_dict()
+    worker_service = plan["services"][synapse.MEDIA_REPOSITORY_SERVICE_NAME]
+    assert worker_service["startup"] == "enabled"
+    assert worker_service["command"] == synapse.get_media_repository_command()
+    assert plan["services"][synapse.REDIS_SERVICE_NAME]["startup"] == "enabled"
+    layer = harness.charm.pebble_service._pebble_layer
+    assert layer["checks"][synapse.CHECK_MEDIA_REPOSITORY_READY_NAME]["http"] == {
+        "url": f"http://127.0.0.1:{synapse.MEDIA_REPOSITORY_HEALTH_PORT}/health"
+    }
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+    assert container.get_service(synapse.MEDIA_REPOSITORY_SERVICE_NAME).is_running()
+    assert container.get_service(synapse.REDIS_SERVICE_NAME).is_running()
+    config = yaml.safe_load(container.pull(synapse.SYNAPSE_CONFIG_PATH).read())
+    assert config["enable_media_repo"] is False
+    assert config["media_instance_running_background_jobs"] == "media_repository1"
+    assert config["redis"] == {"enabled": True, "host": "localhost", "port": synapse.REDIS_PORT}
+    assert config["instance_map"]["main"]["port"] == synapse.SYNAPSE_REPLICATION_PORT
+    assert {
+        "port": synapse.SYNAPSE_REPLICATION_PORT,
+        "type": "http",
+        "bind_addresses": ["127.0.0.1"],
+        "resources": [{"names": ["replication"]}],
+    } in config["listeners"]
+    worker_config = yaml.safe_load(container.pull(synapse.MEDIA_REPOSITORY_CONFIG_PATH).read())
+    assert worker_config["worker_name"] == "media_repository1"
+    assert worker_config["worker_listeners"][0]["port"] == synapse.MEDIA_REPOSITORY_PORT
+    assert {
+        "port": synapse.MEDIA_REPOSITORY_HEALTH_PORT,
+        "type": "http",
+        "bind_addresses": ["127.0.0.1"],
+        "resources": [{"names": ["health"]}],
+    } in worker_config["worker_listeners"]
+    nginx_container = harness.model.unit.get_container(synapse.SYNAPSE_NGINX_CONTAINER_NAME)
+    nginx_config = nginx_container.pull(synapse.SYNAPSE_NGINX_CONFIG_PATH).read()
+    assert f"server localhost:{synapse.MEDIA_REPOSITORY_PORT};" in nginx_config
+    assert "proxy_pass http://media_repository;" in nginx_config
+    assert isinstance(harness.model.unit.status, ops.ActiveStatus)
+
+
+def test_stop_synapse_stops_media_repository_worker(harness: Harness) -> None:
+    """
+    arrange: start the Synapse charm with the media repository worker enabled.
+    act: stop Synapse.
+    assert: the main process and the worker are stopped.
+    """
+    harness.update_config({"enable_media_repository_worker": True})
+    harness.begin_with_initial_hooks()
+    container = harness.model.unit.get_container(synapse.SYNAPSE_CONTAINER_NAME)
+
+    harness.charm.pebble_service.stop_synapse(container)
+
+    assert not container.get_service(synapse.SYNAPSE_SERVICE_NAME).is_running()
+    assert not container.get_service(synapse.MEDIA_REPOSITORY_SERVICE_NAME).is_running()
+
+
+def test_purge_media_cache_media_repository_worker(
+    harness: Harness, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    arrange: start the Synapse charm with the media repository worker enabled.
+    act: purge the remote media cache.
+    assert: the media cache is purged through the worker.
+    """
+    harness.update_config({"enable_media_repository_worker": True})
+    harness.begin()
+    purge_mock = MagicMock(return_value=0)
+    monkeypatch.setattr(synapse, "purge_media_cache", purge_mock)
+
+    purge_remote_media_cache(
+        admin_access_token="token",
+        charm_state=harness.charm._charm_state,
+        before_ts=1000,
+        batch_period_ms=1,
+    )
+
+    purge_mock.assert_called_once_with(
+        admin_access_token="token", before_ts=1000, synapse_url=synapse.MEDIA_REPOSITORY_URL
+    )
@@ -256,18 +256,19 @@ def test_enable_smtp_error(harness: Harness, monkeypatch: pytest.MonkeyPatch):
         synapse.enable_smtp(container_mock, harness.charm._charm_state)
 
 
-def test_enable_serve_server_wellknown_success(monkeypatch: pytest.MonkeyPatch):
+def test_enable_database_pooling_success(monkeypatch: pytest.MonkeyPatch):
     """
     arrange: set mock container with file.
-    act: update smtp_host config and call enable_serve_server_wellknown.
-    assert: new configuration file is pushed and serve_server_wellknown is enabled.
+    act: call enable_database_pooling.
+    assert: new configuration file is pushed with pooling friendly connection settings.
     """
     config_content = """
-    listeners:
-        - type: http
-          port: 8080
-          bind_addresses:
-            - "::"
+    database:
+        name: psycopg2
+        args:
+            user: user
+            cp_min: 5
+            cp_max: 10
     """
     text_io_mock = io.StringIO(config_content)
     pull_mock = Mock(return_value=text_io_mock)
@@ -276,33 +277,122 @@ def test_enable_serve_server_wellknown_success(monkeypatch: pytest.MonkeyPatch):
     monkeypatch.setattr(container_mock, "pull", pull_mock)
     monkeypatch.setattr(container_mock, "push", push_mock)
 
-    synapse.enable_serve_server_wellknown(container_mock)
+    synapse.enable_database_pooling(container_mock)
+
+    assert push_mock.call_args[0][0] == synapse.SYNAPSE_CONFIG_PATH
+    pushed_config = yaml.safe_load(push_mock.call_args[0][1])
+    database_args = pushed_config["database"]["args"]
+    assert database_args["user"] == "user"
+    assert database_args["cp_min"] == synapse.DATABASE_POOLED_CP_MIN
+    assert database_args["cp_max"] == synapse.DATABASE_POOLED_CP_MAX
+    assert database_args["keepalives_idle"] == synapse.DATABASE_POOLED_KEEPALIVES_IDLE
+
+
+def test_enable_database_pooling_error(monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set mock container with file without database section.
+    act: call enable_database_pooling.
+    assert: raise WorkloadError.
+    """
+    text_io_mock = io.StringIO("listeners: []")
+    pull_mock = Mock(return_value=text_io_mock)
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", pull_mock)
+
+    with pytest.raises(synapse.WorkloadError):
+        synapse.enable_database_pooling(container_mock)
+
+
+def test_enable_state_database_success(harness: Harness, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: add state-database relation and set mock container with file.
+    act: call enable_state_database.
+    assert: new configuration file is pushed with the state store in its own database,
+        with the connection pool settings of the main database.
+    """
+    state_relation_data = {
+        "endpoints": "statehost:5432",
+        "username": "state_user",
+        "password": token_hex(16),
+    }
+    harness.add_relation("state-database", "postgresql-state", app_data=state_relation_data)
+    harness.begin()
+    config_content = """
+    database:
+        name: psycopg2
+        args:
+            user: user
+            database: synapse
+            cp_min: 1
+            cp_max: 5
+            keepalives_idle: 10
+    """
+    text_io_mock = io.StringIO(config_content)
+    pull_mock = Mock(return_value=text_io_mock)
+    push_mock = MagicMock()
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", pull_mock)
+    monkeypatch.setattr(container_mock, "push", push_mock)
+
+    synapse.enable_state_database(container_mock, harness.charm._charm_state)
 
-    assert pull_mock.call_args[0][0] == synapse.SYNAPSE_CONFIG_PATH
     assert push_mock.call_args[0][0] == synapse.SYNAPSE_CONFIG_PATH
     expected_config_content = {
-        "listeners": [
-            {"type": "http", "port": 8080, "bind_addresses": ["::"]},
-        ],
-        "serve_server_wellknown": True,
+        "databases": {
+            "main": {
+                "name": "psycopg2",
+                "args": {
+                    "user": "user",
+                    "database": "synapse",
+                    "cp_min": 1,
+                    "cp_max": 5,
+                    "keepalives_idle": 10,
+                },
+                "data_stores": ["main"],
+            },
+            "state": {
+                "name": "psycopg2",
+                "data_stores": ["state"],
+                "args": {
+                    "cp_min": 1,
+                    "cp_max": 5,
+                    "keepalives_idle": 10,
+                    "user": "state_user",
+                    "password": state_relation_data["password"],
+                    "database": f"{harness.charm.app.name}_state",
+                    "host": "statehost",
+                    "port": "5432",
+                },
+            },
+        },
     }
     assert push_mock.call_args[0][1] == yaml.safe_dump(expected_config_content)
 
 
-def test_enable_serve_server_wellknown_error(monkeypatch: pytest.MonkeyPatch):
+def test_enable_state_database_sqlite_error(harness: Harness, monkeypatch: pytest.MonkeyPatch):
     """
-    arrange: set mock container with file.
-    act: call enable_serve_server_wellknown.
-    assert: raise WorkloadError.
+    arrange: add state-database relation and set mock container with SQLite configuration.
+    act: call enable_state_database.
+    assert: raise WorkloadError since the main database must be PostgreSQL.
     """
-    error_message = "Error pulling file"
-    path_error = ops.pebble.PathError(kind="fake", message=error_message)
-    pull_mock = MagicMock(side_effect=path_error)
+    harness.add_relation(
+        "state-database",
+        "postgresql-state",
+        app_data={"endpoints": "statehost:5432", "username": "user", "password": "pass"},
+    )
+    harness.begin()
+    config_content = """
+    database:
+        name: sqlite3
+        args:
+            database: /data/homeserver.db
+    """
+    pull_mock = Mock(return_value=io.StringIO(config_content))
     container_mock = MagicMock()
     monkeypatch.setattr(container_mock, "pull", pull_mock)
 
-    with pytest.raises(synapse.WorkloadError, match=error_message):
-        synapse.enable_serve_server_wellknown(container_mock)
+    with pytest.raises(synapse.WorkloadError, match="main database to be PostgreSQL"):
+        synapse.enable_state_database(container_mock, harness.charm._charm_state)
 
 
 def test_get_registration_shared_secret_success(monkeypatch: pytest.MonkeyPatch):
@@ -340,3 +430,123 @@ def test_get_registration_shared_secret_error(monkeypatch: pytest.MonkeyPatch):
 
     with pytest.raises(ops.pebble.PathError, match=error_message):
         synapse.get_registration_shared_secret(container_mock)
+
+
+def test_configure_background_updates(harness: Harness, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set background updates charm configuration and mock container with file.
+    act: configure background updates.
+    assert: the background_updates block is added to the configuration file.
+    """
+    harness.update_config(
+        {"background_update_sleep_enabled": False, "background_update_duration_ms": 500}
+    )
+    harness.begin()
+    text_io_mock = io.StringIO("server_name: example.com")
+    push_mock = MagicMock()
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", Mock(return_value=text_io_mock))
+    monkeypatch.setattr(container_mock, "push", push_mock)
+
+    synapse.configure_background_updates(container_mock, harness.charm._charm_state)
+
+    assert push_mock.call_args[0][0] == synapse.SYNAPSE_CONFIG_PATH
+    assert yaml.safe_load(push_mock.call_args[0][1]) == {
+        "server_name": "example.com",
+        "background_updates": {
+            "background_update_duration_ms": 500,
+            "sleep_enabled": False,
+            "sleep_duration_ms": 1000,
+            "min_batch_size": 1,
+            "default_batch_size": 100,
+        },
+    }
+
+
+def test_configure_media(harness: Harness, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set media charm configuration and mock container with file.
+    act: configure media.
+    assert: the media limits and thumbnail sizes are added to the configuration file.
+    """
+    harness.update_config(
+        {
+            "max_upload_size": "100M",
+            "max_image_pixels": "16M",
+            "dynamic_thumbnails": True,
+            "thumbnail_sizes": "32x32-crop, 640x480-scale",
+        }
+    )
+    harness.begin()
+    push_mock = MagicMock()
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", Mock(return_value=io.StringIO("{}")))
+    monkeypatch.setattr(container_mock, "push", push_mock)
+
+    synapse.configure_media(container_mock, harness.charm._charm_state)
+
+    assert yaml.safe_load(push_mock.call_args[0][1]) == {
+        "max_upload_size": "100M",
+        "max_image_pixels": "16M",
+        "dynamic_thumbnails": True,
+        "thumbnail_sizes": [
+            {"width": 32, "height": 32, "method": "crop"},
+            {"width": 640, "height": 480, "method": "scale"},
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        pytest.param({"max_upload_size": "1G"}, id="max_upload_size unit"),
+        pytest.param({"max_image_pixels": "0M"}, id="max_image_pixels zero"),
+        pytest.param({"thumbnail_sizes": "32x32"}, id="thumbnail_sizes without method"),
+        pytest.param({"thumbnail_sizes": "32x32-fit"}, id="thumbnail_sizes invalid method"),
+    ],
+)
+def test_configure_media_invalid(harness: Harness, config: dict):
+    """
+    arrange: set an invalid media charm configuration.
+    act: start the Synapse charm.
+    assert: Synapse charm is blocked.
+    """
+    harness.update_config(config)
+
+    harness.begin()
+
+    assert isinstance(harness.model.unit.status, ops.BlockedStatus)
+    assert next(iter(config)) in str(harness.model.unit.status)
+
+
+def test_enable_retention(harness: Harness, monkeypatch: pytest.MonkeyPatch):
+    """
+    arrange: set retention charm configuration and mock container with file.
+    act: enable retention.
+    assert: the retention block is added to the configuration file without unset values.
+    """
+    harness.update_config(
+        {
+            "enable_retention": True,
+            "retention_default_policy_max_lifetime": "1y",
+            "retention_allowed_lifetime_min": "1d",
+            "retention_purge_job_longest_max_lifetime": "3d",
+            "retention_purge_job_interval": "12h",
+        }
+    )
+    harness.begin()
+    push_mock = MagicMock()
+    container_mock = MagicMock()
+    monkeypatch.setattr(container_mock, "pull", Mock(return_value=io.StringIO("{}")))
+    monkeypatch.setattr(container_mock, "push", push_mock)
+
+    synapse.enable_retention(container_mock, harness.charm._charm_state)
+
+    assert yaml.safe_load(push_mock.call_args[0][1]) == {
+        "retention": {
+            "enabled": True,
+            "default_policy": {"max_lifetime": "1y"},
+            "allowed_lifetime_min": "1d",
+            "purge_jobs": [{"longest_max_lifetime": "3d", "interval": "12h"}],
+        }
+    }